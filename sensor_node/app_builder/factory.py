@@ -1,17 +1,56 @@
+from urllib.parse import urlsplit
+
 from sensor_node.services.sensor_service import SensorService
 from sensor_node.services.retry_service import RetryService
+from sensor_node.domain.interfaces import TelemetryClient
 from sensor_node.infrastructure.http_client import AsyncHttpTelemetryClient
+from sensor_node.infrastructure.tcp_client import AsyncTcpTelemetryClient
+from sensor_node.infrastructure.udp_client import AsyncUdpTelemetryClient
 from sensor_node.infrastructure.database.sqlite.repository import SensorDataSQLRepository
 
 
-def create_sensor_service(name: str, rate: float, endpoint: str):
-    client = AsyncHttpTelemetryClient(endpoint=endpoint)
+def create_telemetry_client(
+    endpoint: str, batch_size: int = 1, batch_linger: float = 0.05, wire_format: str = "json"
+) -> TelemetryClient:
+    """
+    Creates the client matching the endpoint's scheme.
+
+    tcp://host:port streams over TCP, udp://host:port sends fire-and-forget
+    datagrams, anything else is HTTP.
+    """
+    url = urlsplit(endpoint)
+    if url.scheme in ("tcp", "udp"):
+        if url.hostname is None or url.port is None:
+            raise ValueError(f"Endpoint must have the form {url.scheme}://host:port, got '{endpoint}'")
+        if url.scheme == "udp":
+            return AsyncUdpTelemetryClient(host=url.hostname, port=url.port)
+        return AsyncTcpTelemetryClient(host=url.hostname, port=url.port)
+    return AsyncHttpTelemetryClient(
+        endpoint=endpoint, batch_size=batch_size, linger=batch_linger, wire_format=wire_format
+    )
+
+
+def create_sensor_service(
+    name: str,
+    rate: float,
+    endpoint: str,
+    batch_size: int = 1,
+    batch_linger: float = 0.05,
+    wire_format: str = "json",
+    max_in_flight: int = 8,
+    queue_size: int = 1000,
+):
+    client = create_telemetry_client(
+        endpoint=endpoint, batch_size=batch_size, batch_linger=batch_linger, wire_format=wire_format
+    )
     repo = SensorDataSQLRepository()
     return SensorService(
         sensor_name=name,
         repository=repo,
         rate=rate,
         client=client,
+        max_in_flight=max_in_flight,
+        queue_size=queue_size,
     )
 
 
@@ -25,7 +64,7 @@ def create_retry_service(
 ):
     retry_service = RetryService(
         repository=SensorDataSQLRepository(),
-        client=AsyncHttpTelemetryClient(endpoint=endpoint),
+        client=create_telemetry_client(endpoint=endpoint),
         max_retries=max_retries,
         initial_delay=initial_delay,
         max_delay=max_delay,
@@ -0,0 +1,14 @@
+class TelemetrySinkBusyError(Exception):
+    """Exception raised when the sink refuses data because it is overloaded or rate limiting."""
+
+    def __init__(self, message="Telemetry sink is busy.", retry_after: float | None = None):
+        self.message = message
+        # Seconds the sink asked us to wait before retrying, if it said.
+        self.retry_after = retry_after
+        super().__init__(self.message)
+
+
+class TelemetrySinkRejectedError(Exception):
+    """Exception raised when the sink refuses data for a reason other than load (e.g. a malformed frame)."""
+
+    pass
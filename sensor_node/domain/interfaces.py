@@ -28,6 +28,13 @@ class SensorDataRepository(ABC):
         """
         ...
 
+    @abstractmethod
+    def create_many(self, sensor_data: list[SensorData]) -> None:
+        """
+        Persist several new SensorData records in one transaction.
+        """
+        ...
+
     @abstractmethod
     def update_status(self, object_id: UUID, status: SensorDataDeliveryStatus) -> SensorData:
         """
@@ -35,6 +42,13 @@ class SensorDataRepository(ABC):
         """
         ...
 
+    @abstractmethod
+    def update_status_many(self, object_ids: list[UUID], status: SensorDataDeliveryStatus) -> int:
+        """
+        Update the status of several existing SensorData records in one transaction; return how many were found.
+        """
+        ...
+
     @abstractmethod
     def update_retry_count(self, object_id: UUID, retry_count: int) -> bool: ...
 
@@ -1,9 +1,14 @@
+import time
 import uuid
 from dataclasses import dataclass
-from datetime import datetime
 from enum import Enum
 
 
+def now_us() -> int:
+    """Returns the current time as integer microseconds since the Unix epoch."""
+    return time.time_ns() // 1_000
+
+
 class SensorDataDeliveryStatus(Enum):
     DElIVERED = "DELIVERED"
     FAILED = "FAILED"
@@ -17,6 +22,7 @@ class SensorData:
     id: uuid.UUID
     name: str
     value: int
-    timestamp: datetime
+    # Microseconds since the Unix epoch (UTC); formatted only for display.
+    timestamp_us: int
     status: SensorDataDeliveryStatus = SensorDataDeliveryStatus.PENDING
     retry_count: int = 0
@@ -1,14 +1,41 @@
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import Column, String, Integer, DateTime, Enum as SQLEnum, UUID, Index
+from sqlalchemy import BigInteger, Column, String, Integer, Enum as SQLEnum, UUID, Index
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.types import TypeDecorator
 
 from sensor_node.domain.sensor import SensorDataDeliveryStatus
-from sensor_node.domain.sensor import SensorData
+from sensor_node.domain.sensor import SensorData, now_us
 
 Base = declarative_base()
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class EpochMicroseconds(TypeDecorator):
+    """
+    Integer microseconds since the Unix epoch, stored as a BIGINT.
+
+    Databases created before timestamps were integers hold them in a DATETIME
+    column, as naive UTC strings (SQLite keeps the column's existing rows as
+    they are). Those are converted when read, so no migration is needed;
+    new rows are stored as integers in the same column.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=UTC)
+        return (value - _EPOCH) // _MICROSECOND
+
 
 class SensorDataModel(Base):
     __tablename__ = "sensor_data"
@@ -26,10 +53,12 @@ class SensorDataModel(Base):
     )
     name = Column(String(length=100), nullable=False)
     value = Column(Integer, nullable=False)
-    timestamp = Column(
-        DateTime(timezone=True),
+    # The column keeps its name so existing databases work unchanged.
+    timestamp_us = Column(
+        "timestamp",
+        EpochMicroseconds,
         nullable=False,
-        default=datetime.utcnow,
+        default=now_us,
     )
     status = Column(
         SQLEnum(SensorDataDeliveryStatus, name="sensor_status"),
@@ -47,8 +76,9 @@ class SensorDataModel(Base):
             id=self.id,
             name=self.name,
             value=self.value,
-            timestamp=self.timestamp,
+            timestamp_us=self.timestamp_us,
             status=self.status,
+            retry_count=self.retry_count,
         )
 
     @staticmethod
@@ -60,6 +90,6 @@ class SensorDataModel(Base):
             id=sensor_data.id,
             name=sensor_data.name,
             value=sensor_data.value,
-            timestamp=sensor_data.timestamp,
+            timestamp_us=sensor_data.timestamp_us,
             status=sensor_data.status,
         )
@@ -1,4 +1,3 @@
-from typing import List, Optional
 from uuid import UUID
 
 from sensor_node.domain.interfaces import SensorDataRepository
@@ -35,6 +34,16 @@ class SensorDataSQLRepository(SensorDataRepository):
             session.refresh(orm)
             return orm.to_domain()
 
+    def create_many(self, sensor_data: list[SensorData]) -> None:
+        """
+        Persist several new SensorData records in one transaction
+        """
+        if not sensor_data:
+            return
+        with self._session_factory() as session:
+            session.add_all([SensorDataModel.from_domain(data) for data in sensor_data])
+            session.commit()
+
     def update_status(self, object_id: UUID, status: SensorDataDeliveryStatus) -> bool:
         """
         Atomically update only the `status` field of an existing SensorData record
@@ -53,6 +62,26 @@ class SensorDataSQLRepository(SensorDataRepository):
             session.commit()
             return True
 
+    def update_status_many(self, object_ids: list[UUID], status: SensorDataDeliveryStatus) -> int:
+        """
+        Update only the `status` field of several SensorData records in one transaction
+        """
+        updated = 0
+        if not object_ids:
+            return updated
+        with self._session_factory() as session:
+            # Chunked to stay below SQLite's limit on bound parameters per statement.
+            for start in range(0, len(object_ids), 500):
+                stmt = (
+                    update(SensorDataModel)
+                    .where(SensorDataModel.id.in_(object_ids[start : start + 500]))
+                    .values(status=status)
+                    .execution_options(synchronize_session=False)
+                )
+                updated += session.execute(stmt).rowcount
+            session.commit()
+            return updated
+
     def update_retry_count(self, object_id: UUID, retry_count: int) -> bool:
         """
         Atomically update only the `status` field of an existing SensorData record
@@ -71,7 +100,7 @@ class SensorDataSQLRepository(SensorDataRepository):
             session.commit()
             return True
 
-    def list_by_status(self, status: SensorDataDeliveryStatus, batch_size: int) -> List[SensorData]:
+    def list_by_status(self, status: SensorDataDeliveryStatus, batch_size: int) -> list[SensorData]:
         """
         Return all sensor readings matching a given status.
         """
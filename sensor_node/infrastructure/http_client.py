@@ -1,22 +1,160 @@
+import asyncio
+from uuid import UUID
+
 import aiohttp
+from sensor_node.domain.exceptions import TelemetrySinkBusyError
 from sensor_node.domain.interfaces import TelemetryClient
 from sensor_node.domain.sensor import SensorData
+from sensor_node.infrastructure.wire_format import BINARY_BATCH_CONTENT_TYPE, WIRE_FORMATS, encode_binary_batch
+
+# Statuses the sink uses to shed load; they carry a Retry-After hint.
+BUSY_STATUSES = (429, 503)
+
+# Statuses with which a sink that predates the binary format rejects it. A 400
+# or 422 means the sink understood the format but refused this batch, so it
+# fails the batch like any other error rather than switching formats.
+UNSUPPORTED_FORMAT_STATUSES = (404, 415)
 
 
 class AsyncHttpTelemetryClient(TelemetryClient):
-    def __init__(self, endpoint: str, timeout: float = 5.0):
+    """
+    HTTP client for the Telemetry Sink.
+
+    With the default ``batch_size`` of 1 every reading is POSTed on its own.
+    With a larger ``batch_size`` readings are coalesced and POSTed to the batch
+    endpoint once either ``batch_size`` readings are pending or ``linger``
+    seconds have passed since the first pending reading. ``send`` still only
+    returns once the reading's batch has been delivered, and raises if it failed.
+
+    With ``wire_format="binary"`` batches (including batches of one) are
+    sent in the sink's compact binary format. If the sink does not support
+    that format (404 or 415) the client falls back to JSON for the rest of
+    its lifetime and resends the batch.
+
+    When the sink sheds load (429/503) ``send`` raises
+    ``TelemetrySinkBusyError`` carrying the sink's ``Retry-After`` hint.
+
+    Every reading is sent with its ``id``, so a reading resent after a
+    timeout (e.g. by ``RetryService``) is recognized by the sink and not
+    logged twice.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        timeout: float = 5.0,
+        batch_size: int = 1,
+        linger: float = 0.05,
+        batch_endpoint: str | None = None,
+        wire_format: str = "json",
+    ):
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unknown wire format '{wire_format}', expected one of {WIRE_FORMATS}")
         self.endpoint = endpoint
+        self.wire_format = wire_format
+        self.batch_endpoint = batch_endpoint or endpoint.rstrip("/") + "/batch"
+        self.batch_size = batch_size
+        self.linger = linger
         self._timeout = aiohttp.ClientTimeout(total=timeout)
         self._session = aiohttp.ClientSession(timeout=self._timeout)
 
-    async def send(self, sensor_data: SensorData) -> None:
-        payload = {
+        # Readings waiting to be coalesced into the next batch, with the future
+        # each caller of `send` is waiting on.
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._linger_handle: asyncio.TimerHandle | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _to_payload(sensor_data: SensorData) -> dict:
+        return {
             "name": sensor_data.name,
             "value": sensor_data.value,
-            "timestamp": int(sensor_data.timestamp.timestamp() * 1000),
+            "timestamp_us": sensor_data.timestamp_us,
+            "id": str(sensor_data.id),
         }
-        async with self._session.post(url=self.endpoint, json=payload) as resp:
-            resp.raise_for_status()
+
+    @staticmethod
+    def _raise_for_status(resp: aiohttp.ClientResponse) -> None:
+        if resp.status in BUSY_STATUSES:
+            try:
+                retry_after = float(resp.headers["Retry-After"])
+            except (KeyError, ValueError):
+                retry_after = None
+            raise TelemetrySinkBusyError(f"Sink responded {resp.status} {resp.reason}", retry_after=retry_after)
+        resp.raise_for_status()
+
+    async def send(self, sensor_data: SensorData) -> None:
+        payload = self._to_payload(sensor_data)
+        if self.batch_size <= 1 and self.wire_format == "binary":
+            await self._post_binary([payload])
+            return
+        if self.batch_size <= 1:
+            async with self._session.post(url=self.endpoint, json=payload) as resp:
+                self._raise_for_status(resp)
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future))
+
+        if len(self._pending) >= self.batch_size:
+            self._flush_pending()
+        elif self._linger_handle is None:
+            self._linger_handle = loop.call_later(self.linger, self._flush_pending)
+
+        await future
+
+    def _flush_pending(self) -> None:
+        """Hands the pending readings over to a background POST task."""
+        if self._linger_handle is not None:
+            self._linger_handle.cancel()
+            self._linger_handle = None
+
+        if not self._pending:
+            return
+
+        items, self._pending = self._pending, []
+        task = asyncio.create_task(self._post_batch(items))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _post_binary(self, payloads: list[dict]) -> None:
+        """POSTs one batch in the binary format, falling back to JSON if the sink does not accept it."""
+        body = encode_binary_batch(
+            ((p["name"], p["value"], p["timestamp_us"]) for p in payloads),
+            record_ids=[UUID(p["id"]).bytes for p in payloads],
+        )
+        headers = {"Content-Type": BINARY_BATCH_CONTENT_TYPE}
+        async with self._session.post(url=self.batch_endpoint, data=body, headers=headers) as resp:
+            if resp.status not in UNSUPPORTED_FORMAT_STATUSES:
+                self._raise_for_status(resp)
+                return
+
+        self.wire_format = "json"
+        async with self._session.post(url=self.batch_endpoint, json=payloads) as resp:
+            self._raise_for_status(resp)
+
+    async def _post_batch(self, items: list[tuple[dict, asyncio.Future]]) -> None:
+        """POSTs one batch and resolves the futures of all readings in it."""
+        payloads = [payload for payload, _ in items]
+        try:
+            if self.wire_format == "binary":
+                await self._post_binary(payloads)
+            else:
+                async with self._session.post(url=self.batch_endpoint, json=payloads) as resp:
+                    self._raise_for_status(resp)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in items:
+                if not future.done():
+                    future.set_result(None)
 
     async def close(self) -> None:
+        # Deliver whatever is still lingering before the session goes away.
+        self._flush_pending()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
         await self._session.close()
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import struct
+
+from sensor_node.domain.exceptions import TelemetrySinkBusyError, TelemetrySinkRejectedError
+from sensor_node.domain.interfaces import TelemetryClient
+from sensor_node.domain.sensor import SensorData
+from sensor_node.infrastructure.wire_format import encode_binary_batch
+
+logger = logging.getLogger(__name__)
+
+# Framing of the sink's TCP stream transport (see `telemetry_sink.adapters.tcp_server`).
+FRAME_HEADER = struct.Struct(">IBI")
+NACK_HEADER = struct.Struct(">Hd")
+
+FRAME_DATA = 0x01
+FRAME_ACK = 0x02
+FRAME_NACK = 0x03
+FRAME_CREDIT = 0x04
+
+BUSY_STATUSES = (429, 503)
+
+
+class AsyncTcpTelemetryClient(TelemetryClient):
+    """
+    Streaming TCP client for the Telemetry Sink.
+
+    Keeps one connection open and pipelines readings over it, one frame per
+    reading, without waiting for earlier frames to be acknowledged. The sink
+    grants flow-control credit; ``send`` waits while all credit is used up
+    and returns once the sink has acknowledged its frame.
+
+    When the sink sheds load ``send`` raises ``TelemetrySinkBusyError``
+    carrying the sink's retry hint. If the connection drops, every reading in
+    flight fails and the next ``send`` reconnects.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._receiver: asyncio.Task | None = None
+
+        # Frames the sink still allows us to send, and a condition senders wait on for more.
+        self._credit = 0
+        self._credit_changed = asyncio.Condition()
+        self._next_sequence = 0
+        self._waiting: dict[int, asyncio.Future] = {}
+
+    @staticmethod
+    def _encode(sensor_data: SensorData) -> bytes:
+        # The reading's ID lets the sink drop it if it is resent after a lost ACK.
+        return encode_binary_batch(
+            [(sensor_data.name, sensor_data.value, sensor_data.timestamp_us)], record_ids=[sensor_data.id.bytes]
+        )
+
+    async def _connect(self) -> None:
+        """Opens the stream; must be called with `_credit_changed` held."""
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=self.timeout
+        )
+        self._credit = 0
+        self._receiver = asyncio.create_task(self._receive(self._reader))
+        logger.info(f"Connected to telemetry sink at {self.host}:{self.port}")
+
+    async def send(self, sensor_data: SensorData) -> None:
+        payload = self._encode(sensor_data)
+        loop = asyncio.get_running_loop()
+
+        async with self._credit_changed:
+            while True:
+                if self._writer is None:
+                    await self._connect()
+                if self._credit > 0:
+                    break
+                await asyncio.wait_for(self._credit_changed.wait(), timeout=self.timeout)
+
+            self._credit -= 1
+            sequence = self._next_sequence
+            self._next_sequence = (sequence + 1) & 0xFFFFFFFF
+            future = loop.create_future()
+            self._waiting[sequence] = future
+            writer = self._writer
+            writer.write(FRAME_HEADER.pack(len(payload), FRAME_DATA, sequence) + payload)
+
+        try:
+            await writer.drain()
+            await asyncio.wait_for(future, timeout=self.timeout)
+        finally:
+            self._waiting.pop(sequence, None)
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        """Resolves acknowledged frames and collects credit until the connection closes."""
+        error: Exception = ConnectionError("Connection to telemetry sink closed")
+        try:
+            while True:
+                length, frame_type, arg = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                payload = await reader.readexactly(length) if length else b""
+
+                credit = 1
+                if frame_type == FRAME_CREDIT:
+                    credit = arg
+                elif frame_type == FRAME_ACK:
+                    self._resolve(arg, None)
+                elif frame_type == FRAME_NACK:
+                    self._resolve(arg, self._nack_error(payload))
+                else:
+                    raise ConnectionError(f"Unexpected frame type {frame_type} from telemetry sink")
+
+                async with self._credit_changed:
+                    self._credit += credit
+                    self._credit_changed.notify(credit)
+        except asyncio.IncompleteReadError:
+            pass
+        except ConnectionError as e:
+            error = e
+        finally:
+            await self._disconnect(error)
+
+    @staticmethod
+    def _nack_error(payload: bytes) -> Exception:
+        status_code, retry_after = NACK_HEADER.unpack_from(payload)
+        message = f"Sink refused frame with {status_code}: {payload[NACK_HEADER.size :].decode('utf-8', 'replace')}"
+        if status_code in BUSY_STATUSES:
+            return TelemetrySinkBusyError(message, retry_after=retry_after or None)
+        return TelemetrySinkRejectedError(message)
+
+    def _resolve(self, sequence: int, error: Exception | None) -> None:
+        future = self._waiting.pop(sequence, None)
+        if future is None or future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+    async def _disconnect(self, error: Exception) -> None:
+        """Fails every frame in flight and forgets the connection so the next send reconnects."""
+        waiting, self._waiting = self._waiting, {}
+        for future in waiting.values():
+            if not future.done():
+                future.set_exception(error)
+
+        async with self._credit_changed:
+            writer, self._writer, self._reader = self._writer, None, None
+            self._credit = 0
+            self._credit_changed.notify_all()
+        if writer is not None:
+            writer.close()
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._receiver is not None:
+            try:
+                await self._receiver
+            except asyncio.CancelledError:
+                pass
+            self._receiver = None
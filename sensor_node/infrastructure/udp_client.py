@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import struct
+from dataclasses import asdict, dataclass
+
+from sensor_node.domain.interfaces import TelemetryClient
+from sensor_node.domain.sensor import SensorData
+from sensor_node.infrastructure.wire_format import encode_binary_batch
+
+logger = logging.getLogger(__name__)
+
+# Datagram header of the sink's UDP transport (see `telemetry_sink.adapters.udp_server`).
+DATAGRAM_HEADER = struct.Struct(">BI")
+DATAGRAM_VERSION = 1
+
+
+@dataclass
+class SensorSendStats:
+    sent: int = 0
+    # Datagrams the local network stack refused to send.
+    send_errors: int = 0
+    # The sequence number the next datagram of this sensor will carry.
+    next_sequence: int = 0
+
+
+class _ErrorCounter(asyncio.DatagramProtocol):
+    def __init__(self):
+        # ICMP errors reported for earlier datagrams (e.g. the sink is not listening).
+        self.errors = 0
+
+    def error_received(self, exc: Exception):
+        self.errors += 1
+        logger.debug(f"UDP send error: {exc}")
+
+
+class AsyncUdpTelemetryClient(TelemetryClient):
+    """
+    Fire-and-forget UDP client for the Telemetry Sink.
+
+    Every reading is sent as one datagram and ``send`` returns as soon as it
+    is handed to the socket; there is no acknowledgement, so a reading counts
+    as delivered once sent. Datagrams carry a per-sensor sequence number from
+    which the sink derives loss counters; local send failures are counted in
+    ``stats``.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._transport: asyncio.DatagramTransport | None = None
+        self._protocol: _ErrorCounter | None = None
+        self._stats: dict[str, SensorSendStats] = {}
+
+    async def _connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, self._protocol = await loop.create_datagram_endpoint(
+            _ErrorCounter, remote_addr=(self.host, self.port)
+        )
+
+    async def send(self, sensor_data: SensorData) -> None:
+        if self._transport is None:
+            await self._connect()
+
+        stats = self._stats.get(sensor_data.name)
+        if stats is None:
+            stats = self._stats[sensor_data.name] = SensorSendStats()
+        sequence = stats.next_sequence
+        stats.next_sequence = (sequence + 1) & 0xFFFFFFFF
+
+        datagram = DATAGRAM_HEADER.pack(DATAGRAM_VERSION, sequence) + encode_binary_batch(
+            [(sensor_data.name, sensor_data.value, sensor_data.timestamp_us)]
+        )
+        try:
+            self._transport.sendto(datagram)
+        except OSError as e:
+            stats.send_errors += 1
+            logger.debug(f"Failed to send datagram for '{sensor_data.name}': {e}")
+            return
+        stats.sent += 1
+
+    def stats(self) -> dict[str, dict]:
+        """Per-sensor send counters, plus the number of ICMP errors reported by the network."""
+        snapshot = {name: asdict(stats) for name, stats in self._stats.items()}
+        if self._protocol is not None and self._protocol.errors:
+            snapshot["_network_errors"] = {"errors": self._protocol.errors}
+        return snapshot
+
+    async def close(self) -> None:
+        if self._transport is not None:
+            for name, stats in self._stats.items():
+                logger.info(f"UDP sensor '{name}': {asdict(stats)}")
+            self._transport.close()
+            self._transport = None
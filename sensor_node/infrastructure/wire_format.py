@@ -0,0 +1,80 @@
+"""
+Encoder for the sink's compact binary batch format.
+
+Mirrors `telemetry_sink.adapters.wire_format` (see there for the layout);
+the node always sends microsecond timestamps, and record IDs when given.
+"""
+
+from collections.abc import Iterable, Sequence
+
+BINARY_BATCH_CONTENT_TYPE = "application/vnd.telemetry.batch"
+WIRE_FORMAT_VERSION = 1
+FLAG_MICROSECONDS = 0x01
+FLAG_RECORD_IDS = 0x02
+WIRE_FORMATS = ("json", "binary")
+
+
+def _varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(out: bytearray, value: int) -> None:
+    _varint(out, (value << 1) if value >= 0 else ((-value) << 1) - 1)
+
+
+def encode_binary_batch(readings: Iterable[tuple[str, int, int]], record_ids: Sequence[bytes] | None = None) -> bytes:
+    """
+    Encodes `(name, value, timestamp_us)` tuples into a binary batch.
+
+    Args:
+        readings: The readings to encode.
+        record_ids: The 16-byte ID (`UUID.bytes`) of each reading, letting the sink drop replays.
+
+    Returns:
+        The encoded batch body.
+    """
+    names = {}
+    name_ids, values, timestamps = [], [], []
+    for name, value, timestamp_us in readings:
+        name_ids.append(names.setdefault(name, len(names)))
+        values.append(value)
+        timestamps.append(timestamp_us)
+
+    if record_ids is not None and len(record_ids) != len(values):
+        raise ValueError(f"Got {len(record_ids)} record IDs for {len(values)} readings")
+    flags = FLAG_MICROSECONDS if record_ids is None else FLAG_MICROSECONDS | FLAG_RECORD_IDS
+    out = bytearray((WIRE_FORMAT_VERSION, flags))
+    _varint(out, len(names))
+    for name in names:
+        encoded = name.encode("utf-8")
+        _varint(out, len(encoded))
+        out += encoded
+
+    _varint(out, len(name_ids))
+    for name_id in name_ids:
+        _varint(out, name_id)
+
+    previous = delta = 0
+    for i, timestamp in enumerate(timestamps):
+        if i == 0:
+            _zigzag(out, timestamp)
+        elif i == 1:
+            delta = timestamp - previous
+            _zigzag(out, delta)
+        else:
+            new_delta = timestamp - previous
+            _zigzag(out, new_delta - delta)
+            delta = new_delta
+        previous = timestamp
+
+    for value in values:
+        _zigzag(out, value)
+    if record_ids is not None:
+        for record_id in record_ids:
+            if len(record_id) != 16:
+                raise ValueError("Record IDs must be 16 bytes")
+            out += record_id
+    return bytes(out)
@@ -18,9 +18,23 @@ async def main():
     config = load_config()
     sensor_name = config.get("sensor", "name", fallback="default_sensor")
     sensor_rate = config.getfloat("sensor", "rate", fallback=1.0)
+    max_in_flight = config.getint("sensor", "max_in_flight", fallback=8)
+    queue_size = config.getint("sensor", "queue_size", fallback=1000)
     sink_endpoint = config.get("telemetry_sink", "endpoint", fallback="http://localhost:8000/telemetry")
+    batch_size = config.getint("telemetry_sink", "batch_size", fallback=1)
+    batch_linger = config.getfloat("telemetry_sink", "batch_linger", fallback=0.05)
+    wire_format = config.get("telemetry_sink", "wire_format", fallback="json")
 
-    sensor_service = create_sensor_service(name=sensor_name, rate=sensor_rate, endpoint=sink_endpoint)
+    sensor_service = create_sensor_service(
+        name=sensor_name,
+        rate=sensor_rate,
+        endpoint=sink_endpoint,
+        batch_size=batch_size,
+        batch_linger=batch_linger,
+        wire_format=wire_format,
+        max_in_flight=max_in_flight,
+        queue_size=queue_size,
+    )
     retry_service = create_retry_service(endpoint=sink_endpoint)
 
     # 2) Create the tasks to run concurrently
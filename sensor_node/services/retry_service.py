@@ -1,9 +1,11 @@
 import asyncio
 import logging
 import random
+import time
 from typing import Optional
 
 
+from sensor_node.domain.exceptions import TelemetrySinkBusyError
 from sensor_node.domain.interfaces import SensorDataRepository, TelemetryClient
 from sensor_node.domain.sensor import SensorDataDeliveryStatus, SensorData
 
@@ -13,6 +15,8 @@ class RetryService:
     Service responsible for retrying failed sensor data transmissions.
 
     Implements an exponential backoff strategy and limits the number of retries.
+    When the sink reports it is busy, its Retry-After hint pauses all retries
+    until then, and the attempt does not count against the record.
     """
 
     def __init__(
@@ -45,6 +49,8 @@ class RetryService:
         self.batch_size = batch_size
         self._stop_event = asyncio.Event()
         self._task: Optional[asyncio.Task] = None
+        # Monotonic time before which the sink asked us not to send anything.
+        self._paused_until = 0.0
         self.logger = logging.getLogger(__name__)
 
     async def start(self):
@@ -116,8 +122,9 @@ class RetryService:
 
         self.repository.update_status(object_id=record.id, status=SensorDataDeliveryStatus.RETRYING)
 
-        # Calculate backoff delay based on retry count
+        # Calculate backoff delay based on retry count, but never retry before the sink's hint
         delay = min(self.initial_delay * (2**record.retry_count) * (0.5 + random.random()), self.max_delay)
+        delay = max(delay, self._paused_until - time.monotonic())
 
         self.logger.debug(f"Retrying record {record.id} with delay {delay:.2f}s (attempt {record.retry_count + 1})")
 
@@ -130,7 +137,15 @@ class RetryService:
             self.repository.update_status(object_id=record.id, status=SensorDataDeliveryStatus.DElIVERED)
             self.logger.info(f"Successfully retried record {record.id}")
 
+        except TelemetrySinkBusyError as e:
+            # The sink is shedding load: back off as asked and keep the attempt budget
+            pause = e.retry_after if e.retry_after is not None else delay
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self.repository.update_status(object_id=record.id, status=SensorDataDeliveryStatus.FAILED)
+            self.logger.warning(f"Sink busy while retrying record {record.id}, pausing retries for {pause:.1f}s: {e}")
+
         except Exception as e:
-            # Increment retry count and keep FAILED status
+            # Increment retry count and put the record back to FAILED so it is picked up again
             self.repository.update_retry_count(object_id=record.id, retry_count=record.retry_count + 1)
+            self.repository.update_status(object_id=record.id, status=SensorDataDeliveryStatus.FAILED)
             self.logger.warning(f"Failed to retry record {record.id}: {e}")
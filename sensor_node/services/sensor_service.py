@@ -2,8 +2,10 @@ import asyncio
 import random
 import uuid
 import logging
-from datetime import datetime
-from sensor_node.domain.sensor import SensorData, SensorDataDeliveryStatus
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID
+
+from sensor_node.domain.sensor import SensorData, SensorDataDeliveryStatus, now_us
 from sensor_node.domain.interfaces import TelemetryClient, SensorDataRepository
 
 
@@ -11,58 +13,227 @@ logger = logging.getLogger(__name__)
 
 
 class SensorService:
+    """
+    Samples the sensor at a fixed rate and delivers the readings to the sink.
+
+    Sampling and sending are decoupled. Readings are generated on an
+    absolute-deadline clock: each tick is scheduled `1 / rate` after the
+    previous tick, not after the previous send, so the rate does not drift
+    with sink latency. Each reading is queued for a pool of `max_in_flight`
+    concurrent senders.
+
+    A slow sink never blocks sampling:
+    - When the queue is full, the reading is marked FAILED and left to the
+      `RetryService`.
+    - When the sampler itself falls more than a tick behind (e.g. the event
+      loop was blocked), the missed ticks are skipped rather than sent in a
+      burst.
+
+    Readings and their status changes are saved to the repository in batches,
+    by a single task running the commits on a dedicated thread, so neither
+    the sampler nor the senders wait for SQLite. A reading is always saved
+    before its status is updated. Writes that fail are put back and tried
+    again with the next batch.
+    """
+
     def __init__(
         self,
         client: TelemetryClient,
         repository: SensorDataRepository,
         sensor_name: str,
         rate: float,
+        max_in_flight: int = 8,
+        queue_size: int = 1000,
+        drain_timeout: float = 5.0,
     ):
+        """
+        Args:
+            client: Client for sending telemetry data
+            repository: Repository the readings are saved to
+            sensor_name: The name readings are sent under
+            rate: Readings generated per second
+            max_in_flight: Number of concurrent senders, i.e. sends in flight at most
+            queue_size: Readings waiting for a sender at most; further readings go to the retry service
+            drain_timeout: Time in seconds to deliver queued readings on shutdown
+        """
+        if rate <= 0:
+            raise ValueError("'rate' must be positive.")
+        if max_in_flight <= 0:
+            raise ValueError("'max_in_flight' must be positive.")
         self.client = client
         self.repository = repository
         self.sensor_name = sensor_name
         self.interval = 1.0 / rate
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.drain_timeout = drain_timeout
+        # Ticks skipped because sampling fell behind, and readings handed to the retry service
+        # because every sender was busy.
+        self.missed_ticks = 0
+        self.backlogged = 0
         self._stop_event = asyncio.Event()
+        self._db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sensor-db")
+        # Pending repository writes, taken by the persist task as one batch.
+        self._unsaved: list[SensorData] = []
+        self._status_updates: dict[SensorDataDeliveryStatus, list[UUID]] = {}
+        self._persist_wakeup = asyncio.Event()
+        self._persist_closing = False
 
     async def start(self) -> None:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        persister = asyncio.create_task(self._persist_loop(), name="SensorPersister")
+        senders = [
+            asyncio.create_task(self._send_loop(queue), name=f"SensorSender-{i}") for i in range(self.max_in_flight)
+        ]
         try:
-            while not self._stop_event.is_set():
-                data = self.create_sensor_data()
-                try:
-                    logger.info(f"Sending message: {data.id} for sensor '{self.sensor_name}'")
-                    await self.client.send(data)
-                    self.repository.update_status(object_id=data.id, status=SensorDataDeliveryStatus.DElIVERED)
-                    logger.info(f"DELIVERED message: {data.id} for sensor '{self.sensor_name}'")
-                except Exception:
-                    logger.error(f"Failed to send message: {data.id} for sensor '{self.sensor_name}'")
-                    # Update status to FAILED in the repository
-                    # This will allow the retry service to pick it up later
-                    self.repository.update_status(object_id=data.id, status=SensorDataDeliveryStatus.FAILED)
-                await asyncio.sleep(self.interval)
+            await self._sample_loop(queue)
         finally:
+            await self._stop_senders(senders, queue)
+            # Let the persist task finish its commit rather than cancel it, so nothing it took is dropped.
+            self._persist_closing = True
+            self._persist_wakeup.set()
+            await asyncio.gather(persister, return_exceptions=True)
+            # Whatever the persist task had not taken yet, or failed to save.
+            await self._save_pending()
+            if self._unsaved or self._status_updates:
+                logger.error(
+                    f"Dropping {len(self._unsaved)} unsaved readings and "
+                    f"{sum(len(ids) for ids in self._status_updates.values())} status updates "
+                    f"of sensor '{self.sensor_name}' on shutdown"
+                )
+            self._db.shutdown(wait=True)
             await self.client.close()
 
-    def create_sensor_data(self) -> SensorData:
+    async def _sample_loop(self, queue: asyncio.Queue) -> None:
+        """Generates a reading every `interval` seconds, on deadlines fixed from the start."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while not self._stop_event.is_set():
+            data = self._new_sensor_data()
+            self._unsaved.append(data)
+            self._persist_wakeup.set()
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                if not self.backlogged:
+                    logger.warning(
+                        f"All senders of '{self.sensor_name}' are busy; leaving readings to the retry service"
+                    )
+                self.backlogged += 1
+                self._set_status(data.id, SensorDataDeliveryStatus.FAILED)
+
+            deadline += self.interval
+            now = loop.time()
+            if now - deadline > self.interval:
+                missed = int((now - deadline) // self.interval)
+                logger.warning(f"Sampling of '{self.sensor_name}' fell behind; skipping {missed} ticks")
+                self.missed_ticks += missed
+                deadline += missed * self.interval
+            if deadline > now:
+                await asyncio.sleep(deadline - now)
+
+    async def _send_loop(self, queue: asyncio.Queue) -> None:
+        """One sender of the pool: delivers queued readings one at a time."""
+        while True:
+            data = await queue.get()
+            try:
+                await self._deliver(data)
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, data: SensorData) -> None:
+        try:
+            logger.debug(f"Sending message: {data.id} for sensor '{self.sensor_name}'")
+            await self.client.send(data)
+        except asyncio.CancelledError:
+            # Shutting down mid-send: leave the reading to the retry service on the next start.
+            self._set_status(data.id, SensorDataDeliveryStatus.FAILED)
+            raise
+        except Exception:
+            logger.error(f"Failed to send message: {data.id} for sensor '{self.sensor_name}'")
+            # Update status to FAILED in the repository
+            # This will allow the retry service to pick it up later
+            self._set_status(data.id, SensorDataDeliveryStatus.FAILED)
+            return
+        self._set_status(data.id, SensorDataDeliveryStatus.DElIVERED)
+        logger.debug(f"DELIVERED message: {data.id} for sensor '{self.sensor_name}'")
+
+    async def _stop_senders(self, senders, queue: asyncio.Queue) -> None:
+        """Gives the senders `drain_timeout` to deliver what is queued, then cancels them."""
+        try:
+            await asyncio.wait_for(queue.join(), self.drain_timeout)
+        except TimeoutError:
+            logger.warning(f"{queue.qsize()} readings of '{self.sensor_name}' left undelivered on shutdown")
+        for sender in senders:
+            sender.cancel()
+        await asyncio.gather(*senders, return_exceptions=True)
+        while not queue.empty():
+            self._set_status(queue.get_nowait().id, SensorDataDeliveryStatus.FAILED)
+
+    def _set_status(self, object_id: UUID, status: SensorDataDeliveryStatus) -> None:
+        """Records a status change for the persist task."""
+        self._status_updates.setdefault(status, []).append(object_id)
+        self._persist_wakeup.set()
+
+    def _take_pending(self):
+        """Takes the pending repository writes, leaving empty ones in their place."""
+        unsaved, self._unsaved = self._unsaved, []
+        status_updates, self._status_updates = self._status_updates, {}
+        return unsaved, status_updates
+
+    def _restore_pending(self, unsaved: list[SensorData], status_updates: dict[SensorDataDeliveryStatus, list[UUID]]):
+        """Puts writes that were not saved back in front of the pending ones."""
+        self._unsaved[:0] = unsaved
+        for status, object_ids in status_updates.items():
+            self._status_updates.setdefault(status, [])[:0] = object_ids
+
+    async def _persist_loop(self) -> None:
+        """Saves pending readings and status changes, one batch per commit, while the service runs."""
+        while not self._persist_closing:
+            await self._persist_wakeup.wait()
+            self._persist_wakeup.clear()
+            # Everything that piled up during the previous commit goes into this one.
+            await self._save_pending()
+
+    async def _save_pending(self) -> None:
+        """Saves the pending writes in one batch; what fails is retried with the next one."""
+        self._restore_pending(*await self._run_db(self._persist, *self._take_pending()))
+
+    def _persist(self, unsaved: list[SensorData], status_updates: dict[SensorDataDeliveryStatus, list[UUID]]):
         """
-        Generate a mock sensor data object with a random value and current timestamp.
-        Saves the data to the database.
+        Runs on the database thread. Saves new readings first, so their status updates find them.
 
         Returns:
-            SensorData: A SensorData object with the given name, a random value, and the current timestamp.
+            The readings and status updates that were not saved.
         """
+        try:
+            self.repository.create_many(unsaved)
+            unsaved = []
+            for status in list(status_updates):
+                self.repository.update_status_many(status_updates[status], status)
+                del status_updates[status]
+        except Exception as e:
+            logger.error(
+                f"Failed to save {len(unsaved)} readings and "
+                f"{sum(len(ids) for ids in status_updates.values())} status updates "
+                f"for sensor '{self.sensor_name}', will retry: {e}"
+            )
+        return unsaved, status_updates
 
-        data = SensorData(
+    async def _run_db(self, function, *args):
+        """Runs a repository call on the database thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._db, function, *args)
+
+    def _new_sensor_data(self) -> SensorData:
+        return SensorData(
             id=uuid.uuid4(),
             name=self.sensor_name,
             value=random.randint(0, 100),
-            timestamp=datetime.utcnow(),
+            timestamp_us=now_us(),
             status=SensorDataDeliveryStatus.PENDING,
         )
-        self.repository.create(data)
-
-        return data
 
     async def stop(self) -> None:
+        """Stops sampling; `start` delivers what is queued, saves it and closes the client."""
         logger.info(f"Stopping sensor service for '{self.sensor_name}'")
         self._stop_event.set()
-        await self.client.close()
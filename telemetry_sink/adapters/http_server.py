@@ -1,24 +1,181 @@
 import logging
-from fastapi import FastAPI, Request, HTTPException, status
-from pydantic import BaseModel
+import math
+from uuid import UUID
+
+from fastapi import FastAPI, Query, Request, Response, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, model_validator
 from datetime import datetime
 
 from telemetry_sink.services.telemetry_service import TelemetryService
 from telemetry_sink.services.rate_limiter import RateLimitExceededError
-from telemetry_sink.domain.sensor import SensorData
+from telemetry_sink.services.buffer_manager import BufferFullError
+from telemetry_sink.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from telemetry_sink.services.log_format import passthrough_record, serialize_record
+from telemetry_sink.adapters.raw_asgi import INGEST_PATH, MAX_BODY_BYTES
+from telemetry_sink.services.subscriptions import (
+    SubscriberLimitError,
+    Subscription,
+    SubscriptionClosedError,
+    SubscriptionHub,
+)
+from telemetry_sink.domain.sensor import SensorData, SensorDataBatch, from_epoch_us, to_epoch_us
+from telemetry_sink.adapters.wire_format import BINARY_BATCH_CONTENT_TYPE, WireFormatError, decode_binary_batch_with_ids
 
 logging = logging.getLogger(__name__)
 
 
 class SensorDataModel(BaseModel):
     name: str
-    value: int
-    timestamp: datetime
+    # Values are buffered as signed 64-bit integers.
+    value: int = Field(ge=-(2**63), le=2**63 - 1)
+    # Microseconds since the Unix epoch, as nodes send it.
+    timestamp_us: int | None = Field(None, ge=-(2**63), le=2**63 - 1)
+    # Older clients: epoch seconds/milliseconds or an ISO 8601 string; converted to `timestamp_us`.
+    timestamp: datetime | None = None
+    # Unique per reading and kept across resends, so the sink can drop replays.
+    id: UUID | None = None
+
+    @model_validator(mode="after")
+    def _resolve_timestamp(self) -> "SensorDataModel":
+        if self.timestamp_us is None:
+            if self.timestamp is None:
+                raise ValueError("Either 'timestamp_us' or 'timestamp' is required")
+            self.timestamp_us = to_epoch_us(self.timestamp)
+        return self
+
+
+SensorDataBatchAdapter = TypeAdapter(list[SensorDataModel])
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson")
+
+
+SUPPORTED_BATCH_CONTENT_TYPES = ("application/json", *NDJSON_CONTENT_TYPES, BINARY_BATCH_CONTENT_TYPE)
+
+
+def parse_batch_body(
+    body: bytes, content_type: str, passthrough: bool = False
+) -> tuple[SensorDataBatch, list[bytes | None] | None]:
+    """
+    Parses a batch request body into a batch of validated readings.
+
+    The body is either a JSON array of readings, one JSON reading per line
+    when the content type is NDJSON, or the compact binary format (see
+    `wire_format`). With `passthrough`, each NDJSON line is kept as the
+    reading's payload, to be logged as is.
+
+    Returns:
+        The batch, and the record ID of each reading (None where it has
+        none), or None if no reading carries one.
+
+    Raises:
+        ValidationError: If a JSON body (or any line of it) is not valid.
+        WireFormatError: If a binary body is malformed.
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type == BINARY_BATCH_CONTENT_TYPE:
+        return decode_binary_batch_with_ids(body)
+    if media_type in NDJSON_CONTENT_TYPES:
+        lines = [line for line in body.splitlines() if line.strip()]
+        models = [SensorDataModel.model_validate_json(line) for line in lines]
+    else:
+        lines = None
+        models = SensorDataBatchAdapter.validate_json(body)
+    if passthrough and lines is not None:
+        batch = SensorDataBatch()
+        for m, line in zip(models, lines):
+            batch.append_raw(m.name, m.value, m.timestamp_us, passthrough_record(line))
+    else:
+        batch = SensorDataBatch.from_readings(
+            SensorData(name=m.name, value=m.value, timestamp_us=m.timestamp_us) for m in models
+        )
+    record_ids = None
+    if any(m.id is not None for m in models):
+        record_ids = [m.id.bytes if m.id is not None else None for m in models]
+    return batch, record_ids
+
+
+# A comment line is sent on an idle stream this often, so proxies keep it open.
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+async def stream_events(hub: SubscriptionHub, subscription: Subscription, keepalive: float = SSE_KEEPALIVE_SECONDS):
+    """
+    Yields a subscription's readings as server-sent events, until it is closed or the client goes away.
+
+    Each reading is one `data:` event holding the reading as a log record. A
+    subscription closed by its overflow policy ends with a `closed` event
+    carrying the number of readings the subscriber missed.
+    """
+    try:
+        while True:
+            try:
+                readings = await subscription.get(timeout=keepalive)
+            except SubscriptionClosedError:
+                yield b'event: closed\ndata: {"dropped": %d}\n\n' % subscription.dropped
+                return
+            if not readings:
+                yield b": keepalive\n\n"
+                continue
+            yield b"".join(b"data: %b\n\n" % serialize_record(*reading) for reading in readings)
+    finally:
+        # Also reached when the response is cancelled because the client disconnected.
+        hub.unsubscribe(subscription)
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware refusing request bodies over `max_bytes` on `path` with 413.
+
+    Checks the Content-Length header up front and counts a streamed body as
+    it is received, so an oversized body is never buffered in full.
+    """
+
+    def __init__(self, app, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+                await response(scope, receive, send)
+                return
 
+        received = 0
 
-def create_http_api_app(telemetry_service: TelemetryService) -> FastAPI:
-    """Factory to create the FastAPI application and its endpoints."""
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > self.max_bytes:
+                # Raised while the route reads the body, and answered by FastAPI's exception handling.
+                raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+
+def retry_after_headers(retry_after: float) -> dict:
+    """Builds a Retry-After header; HTTP only allows whole seconds, so round up to at least 1."""
+    return {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+def create_http_api_app(telemetry_service: TelemetryService, passthrough: bool = False) -> FastAPI:
+    """
+    Factory to create the FastAPI application and its endpoints.
+
+    With `passthrough`, single readings and NDJSON batch lines are logged as
+    the client sent them (once validated) instead of being serialized again.
+    Single readings are limited to `MAX_BODY_BYTES`, like on the raw ingest path.
+    """
     app = FastAPI(title="Telemetry Sink")
+    app.add_middleware(BodySizeLimitMiddleware, path=INGEST_PATH, max_bytes=MAX_BODY_BYTES)
 
     @app.post("/telemetry", status_code=status.HTTP_202_ACCEPTED)
     async def receive_telemetry(data: SensorDataModel, request: Request):
@@ -29,22 +186,175 @@ def create_http_api_app(telemetry_service: TelemetryService) -> FastAPI:
             raise HTTPException(status_code=400, detail="Content-Length header is missing or invalid")
 
         # Convert the protocol-specific model (Pydantic) to our internal domain model
-        domain_data = SensorData(name=data.name, value=data.value, timestamp=data.timestamp)
+        domain_data = SensorData(name=data.name, value=data.value, timestamp_us=data.timestamp_us)
 
         try:
             # Call the protocol-agnostic application core
-            await telemetry_service.process_message(domain_data, size_bytes)
+            client_id = request.client.host if request.client else None
+            # The body was already read (and cached) to validate the model.
+            payload = passthrough_record(await request.body()) if passthrough else None
+            accepted = await telemetry_service.process_message(
+                domain_data,
+                size_bytes,
+                client_id=client_id,
+                record_id=data.id.bytes if data.id else None,
+                payload=payload,
+            )
         except RateLimitExceededError as e:
             logging.warning(f"Throttling request: {e}")
-            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers=retry_after_headers(e.retry_after),
+            )
+        except BufferFullError as e:
+            logging.warning(f"Shedding request: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers=retry_after_headers(e.retry_after),
+            )
         except Exception as e:
             logging.error(f"Internal server error while processing message: {e}", exc_info=True)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
-        return {"status": "accepted"}
+        # A replay is acknowledged like the original, so the sender stops resending it.
+        return {"status": "accepted" if accepted else "duplicate"}
+
+    @app.post("/telemetry/batch", status_code=status.HTTP_202_ACCEPTED)
+    async def receive_telemetry_batch(request: Request):
+        body = await request.body()
+        size_bytes = len(body)
+
+        content_type = request.headers.get("content-type", "application/json")
+        if content_type.split(";", 1)[0].strip().lower() not in SUPPORTED_BATCH_CONTENT_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported content type: {content_type}",
+                headers={"Accept-Post": ", ".join(SUPPORTED_BATCH_CONTENT_TYPES)},
+            )
+
+        try:
+            batch, record_ids = parse_batch_body(body, content_type, passthrough=passthrough)
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=e.errors(include_url=False, include_context=False),
+            )
+        except WireFormatError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        try:
+            client_id = request.client.host if request.client else None
+            accepted = await telemetry_service.process_batch(
+                batch, size_bytes, client_id=client_id, record_ids=record_ids
+            )
+        except RateLimitExceededError as e:
+            logging.warning(f"Throttling batch request: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers=retry_after_headers(e.retry_after),
+            )
+        except BufferFullError as e:
+            logging.warning(f"Shedding batch request: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers=retry_after_headers(e.retry_after),
+            )
+        except Exception as e:
+            logging.error(f"Internal server error while processing batch: {e}", exc_info=True)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+        return {"status": "accepted", "count": accepted, "duplicates": len(batch) - accepted}
+
+    @app.options("/telemetry/batch")
+    def batch_options():
+        # Lets clients discover which batch encodings this sink accepts.
+        return Response(
+            status_code=status.HTTP_204_NO_CONTENT,
+            headers={"Accept-Post": ", ".join(SUPPORTED_BATCH_CONTENT_TYPES)},
+        )
 
     @app.get("/health")
     def health_check():
         return {"status": "ok"}
 
+    @app.get("/metrics")
+    async def metrics():
+        # A coroutine, so the registry is rendered on the event loop that updates it.
+        # Prometheus text exposition format; each worker process serves its own metrics.
+        return Response(content=telemetry_service.metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+    @app.get("/telemetry/stream")
+    async def telemetry_stream(
+        sensor: list[str] | None = Query(None),
+        overflow: str | None = Query(None),
+    ):
+        # Server-sent events of the readings accepted from now on, for the given sensors (or all).
+        hub = telemetry_service.subscriptions
+        if hub is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live subscriptions are disabled")
+        try:
+            subscription = hub.subscribe(sensor, overflow=overflow)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except SubscriberLimitError as e:
+            logging.warning(f"Refusing subscriber: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers=retry_after_headers(5)
+            )
+        return StreamingResponse(
+            stream_events(hub, subscription),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.get("/sensors/{name}/latest")
+    async def sensor_latest(name: str):
+        # Served from memory; a coroutine, so it is read on the event loop that updates it.
+        recent = telemetry_service.recent
+        if recent is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recent readings are disabled")
+        latest = recent.latest(name)
+        if latest is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No recent readings of '{name}'")
+        value, timestamp_us = latest
+        return {"name": name, "value": value, "timestamp": from_epoch_us(timestamp_us).isoformat()}
+
+    @app.get("/sensors/{name}/recent")
+    async def sensor_recent(name: str, since: datetime | None = Query(None)):
+        # The sensor's kept readings (the last `ring_size`) at or after `since`, oldest first.
+        recent = telemetry_service.recent
+        if recent is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recent readings are disabled")
+        readings = recent.recent(name, to_epoch_us(since) if since is not None else None)
+        if readings is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No recent readings of '{name}'")
+        return {
+            "name": name,
+            "readings": [
+                {"value": value, "timestamp": from_epoch_us(timestamp_us).isoformat()}
+                for value, timestamp_us in readings
+            ],
+        }
+
+    @app.get("/rooms/rollup")
+    async def room_rollup(
+        room: list[str] | None = Query(None),
+        start: datetime | None = Query(None, alias="from"),
+        end: datetime | None = Query(None, alias="to"),
+    ):
+        # Per-room, per-second averages of V and R and I = V / R, as in sql_task/3_queries.sql.
+        # A coroutine, so the rollups are read on the event loop that updates them.
+        rollup = telemetry_service.rollup
+        if rollup is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Room rollups are not configured")
+        return {
+            "horizon_seconds": rollup.horizon_seconds,
+            "dropped": rollup.dropped,
+            "rows": rollup.query(rooms=room, start=start, end=end),
+        }
+
     return app
@@ -0,0 +1,192 @@
+import json
+import logging
+import math
+from datetime import datetime
+from uuid import UUID
+
+from telemetry_sink.domain.sensor import to_epoch_us
+from telemetry_sink.services.buffer_manager import BufferFullError
+from telemetry_sink.services.log_format import passthrough_record
+from telemetry_sink.services.rate_limiter import RateLimitExceededError
+from telemetry_sink.services.telemetry_service import TelemetryService
+
+logging = logging.getLogger(__name__)
+
+INGEST_PATH = "/telemetry"
+
+# Single readings are tiny; anything bigger than this is not one.
+MAX_BODY_BYTES = 64 * 1024
+
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+# Numeric timestamps above this magnitude are milliseconds, below it seconds (the same rule pydantic applies).
+_MS_THRESHOLD = 2e10
+
+_JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+class PayloadError(ValueError):
+    """Raised when a request body is not a valid reading."""
+
+    pass
+
+
+def _legacy_timestamp_us(timestamp) -> int:
+    """Converts an older client's `timestamp` (epoch seconds/milliseconds or ISO 8601) to epoch microseconds."""
+    if type(timestamp) is int or type(timestamp) is float:
+        if not math.isfinite(timestamp):
+            raise PayloadError("'timestamp' must be finite")
+        timestamp_us = int(timestamp * 1000) if abs(timestamp) > _MS_THRESHOLD else int(timestamp * 1_000_000)
+    elif isinstance(timestamp, str):
+        try:
+            parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            raise PayloadError("'timestamp' is not a valid ISO 8601 datetime")
+        timestamp_us = to_epoch_us(parsed)
+    elif timestamp is None:
+        raise PayloadError("Either 'timestamp_us' or 'timestamp' is required")
+    else:
+        raise PayloadError("'timestamp' must be a number or an ISO 8601 string")
+    if not INT64_MIN <= timestamp_us <= INT64_MAX:
+        raise PayloadError("'timestamp' is out of range")
+    return timestamp_us
+
+
+def decode_reading(body: bytes) -> tuple[str, int, int, bytes | None]:
+    """
+    Decodes and validates a single JSON reading.
+
+    Accepts the same payloads as the FastAPI route: `name` a string, `value`
+    an int64, `timestamp_us` an int64 of epoch microseconds (or, from older
+    clients, `timestamp` as epoch seconds/milliseconds or an ISO 8601
+    string), and an optional `id` UUID string.
+
+    Returns:
+        A `(name, value, timestamp_us, record_id)` tuple; `record_id` is the
+        ID's 16 bytes, or None if the reading has none.
+
+    Raises:
+        PayloadError: If the body is not a valid reading.
+    """
+    return _validate_reading(_load_object(body))
+
+
+def _load_object(body: bytes) -> dict:
+    try:
+        payload = json.loads(body)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise PayloadError(f"Invalid JSON: {e}")
+    if not isinstance(payload, dict):
+        raise PayloadError("Body must be a JSON object")
+    return payload
+
+
+def _validate_reading(payload: dict) -> tuple[str, int, int, bytes | None]:
+    """Validates a parsed reading; see `decode_reading`."""
+    name = payload.get("name")
+    if not isinstance(name, str):
+        raise PayloadError("'name' must be a string")
+
+    value = payload.get("value")
+    if type(value) is not int or not INT64_MIN <= value <= INT64_MAX:
+        raise PayloadError("'value' must be a 64-bit integer")
+
+    timestamp_us = payload.get("timestamp_us")
+    if timestamp_us is not None:
+        if type(timestamp_us) is not int or not INT64_MIN <= timestamp_us <= INT64_MAX:
+            raise PayloadError("'timestamp_us' must be a 64-bit integer")
+    else:
+        timestamp_us = _legacy_timestamp_us(payload.get("timestamp"))
+
+    record_id = payload.get("id")
+    if record_id is not None:
+        try:
+            record_id = UUID(record_id).bytes
+        except (TypeError, ValueError, AttributeError):
+            raise PayloadError("'id' must be a UUID string")
+
+    return name, value, timestamp_us, record_id
+
+
+def create_raw_ingest_app(telemetry_service: TelemetryService, fallback_app, passthrough: bool = False):
+    """
+    Wraps an ASGI app with a framework-free fast path for `POST /telemetry`.
+
+    The ingest route is answered directly from the ASGI scope with a
+    hand-rolled decoder and the same 202/400/429/503 semantics as the FastAPI
+    route; every other request (health checks, batches, ...) is passed on
+    to `fallback_app`. With `passthrough`, the validated body is logged as
+    is instead of being serialized again.
+    """
+
+    async def send_json(send, status_code: int, body: bytes, extra_headers=()):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [*_JSON_HEADERS, *extra_headers, (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def send_error(send, status_code: int, detail: str, retry_after: float | None = None):
+        headers = []
+        if retry_after is not None:
+            headers.append((b"retry-after", str(max(1, math.ceil(retry_after))).encode()))
+        await send_json(send, status_code, json.dumps({"detail": detail}).encode("utf-8"), headers)
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != INGEST_PATH or scope["method"] != "POST":
+            await fallback_app(scope, receive, send)
+            return
+
+        chunks = []
+        size_bytes = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            size_bytes += len(chunk)
+            if size_bytes > MAX_BODY_BYTES:
+                await send_error(send, 413, "Request body too large")
+                return
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+
+        body = b"".join(chunks)
+        try:
+            reading = _load_object(body)
+            name, value, timestamp_us, record_id = _validate_reading(reading)
+        except PayloadError as e:
+            await send_error(send, 400, str(e))
+            return
+
+        client = scope.get("client")
+        try:
+            accepted = await telemetry_service.process_reading(
+                name,
+                value,
+                timestamp_us,
+                size_bytes,
+                client_id=client[0] if client else None,
+                record_id=record_id,
+                payload=passthrough_record(body, reading) if passthrough else None,
+            )
+        except RateLimitExceededError as e:
+            logging.warning(f"Throttling request: {e}")
+            await send_error(send, 429, str(e), e.retry_after)
+            return
+        except BufferFullError as e:
+            logging.warning(f"Shedding request: {e}")
+            await send_error(send, 503, str(e), e.retry_after)
+            return
+        except Exception as e:
+            logging.error(f"Internal server error while processing message: {e}", exc_info=True)
+            await send_error(send, 500, "Internal server error")
+            return
+
+        await send_json(send, 202, b'{"status":"accepted"}' if accepted else b'{"status":"duplicate"}')
+
+    return app
@@ -0,0 +1,194 @@
+"""
+Streaming TCP transport for the sink.
+
+Every frame starts with a fixed header, ``>IBI``: the payload length, the
+frame type and a 32-bit argument (a sequence number or a credit count).
+
+    DATA   (client -> sink)  arg = sequence number, payload = a binary batch (see `wire_format`)
+    ACK    (sink -> client)  arg = sequence number of the accepted frame
+    NACK   (sink -> client)  arg = sequence number, payload = ``>Hd`` status and retry-after
+                             seconds, followed by a UTF-8 message
+    CREDIT (sink -> client)  arg = number of additional DATA frames the client may send
+
+On connect the sink grants `initial_credit` frames. Every ACK or NACK hands
+one credit back, so a client never has more than `initial_credit` frames in
+flight. A client that sends a DATA frame without credit is disconnected,
+so the sink never holds more than that many per connection. NACK statuses
+mirror the HTTP adapter's (400, 429, 503, 500). Under a "written" or
+"fsynced" buffer durability, a frame is only ACKed once the batch holding
+it has been committed, so ACKs may arrive out of order.
+"""
+
+import asyncio
+import logging
+import struct
+
+from telemetry_sink.adapters.wire_format import WireFormatError, decode_binary_batch_with_ids
+from telemetry_sink.services.buffer_manager import BufferFullError
+from telemetry_sink.services.rate_limiter import RateLimitExceededError
+from telemetry_sink.services.telemetry_service import TelemetryService
+
+logging = logging.getLogger(__name__)
+
+FRAME_HEADER = struct.Struct(">IBI")
+NACK_HEADER = struct.Struct(">Hd")
+
+FRAME_DATA = 0x01
+FRAME_ACK = 0x02
+FRAME_NACK = 0x03
+FRAME_CREDIT = 0x04
+
+
+def pack_frame(frame_type: int, arg: int, payload: bytes = b"") -> bytes:
+    return FRAME_HEADER.pack(len(payload), frame_type, arg) + payload
+
+
+def pack_nack(sequence: int, status_code: int, message: str, retry_after: float = 0.0) -> bytes:
+    return pack_frame(FRAME_NACK, sequence, NACK_HEADER.pack(status_code, retry_after) + message.encode("utf-8"))
+
+
+class TcpTelemetryServer:
+    """
+    Long-lived TCP stream server feeding the protocol-agnostic `TelemetryService`.
+
+    Exposes the same `serve()` coroutine as the Uvicorn server so the
+    application can run either one.
+    """
+
+    def __init__(
+        self,
+        telemetry_service: TelemetryService,
+        host: str,
+        port: int,
+        initial_credit: int = 64,
+        max_frame_bytes: int = 1024 * 1024,
+        reuse_port: bool = False,
+    ):
+        """
+        Args:
+            telemetry_service: The service every accepted frame is handed to.
+            host: The address to bind to.
+            port: The port to listen on.
+            initial_credit: How many unacknowledged DATA frames a client may have in flight.
+            max_frame_bytes: The largest accepted frame payload; bigger frames close the connection.
+            reuse_port: Bind with SO_REUSEPORT so several worker processes can share the port.
+        """
+        self.telemetry_service = telemetry_service
+        self.host = host
+        self.port = port
+        self.initial_credit = initial_credit
+        self.max_frame_bytes = max_frame_bytes
+        self.reuse_port = reuse_port
+        # Open connections, by the task serving them.
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def serve(self):
+        server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, reuse_port=self.reuse_port or None
+        )
+        logging.info(f"TCP telemetry server listening on {self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # Closing the transports ends each connection's read loop cleanly.
+            connections = list(self._connections.items())
+            for _, writer in connections:
+                writer.close()
+            if connections:
+                await asyncio.gather(*(task for task, _ in connections), return_exceptions=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        peer = writer.get_extra_info("peername")
+        client_id = peer[0] if peer else None
+        logging.info(f"Stream connection from {client_id}")
+        pending: set[asyncio.Task] = set()
+        # Taken by every DATA frame and given back just before its ACK or NACK is written.
+        credit = asyncio.Semaphore(self.initial_credit)
+
+        try:
+            writer.write(pack_frame(FRAME_CREDIT, self.initial_credit))
+            while True:
+                try:
+                    header = await reader.readexactly(FRAME_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                length, frame_type, sequence = FRAME_HEADER.unpack(header)
+                if length > self.max_frame_bytes:
+                    logging.warning(f"Closing stream from {client_id}: frame of {length} bytes is too large")
+                    writer.write(pack_nack(sequence, 413, "Frame too large"))
+                    break
+                payload = await reader.readexactly(length)
+                if frame_type != FRAME_DATA:
+                    logging.warning(f"Closing stream from {client_id}: unexpected frame type {frame_type}")
+                    break
+                if credit.locked():
+                    logging.warning(
+                        f"Closing stream from {client_id}: more than {self.initial_credit} frames unacknowledged"
+                    )
+                    break
+                await credit.acquire()
+
+                # Frames are answered from their own tasks, so a frame waiting for its
+                # batch to be committed (see `durability`) does not stall the ones behind it.
+                # Credit bounds how many are pending at once.
+                reply = asyncio.create_task(
+                    self._reply(writer, credit, sequence, payload, FRAME_HEADER.size + length, client_id)
+                )
+                pending.add(reply)
+                reply.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logging.info(f"Stream from {client_id} ended: {e}")
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            self._connections.pop(task, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _reply(
+        self,
+        writer: asyncio.StreamWriter,
+        credit: asyncio.Semaphore,
+        sequence: int,
+        payload: bytes,
+        size_bytes: int,
+        client_id: str | None,
+    ):
+        """Processes one DATA frame and sends its ACK or NACK, handing its credit back."""
+        try:
+            reply = await self._process_frame(sequence, payload, size_bytes, client_id)
+        finally:
+            # Before the write: the client may send its next frame as soon as it reads the reply.
+            credit.release()
+        writer.write(reply)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _process_frame(self, sequence: int, payload: bytes, size_bytes: int, client_id: str | None) -> bytes:
+        """Hands one DATA frame to the service and returns the ACK or NACK to send back."""
+        try:
+            batch, record_ids = decode_binary_batch_with_ids(payload)
+        except WireFormatError as e:
+            return pack_nack(sequence, 400, str(e))
+
+        try:
+            # Replays are dropped by the service and ACKed like any other frame.
+            await self.telemetry_service.process_batch(batch, size_bytes, client_id=client_id, record_ids=record_ids)
+        except RateLimitExceededError as e:
+            logging.warning(f"Throttling stream frame: {e}")
+            return pack_nack(sequence, 429, str(e), e.retry_after)
+        except BufferFullError as e:
+            logging.warning(f"Shedding stream frame: {e}")
+            return pack_nack(sequence, 503, str(e), e.retry_after)
+        except Exception as e:
+            logging.error(f"Internal server error while processing stream frame: {e}", exc_info=True)
+            return pack_nack(sequence, 500, "Internal server error")
+        return pack_frame(FRAME_ACK, sequence)
@@ -0,0 +1,192 @@
+"""
+Lossy UDP datagram transport for the sink.
+
+Every datagram is a ``>BI`` header (format version 1, a 32-bit sequence
+number) followed by a binary batch (see `wire_format`). Senders number the
+datagrams of each sensor consecutively, so the sink can count gaps without
+ever answering: there is no acknowledgement, and datagrams refused by the
+rate limiter or the buffer are dropped and counted.
+"""
+
+import asyncio
+import logging
+import socket
+import struct
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from telemetry_sink.adapters.wire_format import WireFormatError, decode_binary_batch_with_ids
+from telemetry_sink.services.buffer_manager import BufferFullError
+from telemetry_sink.services.rate_limiter import RateLimitExceededError
+from telemetry_sink.services.telemetry_service import TelemetryService
+
+logging = logging.getLogger(__name__)
+
+DATAGRAM_HEADER = struct.Struct(">BI")
+DATAGRAM_VERSION = 1
+
+# A sequence number this far behind the last one seen means the sender restarted, not reordering.
+REORDER_WINDOW = 1024
+
+
+@dataclass
+class SensorLossStats:
+    received: int = 0
+    # Datagrams missing from the sequence (reduced again if they turn up late).
+    lost: int = 0
+    reordered: int = 0
+    duplicates: int = 0
+    # Datagrams that arrived but were refused by the rate limiter or the full buffer.
+    dropped: int = 0
+
+
+class SequenceTracker:
+    """
+    Derives per-sensor loss counters from datagram sequence numbers.
+
+    Sequences are tracked per (sender, sensor) stream; the number of streams
+    (and of sensors) is bounded and the least recently seen streams are
+    forgotten first.
+    """
+
+    def __init__(self, max_tracked_streams: int = 10000):
+        self.max_tracked_streams = max_tracked_streams
+        self._last_sequence: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._stats: OrderedDict[str, SensorLossStats] = OrderedDict()
+
+    def sensor_stats(self, sensor_name: str) -> SensorLossStats:
+        stats = self._stats.get(sensor_name)
+        if stats is None:
+            if len(self._stats) >= self.max_tracked_streams:
+                # Sensor names come off the wire; don't let them grow the table without bound.
+                self._stats.popitem(last=False)
+            stats = self._stats[sensor_name] = SensorLossStats()
+        else:
+            self._stats.move_to_end(sensor_name)
+        return stats
+
+    def observe(self, source: str, sensor_name: str, sequence: int) -> SensorLossStats:
+        """Records one datagram and returns the sensor's counters."""
+        stats = self.sensor_stats(sensor_name)
+        stats.received += 1
+
+        stream = (source, sensor_name)
+        last = self._last_sequence.get(stream)
+        if last is None:
+            self._last_sequence[stream] = sequence
+            if len(self._last_sequence) > self.max_tracked_streams:
+                self._last_sequence.popitem(last=False)
+            return stats
+        self._last_sequence.move_to_end(stream)
+
+        ahead = (sequence - last) & 0xFFFFFFFF
+        if ahead == 0:
+            stats.duplicates += 1
+        elif ahead < 0x80000000:
+            stats.lost += ahead - 1
+            self._last_sequence[stream] = sequence
+        elif 0x100000000 - ahead <= REORDER_WINDOW:
+            # A late datagram we had already counted as lost.
+            stats.reordered += 1
+            stats.lost = max(stats.lost - 1, 0)
+        else:
+            self._last_sequence[stream] = sequence
+        return stats
+
+    def snapshot(self) -> dict[str, dict]:
+        return {name: asdict(stats) for name, stats in self._stats.items()}
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: "UdpTelemetryServer"):
+        self.server = server
+
+    def datagram_received(self, data: bytes, addr):
+        self.server.handle_datagram(data, addr)
+
+    def error_received(self, exc: Exception):
+        logging.warning(f"UDP socket error: {exc}")
+
+
+class UdpTelemetryServer:
+    """
+    UDP datagram listener feeding the protocol-agnostic `TelemetryService`.
+
+    Exposes the same `serve()` coroutine as the other server adapters. Loss
+    counters are logged every `stats_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        telemetry_service: TelemetryService,
+        host: str,
+        port: int,
+        stats_interval: float = 60.0,
+        max_tracked_streams: int = 10000,
+        receive_buffer_bytes: int = 4 * 1024 * 1024,
+        reuse_port: bool = False,
+    ):
+        """
+        Args:
+            telemetry_service: The service every datagram is handed to.
+            host: The address to bind to.
+            port: The port to listen on.
+            stats_interval: How often (in seconds) loss counters are logged.
+            max_tracked_streams: How many (sender, sensor) sequences are tracked at most.
+            receive_buffer_bytes: Requested socket receive buffer; a larger one absorbs bursts
+                instead of dropping them in the kernel (capped by the OS, e.g. net.core.rmem_max).
+            reuse_port: Bind with SO_REUSEPORT so several worker processes can share the port.
+        """
+        self.telemetry_service = telemetry_service
+        self.host = host
+        self.port = port
+        self.stats_interval = stats_interval
+        self.receive_buffer_bytes = receive_buffer_bytes
+        self.reuse_port = reuse_port
+        self.tracker = SequenceTracker(max_tracked_streams)
+        # Datagrams that could not be decoded at all.
+        self.malformed = 0
+
+    def handle_datagram(self, data: bytes, addr: tuple | None):
+        try:
+            version, sequence = DATAGRAM_HEADER.unpack_from(data)
+            if version != DATAGRAM_VERSION:
+                raise WireFormatError(f"Unsupported datagram version {version}")
+            batch, record_ids = decode_binary_batch_with_ids(data[DATAGRAM_HEADER.size :])
+        except (struct.error, WireFormatError) as e:
+            self.malformed += 1
+            logging.debug(f"Dropping malformed datagram from {addr}: {e}")
+            return
+        if not batch:
+            return
+
+        client_id = addr[0] if addr else None
+        stats = self.tracker.observe(f"{client_id}:{addr[1] if addr else ''}", batch.names[0], sequence)
+        try:
+            self.telemetry_service.accept_batch(batch, len(data), client_id=client_id, record_ids=record_ids)
+        except (RateLimitExceededError, BufferFullError) as e:
+            stats.dropped += 1
+            logging.debug(f"Dropping datagram from {client_id}: {e}")
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer_bytes)
+        if self.reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.host, self.port))
+        transport, _ = await loop.create_datagram_endpoint(lambda: _DatagramProtocol(self), sock=sock)
+        logging.info(f"UDP telemetry listener on {self.host}:{self.port}")
+        try:
+            while True:
+                await asyncio.sleep(self.stats_interval)
+                self.log_stats()
+        finally:
+            transport.close()
+            self.log_stats()
+
+    def log_stats(self):
+        for name, stats in self.tracker.snapshot().items():
+            logging.info(f"UDP sensor '{name}': {stats}")
+        if self.malformed:
+            logging.info(f"UDP malformed datagrams: {self.malformed}")
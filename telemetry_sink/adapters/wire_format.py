@@ -0,0 +1,145 @@
+"""
+Compact binary wire format for telemetry batches.
+
+Content type: ``application/vnd.telemetry.batch``. All integers are LEB128
+varints; signed ones are zigzag-encoded first.
+
+    version (1 byte, = 1)
+    flags (1 byte; bit 0 set = timestamps in microseconds, else milliseconds;
+           bit 1 set = record IDs follow the values)
+    name_count, then name_count x (byte length, UTF-8 bytes)      -- sensor-name dictionary
+    record_count
+    record_count x name index
+    record_count x timestamp: the first as zigzag, then the first delta,
+                              then delta-of-deltas (all zigzag)
+    record_count x value (zigzag)
+    record_count x 16-byte record ID (a UUID), if flag bit 1 is set
+
+Readings sampled at a steady rate compress to a single byte per timestamp.
+"""
+
+from telemetry_sink.domain.sensor import SensorDataBatch
+
+BINARY_BATCH_CONTENT_TYPE = "application/vnd.telemetry.batch"
+WIRE_FORMAT_VERSION = 1
+FLAG_MICROSECONDS = 0x01
+FLAG_RECORD_IDS = 0x02
+RECORD_ID_BYTES = 16
+
+
+class WireFormatError(ValueError):
+    """Raised when a binary batch is malformed."""
+
+    pass
+
+
+class _Reader:
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def byte(self) -> int:
+        if self.pos >= len(self.data):
+            raise WireFormatError("Unexpected end of batch")
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self) -> int:
+        data, pos, shift, result = self.data, self.pos, 0, 0
+        while True:
+            if pos >= len(data):
+                raise WireFormatError("Unexpected end of batch")
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return result
+            shift += 7
+            if shift > 70:
+                raise WireFormatError("Varint too long")
+
+    def zigzag(self) -> int:
+        value = self.varint()
+        return (value >> 1) ^ -(value & 1)
+
+    def raw(self, length: int) -> bytes:
+        if self.pos + length > len(self.data):
+            raise WireFormatError("Unexpected end of batch")
+        value = self.data[self.pos : self.pos + length]
+        self.pos += length
+        return value
+
+
+def decode_binary_batch(body: bytes) -> SensorDataBatch:
+    """
+    Decodes a binary batch into a `SensorDataBatch` without building per-reading objects.
+
+    Raises:
+        WireFormatError: If the body is malformed.
+    """
+    return decode_binary_batch_with_ids(body)[0]
+
+
+def decode_binary_batch_with_ids(body: bytes) -> tuple[SensorDataBatch, list[bytes] | None]:
+    """
+    Like `decode_binary_batch`, also returning the readings' record IDs.
+
+    Returns:
+        The batch, and the 16-byte record ID of each reading, or None if the batch carries none.
+
+    Raises:
+        WireFormatError: If the body is malformed.
+    """
+    reader = _Reader(body)
+    version = reader.byte()
+    if version != WIRE_FORMAT_VERSION:
+        raise WireFormatError(f"Unsupported wire format version {version}")
+    flags = reader.byte()
+    unit_us = 1 if flags & FLAG_MICROSECONDS else 1000
+
+    try:
+        names = [reader.raw(reader.varint()).decode("utf-8") for _ in range(reader.varint())]
+    except UnicodeDecodeError as e:
+        raise WireFormatError(f"Invalid sensor name: {e}")
+
+    count = reader.varint()
+    # Each record takes at least three bytes, so a larger count cannot be honest.
+    if count * 3 > len(body):
+        raise WireFormatError("Record count exceeds batch size")
+
+    name_ids = [reader.varint() for _ in range(count)]
+    if name_ids and max(name_ids) >= len(names):
+        raise WireFormatError("Name index out of range")
+
+    timestamps = []
+    timestamp = delta = 0
+    for i in range(count):
+        if i == 0:
+            timestamp = reader.zigzag()
+        elif i == 1:
+            delta = reader.zigzag()
+            timestamp += delta
+        else:
+            delta += reader.zigzag()
+            timestamp += delta
+        timestamps.append(timestamp * unit_us)
+
+    values = [reader.zigzag() for _ in range(count)]
+    record_ids = None
+    if flags & FLAG_RECORD_IDS:
+        ids = reader.raw(count * RECORD_ID_BYTES)
+        record_ids = [ids[i : i + RECORD_ID_BYTES] for i in range(0, len(ids), RECORD_ID_BYTES)]
+    if reader.pos != len(body):
+        raise WireFormatError("Trailing bytes after batch")
+
+    batch = SensorDataBatch()
+    try:
+        for name_id, value, timestamp_us in zip(name_ids, values, timestamps):
+            batch.append_raw(names[name_id], value, timestamp_us)
+    except OverflowError:
+        raise WireFormatError("Value or timestamp out of 64-bit range")
+    return batch, record_ids
@@ -46,3 +46,8 @@ def load_config() -> configparser.ConfigParser:
     except Exception as e:
         log.critical(f"An unexpected error occurred while loading the configuration: {e}")
         raise
+
+
+def log_file_path(config: configparser.ConfigParser) -> str:
+    """Returns the sink's log path from the [telemetry_sink_logging] section; shared by the writer and the query CLI."""
+    return config.get("telemetry_sink_logging", "file_path", fallback="./telemetry_data.log.enc")
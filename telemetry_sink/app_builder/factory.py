@@ -1,27 +1,101 @@
 import logging
+import socket
 from configparser import ConfigParser
+
 import uvicorn
 
-from telemetry_sink.services.rate_limiter import RateLimiter
+from telemetry_sink.app_builder.config import log_file_path
+from telemetry_sink.services.rate_limiter import RateLimiter, SharedTokenBucket
 from telemetry_sink.services.crypto_service import CryptoService
 from telemetry_sink.services.buffer_manager import BufferManager
 from telemetry_sink.services.log_writer import LogWriter
-from telemetry_sink.services.flush_timer import FlushTimer
+from telemetry_sink.services.log_segment import worker_log_path
+from telemetry_sink.services.flush_policy import (
+    FLUSH_POLICIES,
+    AdaptiveFlushPolicy,
+    FixedIntervalFlushPolicy,
+    FlushPolicy,
+)
 from telemetry_sink.services.telemetry_service import TelemetryService
+from telemetry_sink.services.metrics import SinkMetrics
+from telemetry_sink.services.room_rollup import RoomRollup, parse_sensor_rooms
+from telemetry_sink.services.dedup_cache import DedupCache
+from telemetry_sink.services.subscriptions import SubscriptionHub
+from telemetry_sink.services.recent_readings import RecentReadings
+from telemetry_sink.services.spill_journal import SpillJournal
 
 # Import the adapter factory
 from telemetry_sink.adapters.http_server import create_http_api_app
+from telemetry_sink.adapters.raw_asgi import create_raw_ingest_app
+from telemetry_sink.adapters.tcp_server import TcpTelemetryServer
+from telemetry_sink.adapters.udp_server import UdpTelemetryServer
 
 log = logging.getLogger(__name__)
 
 
-def create_rate_limiter(config: ConfigParser) -> RateLimiter:
-    """Creates a RateLimiter instance from configuration."""
+class _PreboundServer(uvicorn.Server):
+    """A Uvicorn server that serves a socket bound by the factory (e.g. with SO_REUSEPORT)."""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket):
+        super().__init__(config)
+        self._sock = sock
+
+    async def serve(self, sockets=None):
+        await super().serve(sockets=sockets or [self._sock])
+
+
+def _bind_reuse_port_socket(host: str, port: int) -> socket.socket:
+    # An explicit IPPROTO_TCP makes asyncio enable TCP_NODELAY on accepted connections; with
+    # proto 0 it skips them, and responses written in two parts stall on delayed ACKs.
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def create_shared_rate_bucket(config: ConfigParser) -> SharedTokenBucket:
+    """Creates the global rate-limit bucket shared by all worker processes."""
+    rate = config.getint("telemetry_sink_rate_limit", "limit_bytes_per_sec", fallback=5242880)
+    capacity = config.getint("telemetry_sink_rate_limit", "capacity_bytes", fallback=5242880)
+    log.info(f"Creating shared rate-limit bucket with rate={rate} B/s, capacity={capacity} B")
+    return SharedTokenBucket(rate=float(rate), capacity=float(capacity))
+
+
+def create_metrics(config: ConfigParser) -> SinkMetrics:
+    """Creates the metrics registry shared by the sink's services."""
+    max_sensor_series = config.getint("telemetry_sink_metrics", "max_sensor_series", fallback=1000)
+    log.info(f"Creating metrics registry with max_sensor_series={max_sensor_series}")
+    return SinkMetrics(max_sensor_series=max_sensor_series)
+
+
+def create_rate_limiter(
+    config: ConfigParser,
+    shared_bucket: SharedTokenBucket | None = None,
+    metrics: SinkMetrics | None = None,
+) -> RateLimiter:
+    """Creates a RateLimiter instance from configuration, optionally drawing from a shared global bucket."""
     log.info("Creating Rate Limiter service...")
     rate = config.getint("telemetry_sink_rate_limit", "limit_bytes_per_sec", fallback=5242880)
     capacity = config.getint("telemetry_sink_rate_limit", "capacity_bytes", fallback=5242880)
-    log.info(f"-> Rate Limiter configured with rate={rate} B/s, capacity={capacity} B")
-    return RateLimiter(rate_limit_bytes_per_sec=rate)
+    fairness = config.get("telemetry_sink_rate_limit", "fairness", fallback="none")
+    per_key_rate = config.getint("telemetry_sink_rate_limit", "per_key_limit_bytes_per_sec", fallback=rate)
+    per_key_capacity = config.getint("telemetry_sink_rate_limit", "per_key_capacity_bytes", fallback=per_key_rate)
+    max_tracked_keys = config.getint("telemetry_sink_rate_limit", "max_tracked_keys", fallback=10000)
+    log.info(
+        f"-> Rate Limiter configured with rate={rate} B/s, capacity={capacity} B, fairness={fairness}, "
+        f"per_key_rate={per_key_rate} B/s, per_key_capacity={per_key_capacity} B, max_tracked_keys={max_tracked_keys}"
+    )
+    return RateLimiter(
+        rate_limit_bytes_per_sec=rate,
+        capacity_bytes=capacity,
+        fairness=fairness,
+        per_key_rate_bytes_per_sec=per_key_rate,
+        per_key_capacity_bytes=per_key_capacity,
+        max_tracked_keys=max_tracked_keys,
+        shared_bucket=shared_bucket,
+        metrics=metrics,
+    )
 
 
 def create_crypto_service(config: ConfigParser) -> CryptoService:
@@ -36,52 +110,251 @@ def create_crypto_service(config: ConfigParser) -> CryptoService:
         raise
 
 
-def create_buffer_manager(config: ConfigParser) -> BufferManager:
+def create_flush_policy(config: ConfigParser) -> FlushPolicy:
+    """Creates the strategy deciding when the buffer is flushed."""
+    policy = config.get("telemetry_sink_buffer", "flush_policy", fallback="fixed")
+    if policy not in FLUSH_POLICIES:
+        raise ValueError(f"Unsupported flush policy: {policy}. Expected one of {FLUSH_POLICIES}.")
+    if policy == "adaptive":
+        target_latency = config.getfloat("telemetry_sink_buffer", "target_flush_latency", fallback=0.05)
+        log.info(f"-> Flushing adaptively with target_latency={target_latency}s")
+        return AdaptiveFlushPolicy(target_latency=target_latency)
+    interval = config.getfloat("telemetry_sink_buffer", "flush_interval", fallback=0.1)
+    log.info(f"-> Flushing at a fixed interval={interval}s")
+    return FixedIntervalFlushPolicy(interval)
+
+
+def create_spill_journal(config: ConfigParser, worker_id: int | None = None) -> SpillJournal | None:
+    """Creates the buffer's spill journal; None if spilling is disabled. Each worker process gets its own."""
+    path = config.get("telemetry_sink_buffer", "spill_journal_path", fallback="")
+    if not path:
+        log.info("Spill journal is disabled; buffered readings are kept in memory only.")
+        return None
+    if worker_id is not None:
+        path = worker_log_path(path, worker_id)
+    capacity_bytes = config.getint("telemetry_sink_buffer", "spill_journal_bytes", fallback=64 * 1024 * 1024)
+    log.info(f"Opening spill journal '{path}' with capacity_bytes={capacity_bytes}")
+    return SpillJournal(path, capacity_bytes=capacity_bytes)
+
+
+def create_buffer_manager(
+    config: ConfigParser,
+    metrics: SinkMetrics | None = None,
+    journal: SpillJournal | None = None,
+) -> BufferManager:
     """Creates a BufferManager instance from configuration."""
     log.info("Creating Buffer Manager service...")
-    max_size = config.getint("buffer", "size_bytes", fallback=1048576)
-    log.info(f"-> Buffer Manager configured with max_size={max_size} bytes")
-    return BufferManager(max_size_bytes=max_size)
+    max_size = config.getint("telemetry_sink_buffer", "size_bytes", fallback=1048576)
+    max_memory = config.getint("telemetry_sink_buffer", "max_memory_bytes", fallback=max_size * 8)
+    durability = config.get("telemetry_sink_buffer", "durability", fallback="memory")
+    log.info(
+        f"-> Buffer Manager configured with max_size={max_size} bytes, max_memory={max_memory} bytes, "
+        f"durability={durability}"
+    )
+    return BufferManager(
+        max_size_bytes=max_size,
+        max_memory_bytes=max_memory,
+        durability=durability,
+        metrics=metrics,
+        flush_policy=create_flush_policy(config),
+        journal=journal,
+    )
 
 
-def create_log_writer(config: ConfigParser, buffer_manager: BufferManager, crypto_service: CryptoService) -> LogWriter:
-    """Creates a LogWriter instance, injecting its dependencies."""
+def create_log_writer(
+    config: ConfigParser,
+    buffer_manager: BufferManager,
+    crypto_service: CryptoService,
+    worker_id: int | None = None,
+) -> LogWriter:
+    """Creates a LogWriter instance, injecting its dependencies; each worker process gets its own segment."""
     log.info("Creating Log Writer service...")
-    file_path = config.get("logging", "file_path", fallback="./telemetry.log.enc")
-    log.info(f"-> Log Writer configured to write to '{file_path}'")
-    return LogWriter(buffer_manager=buffer_manager, crypto_service=crypto_service, file_path=file_path)
+    file_path = log_file_path(config)
+    if worker_id is not None:
+        file_path = worker_log_path(file_path, worker_id)
+    encode_workers = config.getint("telemetry_sink_logging", "encode_workers", fallback=2)
+    record_format = config.get("telemetry_sink_logging", "record_format", fallback="block")
+    compression = config.get("telemetry_sink_logging", "compression", fallback="zlib")
+    segment_max_bytes = config.getint("telemetry_sink_logging", "segment_max_bytes", fallback=0)
+    segment_max_age = config.getfloat("telemetry_sink_logging", "segment_max_age", fallback=0.0)
+    final_write_timeout = config.getfloat("telemetry_sink_logging", "final_write_timeout", fallback=0.0)
+    log.info(
+        f"-> Log Writer configured to write to '{file_path}' with {encode_workers} encode workers, "
+        f"record_format={record_format}, compression={compression}, "
+        f"segment_max_bytes={segment_max_bytes}, segment_max_age={segment_max_age}s, "
+        f"final_write_timeout={final_write_timeout}s"
+    )
+    return LogWriter(
+        buffer_manager=buffer_manager,
+        crypto_service=crypto_service,
+        file_path=file_path,
+        encode_workers=encode_workers,
+        record_format=record_format,
+        compression=compression,
+        segment_max_bytes=segment_max_bytes,
+        segment_max_age=segment_max_age,
+        shutdown_timeout=final_write_timeout or None,
+    )
+
+
+def create_dedup_cache(config: ConfigParser, metrics: SinkMetrics | None = None) -> DedupCache | None:
+    """Creates the cache of recently accepted record IDs; None if deduplication is disabled."""
+    max_ids = config.getint("telemetry_sink_dedup", "max_ids", fallback=1000000)
+    if max_ids <= 0:
+        log.info("Record deduplication is disabled.")
+        return None
+    window_seconds = config.getfloat("telemetry_sink_dedup", "window_seconds", fallback=600.0)
+    dedup = DedupCache(window_seconds=window_seconds, max_ids=max_ids, metrics=metrics)
+    log.info(
+        f"Creating dedup cache with window_seconds={window_seconds}, max_ids={max_ids} "
+        f"({dedup.memory_bytes // (1024 * 1024)} MiB)"
+    )
+    return dedup
 
 
-def create_flush_timer(config: ConfigParser, buffer_manager: BufferManager) -> FlushTimer:
-    """Creates a FlushTimer instance, injecting its dependency."""
-    log.info("Creating Flush Timer service...")
-    interval = config.getfloat("buffer", "flush_interval", fallback=0.1)
-    log.info(f"-> Flush Timer configured with interval={interval}s")
-    return FlushTimer(buffer_manager=buffer_manager, interval=interval)
+def create_room_rollup(config: ConfigParser) -> RoomRollup | None:
+    """Creates the live room rollups from configuration; None if no sensors are mapped to rooms."""
+    sensor_rooms = parse_sensor_rooms(config.get("telemetry_sink_rollup", "sensors", fallback=""))
+    if not sensor_rooms:
+        log.info("Room rollups are disabled (no sensors mapped to rooms).")
+        return None
+    horizon_seconds = config.getint("telemetry_sink_rollup", "horizon_seconds", fallback=3600)
+    rollup = RoomRollup(sensor_rooms, horizon_seconds=horizon_seconds)
+    log.info(
+        f"Creating room rollups for {len(sensor_rooms)} sensors in rooms {rollup.rooms} "
+        f"with horizon_seconds={horizon_seconds}"
+    )
+    return rollup
 
 
-def create_telemetry_service(config: ConfigParser) -> TelemetryService:
+def create_subscription_hub(config: ConfigParser, metrics: SinkMetrics | None = None) -> SubscriptionHub | None:
+    """Creates the fan-out of accepted readings to live subscribers; None if streaming is disabled."""
+    max_subscribers = config.getint("telemetry_sink_subscriptions", "max_subscribers", fallback=1000)
+    if max_subscribers <= 0:
+        log.info("Live subscriptions are disabled.")
+        return None
+    max_pending = config.getint("telemetry_sink_subscriptions", "max_pending", fallback=1000)
+    overflow = config.get("telemetry_sink_subscriptions", "overflow", fallback="latest")
+    log.info(
+        f"Creating subscription hub with max_subscribers={max_subscribers}, max_pending={max_pending}, "
+        f"overflow={overflow}"
+    )
+    return SubscriptionHub(max_subscribers=max_subscribers, max_pending=max_pending, overflow=overflow, metrics=metrics)
+
+
+def create_recent_readings(config: ConfigParser, metrics: SinkMetrics | None = None) -> RecentReadings | None:
+    """Creates the per-sensor latest values and recent readings; None if they are disabled."""
+    ring_size = config.getint("telemetry_sink_recent", "ring_size", fallback=256)
+    if ring_size <= 0:
+        log.info("Recent readings are disabled.")
+        return None
+    max_memory_bytes = config.getint("telemetry_sink_recent", "max_memory_bytes", fallback=32 * 1024 * 1024)
+    recent = RecentReadings(ring_size=ring_size, max_memory_bytes=max_memory_bytes, metrics=metrics)
+    log.info(
+        f"Keeping the last {ring_size} readings of up to {recent.max_sensors} sensors "
+        f"(max_memory_bytes={max_memory_bytes})"
+    )
+    return recent
+
+
+def create_telemetry_service(
+    config: ConfigParser, shared_rate_bucket: SharedTokenBucket | None = None, worker_id: int | None = None
+) -> TelemetryService:
     """
     Creates and wires up the core application services.
 
     This acts as a master factory for the application's core logic,
     creating the shared dependencies that other services will use.
+    `worker_id` is set for one of several worker processes, which keeps its own spill journal.
     """
     log.info("Wiring up core application services...")
     # Create the shared, independent services first
-    rate_limiter = create_rate_limiter(config)
-    buffer_manager = create_buffer_manager(config)
+    metrics = create_metrics(config)
+    rate_limiter = create_rate_limiter(config, shared_bucket=shared_rate_bucket, metrics=metrics)
+    buffer_manager = create_buffer_manager(
+        config, metrics=metrics, journal=create_spill_journal(config, worker_id=worker_id)
+    )
+    rollup = create_room_rollup(config)
+    dedup = create_dedup_cache(config, metrics=metrics)
+    subscriptions = create_subscription_hub(config, metrics=metrics)
+    recent = create_recent_readings(config, metrics=metrics)
 
     # Create the main service and inject its dependencies
-    telemetry_service = TelemetryService(rate_limiter=rate_limiter, buffer_manager=buffer_manager)
+    telemetry_service = TelemetryService(
+        rate_limiter=rate_limiter,
+        buffer_manager=buffer_manager,
+        metrics=metrics,
+        rollup=rollup,
+        dedup=dedup,
+        subscriptions=subscriptions,
+        recent=recent,
+    )
     return telemetry_service
 
 
-def create_api_app(telemetry_service: TelemetryService, host: str, port: int, server_protocol: str = "http"):
-    """Creates the FastAPI application, injecting the core telemetry service."""
-    log.info("Creating FastAPI adapter...")
+def create_api_app(
+    telemetry_service: TelemetryService,
+    host: str,
+    port: int,
+    server_protocol: str = "http",
+    ingest_mode: str = "fastapi",
+    stream_credit: int = 64,
+    max_frame_bytes: int = 1024 * 1024,
+    udp_stats_interval: float = 60.0,
+    udp_receive_buffer_bytes: int = 4 * 1024 * 1024,
+    reuse_port: bool = False,
+    passthrough: bool = False,
+):
+    """
+    Creates the server adapter for `server_protocol`, injecting the core telemetry service.
+
+    For "http" this is the FastAPI application under Uvicorn. With
+    `ingest_mode="raw"` the `POST /telemetry` route is served by a bare ASGI
+    handler in front of the FastAPI app instead of by FastAPI itself.
+
+    For "tcp" it is a length-prefixed stream server with per-frame acks and
+    `stream_credit` frames of flow-control credit per connection.
+
+    For "udp" it is a fire-and-forget datagram listener that logs per-sensor
+    loss counters every `udp_stats_interval` seconds.
+
+    With `reuse_port` the listen socket is bound with SO_REUSEPORT, so the
+    worker processes of a multi-process sink can all listen on the same port.
+
+    With `passthrough` (HTTP only), JSON readings are logged as the client
+    sent them instead of being serialized again.
+    """
+    if server_protocol == "tcp":
+        log.info(f"Creating TCP stream adapter (credit={stream_credit}, max_frame_bytes={max_frame_bytes})...")
+        return TcpTelemetryServer(
+            telemetry_service,
+            host=host,
+            port=port,
+            initial_credit=stream_credit,
+            max_frame_bytes=max_frame_bytes,
+            reuse_port=reuse_port,
+        )
+
+    if server_protocol == "udp":
+        log.info("Creating UDP datagram adapter...")
+        return UdpTelemetryServer(
+            telemetry_service,
+            host=host,
+            port=port,
+            stats_interval=udp_stats_interval,
+            receive_buffer_bytes=udp_receive_buffer_bytes,
+            reuse_port=reuse_port,
+        )
     if server_protocol == "http":
-        app = create_http_api_app(telemetry_service)
+        log.info("Creating FastAPI adapter...")
+        if passthrough:
+            log.info("-> Logging JSON readings as received (passthrough)")
+        app = create_http_api_app(telemetry_service, passthrough=passthrough)
+        if ingest_mode == "raw":
+            log.info("-> Serving POST /telemetry from the raw ASGI fast path")
+            app = create_raw_ingest_app(telemetry_service, fallback_app=app, passthrough=passthrough)
+        elif ingest_mode != "fastapi":
+            raise ValueError(f"Unsupported ingest mode: {ingest_mode}. Expected 'fastapi' or 'raw'.")
         # Configure the Uvicorn server to be managed by our asyncio loop
         server_config = uvicorn.Config(
             app,
@@ -89,6 +362,8 @@ def create_api_app(telemetry_service: TelemetryService, host: str, port: int, se
             port=port,
             log_level="info",
         )
+        if reuse_port:
+            return _PreboundServer(server_config, _bind_reuse_port_socket(host, port))
         return uvicorn.Server(server_config)
     else:
-        raise ValueError(f"Unsupported server protocol: {server_protocol}. Only 'http' is supported at this time.")
+        raise ValueError(f"Unsupported server protocol: {server_protocol}. Expected 'http', 'tcp' or 'udp'.")
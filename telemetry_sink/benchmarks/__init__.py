@@ -0,0 +1,7 @@
+"""
+Throughput and latency benchmarks for the Telemetry Sink.
+
+Run them with ``python -m telemetry_sink.benchmarks`` (see ``--help``). The
+results are written as JSON and can be compared against a stored baseline,
+so a release that makes ingest slower fails the comparison.
+"""
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from dataclasses import asdict
+
+from telemetry_sink.app_builder.config import load_config
+from telemetry_sink.benchmarks.compare import compare
+from telemetry_sink.benchmarks.ingest import BATCH_FORMATS, IngestParams, run_ingest
+from telemetry_sink.benchmarks.micro import run_micro
+from telemetry_sink.benchmarks.stats import environment
+from telemetry_sink.services.buffer_manager import DURABILITY_LEVELS
+
+REPORT_VERSION = 1
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+
+async def run(args: argparse.Namespace, config) -> dict:
+    results = {}
+    params = {}
+    if args.suite in ("all", "ingest"):
+        ingest_params = IngestParams(
+            requests=args.requests,
+            concurrency=args.concurrency,
+            batch_ratio=args.batch_ratio,
+            batch_size=args.batch_size,
+            batch_format=args.batch_format,
+            sensors=args.sensors,
+            ingest_mode=args.ingest_mode,
+            durability=args.durability,
+            sockets=args.sockets,
+            seed=args.seed,
+        )
+        transport = "sockets" if args.sockets else "inprocess"
+        results[f"ingest.{transport}.{args.ingest_mode}"] = await run_ingest(config, ingest_params)
+        params["ingest"] = asdict(ingest_params)
+
+    if args.suite in ("all", "micro"):
+        batch_sizes = [int(size) for size in args.writer_batch_sizes.split(",")]
+        results.update(
+            await run_micro(
+                config.get("telemetry_sink_logging", "encryption_key"),
+                iterations=args.iterations,
+                drain_every=args.drain_every,
+                batch_sizes=batch_sizes,
+                repeats=args.repeats,
+            )
+        )
+        params["micro"] = {
+            "iterations": args.iterations,
+            "drain_every": args.drain_every,
+            "writer_batch_sizes": batch_sizes,
+            "repeats": args.repeats,
+        }
+
+    return {"version": REPORT_VERSION, "environment": environment(), "params": params, "results": results}
+
+
+def main(argv=None) -> int:
+    """
+    Command-line entry point for the sink benchmarks.
+
+    Writes a JSON report to stdout (or `--output`) and, given `--baseline`,
+    exits with status 1 if any throughput or latency metric is worse than the
+    baseline's by more than `--tolerance`, e.g.:
+
+        python -m telemetry_sink.benchmarks --output current.json --baseline baseline.json --tolerance 0.15
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Telemetry Sink's ingest throughput and latency.")
+    parser.add_argument("--suite", choices=("all", "ingest", "micro"), default="all")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="A stored JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression (default 0.1)")
+
+    ingest = parser.add_argument_group("ingest")
+    ingest.add_argument("--requests", type=int, default=20000, help="Requests to send")
+    ingest.add_argument("--concurrency", type=int, default=64, help="Concurrent senders")
+    ingest.add_argument("--batch-ratio", type=float, default=0.2, help="Share of requests that are batches")
+    ingest.add_argument("--batch-size", type=int, default=100, help="Readings per batch request")
+    ingest.add_argument("--batch-format", choices=BATCH_FORMATS, default="json")
+    ingest.add_argument("--sensors", type=int, default=50, help="Distinct sensor names")
+    ingest.add_argument("--ingest-mode", choices=("fastapi", "raw"), default="fastapi")
+    ingest.add_argument("--durability", choices=DURABILITY_LEVELS, default="memory")
+    ingest.add_argument("--sockets", action="store_true", help="Send over loopback sockets through Uvicorn")
+    ingest.add_argument("--seed", type=int, default=1, help="Seed of the generated payloads")
+
+    micro = parser.add_argument_group("micro")
+    micro.add_argument("--iterations", type=int, default=200000, help="Rate limiter checks and buffer adds")
+    micro.add_argument("--drain-every", type=int, default=1000, help="Buffer adds between drains")
+    micro.add_argument("--writer-batch-sizes", default="1,100,1000,10000", help="Comma-separated batch sizes")
+    micro.add_argument("--repeats", type=int, default=20, help="Log writer batches per batch size")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args, load_config()))
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+    else:
+        sys.stdout.write(rendered + "\n")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print("Warning: the baseline was recorded on a different environment.", file=sys.stderr)
+    regressions = compare(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    print(f"{len(regressions)} regressions beyond {args.tolerance:.0%} tolerance", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
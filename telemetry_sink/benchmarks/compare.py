@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+
+# Metrics where a higher value is better; matched by suffix.
+HIGHER_IS_BETTER = ("per_sec",)
+# Metrics where a lower value is better; matched by suffix.
+LOWER_IS_BETTER = ("_ms", "ns_per_op", "bytes_per_msg")
+
+
+@dataclass
+class Regression:
+    benchmark: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """The relative change from the baseline, e.g. -0.2 for 20% lower."""
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.benchmark} {self.metric}: {self.baseline:.4g} -> {self.current:.4g} ({self.change:+.1%})"
+
+
+def _direction(metric: str) -> int | None:
+    """+1 if higher is better, -1 if lower is better, None if the metric is not compared."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[Regression]:
+    """
+    Compares two benchmark reports and lists every metric that got worse by more than `tolerance`.
+
+    Only benchmarks and metrics present in both reports are compared.
+
+    Args:
+        current: The report of this run.
+        baseline: A stored report to compare against.
+        tolerance: The allowed relative change, e.g. 0.1 for 10%.
+    """
+    regressions = []
+    baseline_results: dict[str, dict] = baseline.get("results", {})
+    for benchmark, metrics in current.get("results", {}).items():
+        reference = baseline_results.get(benchmark)
+        if reference is None:
+            continue
+        for metric, value in metrics.items():
+            direction = _direction(metric)
+            base = reference.get(metric)
+            if direction is None or not isinstance(value, int | float) or not isinstance(base, int | float):
+                continue
+            if direction > 0 and value < base * (1 - tolerance):
+                regressions.append(Regression(benchmark, metric, base, value))
+            elif direction < 0 and value > base * (1 + tolerance):
+                regressions.append(Regression(benchmark, metric, base, value))
+    return regressions
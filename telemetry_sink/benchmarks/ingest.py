@@ -0,0 +1,333 @@
+"""
+End-to-end ingest benchmark: requests through the HTTP app into the encrypted log.
+
+The sink is wired by the same factories as in production (from
+``config.ini``), with the rate limit lifted and the log written to a
+temporary directory. Requests are either handed to the ASGI app in process,
+which measures the sink without any network stack, or sent over real
+sockets to a Uvicorn server on a loopback port.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import tempfile
+import time
+from collections.abc import Callable
+from configparser import ConfigParser
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import uvicorn
+
+from telemetry_sink.adapters.http_server import create_http_api_app
+from telemetry_sink.adapters.raw_asgi import create_raw_ingest_app
+from telemetry_sink.adapters.wire_format import BINARY_BATCH_CONTENT_TYPE
+from telemetry_sink.app_builder.factory import (
+    create_crypto_service,
+    create_log_writer,
+    create_telemetry_service,
+)
+from telemetry_sink.benchmarks.stats import directory_size, summarize_latencies
+from telemetry_sink.domain.sensor import to_epoch_us
+
+log = logging.getLogger(__name__)
+
+SPILL_JOURNAL_NAME = "telemetry_spill.journal"
+
+BATCH_FORMATS = ("json", "ndjson", "binary")
+
+# A request: path, body, content type and the number of readings it carries.
+Request = tuple[str, bytes, str, int]
+
+
+@dataclass
+class IngestParams:
+    requests: int = 20000
+    concurrency: int = 64
+    # Share of requests that are batches; the rest are single readings.
+    batch_ratio: float = 0.2
+    batch_size: int = 100
+    batch_format: str = "json"
+    sensors: int = 50
+    ingest_mode: str = "fastapi"
+    durability: str = "memory"
+    sockets: bool = False
+    seed: int = 1
+
+
+def build_requests(params: IngestParams) -> list[Request]:
+    """Generates the request mix up front, deterministically from `params.seed`."""
+    if params.batch_format not in BATCH_FORMATS:
+        raise ValueError(f"Unsupported batch format: {params.batch_format}. Expected one of {BATCH_FORMATS}.")
+
+    rng = random.Random(params.seed)
+    start_us = to_epoch_us(datetime(2025, 1, 1, tzinfo=UTC))
+    names = [f"sensor-{i:04d}" for i in range(params.sensors)]
+
+    # Readings as the node sends them: epoch microseconds, a millisecond apart.
+    def reading(i: int) -> tuple[str, int, int]:
+        return rng.choice(names), rng.randrange(-(2**31), 2**31), start_us + i * 1000
+
+    requests = []
+    for i in range(params.requests):
+        if rng.random() >= params.batch_ratio:
+            name, value, timestamp_us = reading(i)
+            body = json.dumps({"name": name, "value": value, "timestamp_us": timestamp_us}).encode()
+            requests.append(("/telemetry", body, "application/json", 1))
+            continue
+
+        readings = [reading(i * params.batch_size + j) for j in range(params.batch_size)]
+        if params.batch_format == "binary":
+            # The node's encoder; only needed for this format.
+            from sensor_node.infrastructure.wire_format import encode_binary_batch
+
+            body = encode_binary_batch(readings)
+            content_type = BINARY_BATCH_CONTENT_TYPE
+        else:
+            records = [{"name": n, "value": v, "timestamp_us": ts} for n, v, ts in readings]
+            if params.batch_format == "ndjson":
+                body = b"\n".join(json.dumps(r).encode() for r in records)
+                content_type = "application/x-ndjson"
+            else:
+                body = json.dumps(records).encode()
+                content_type = "application/json"
+        requests.append(("/telemetry/batch", body, content_type, len(readings)))
+    return requests
+
+
+def benchmark_config(config: ConfigParser, log_dir: str, durability: str) -> ConfigParser:
+    """Overrides the production config so only the sink's own cost is measured."""
+    config = _copy_config(config)
+    for section in ("telemetry_sink_logging", "telemetry_sink_rate_limit", "telemetry_sink_buffer"):
+        if not config.has_section(section):
+            config.add_section(section)
+    config.set("telemetry_sink_logging", "file_path", f"{log_dir}/telemetry.log.enc")
+    # Never throttle: the benchmark measures ingest cost, not the configured budget.
+    config.set("telemetry_sink_rate_limit", "limit_bytes_per_sec", str(2**40))
+    config.set("telemetry_sink_rate_limit", "capacity_bytes", str(2**40))
+    config.set("telemetry_sink_rate_limit", "fairness", "none")
+    config.set("telemetry_sink_buffer", "durability", durability)
+    if config.get("telemetry_sink_buffer", "spill_journal_path", fallback=""):
+        config.set("telemetry_sink_buffer", "spill_journal_path", f"{log_dir}/{SPILL_JOURNAL_NAME}")
+    return config
+
+
+def _copy_config(config: ConfigParser) -> ConfigParser:
+    copy = ConfigParser()
+    copy.read_dict({section: dict(config[section]) for section in config.sections()})
+    return copy
+
+
+class _Sink:
+    """The sink's services plus its HTTP app, running on the current event loop."""
+
+    def __init__(self, config: ConfigParser, ingest_mode: str):
+        self.telemetry_service = create_telemetry_service(config)
+        self.log_writer = create_log_writer(
+            config, self.telemetry_service.buffer_manager, create_crypto_service(config)
+        )
+        passthrough = config.getboolean("telemetry_sink_server", "passthrough", fallback=False)
+        app = create_http_api_app(self.telemetry_service, passthrough=passthrough)
+        if ingest_mode == "raw":
+            app = create_raw_ingest_app(self.telemetry_service, fallback_app=app, passthrough=passthrough)
+        self.app = app
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self.log_writer.run())]
+
+    async def stop(self):
+        await self.log_writer.stop()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def _asgi_post(app, path: str, body: bytes, content_type: str) -> int:
+    """Sends one POST request straight to an ASGI app and returns the response status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    status = 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Only reached by apps watching for a disconnect; the client goes away once answered.
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_done.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+class _HttpConnection:
+    """
+    A minimal keep-alive HTTP/1.1 client connection.
+
+    Sends each request with a single write and reads the response by its
+    Content-Length, so the client adds as little as possible to the
+    measured latency.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def post(self, path: str, body: bytes, content_type: str) -> int:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        head = (
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n"
+        )
+        self._writer.write(head.encode("latin-1") + body)
+
+        status_line, *header_lines = (await self._reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        await self._reader.readexactly(length)
+        return int(status_line.split(" ", 2)[1])
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+
+async def _drive(
+    requests: list[Request], concurrency: int, connect: Callable[[], object]
+) -> tuple[float, list[float], dict[int, int], int]:
+    """
+    Sends `requests` from `concurrency` concurrent senders.
+
+    Each sender gets its own connection from `connect()`, an object with
+    `post(path, body, content_type) -> status` and `close()` coroutines.
+
+    Returns:
+        The duration, the latency of every request, the count per response status and the accepted readings.
+    """
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    accepted_readings = 0
+    pending = iter(requests)
+
+    async def sender():
+        nonlocal accepted_readings
+        connection = connect()
+        try:
+            for path, body, content_type, readings in pending:
+                started = time.perf_counter()
+                status = await connection.post(path, body, content_type)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 202:
+                    accepted_readings += readings
+        finally:
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, statuses, accepted_readings
+
+
+class _AsgiConnection:
+    """Hands requests straight to the ASGI app, without a network stack."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def post(self, path: str, body: bytes, content_type: str) -> int:
+        return await _asgi_post(self.app, path, body, content_type)
+
+    async def close(self):
+        pass
+
+
+async def _run_over_sockets(sink: _Sink, requests: list[Request], concurrency: int):
+    # IPPROTO_TCP so asyncio sets TCP_NODELAY on accepted connections (see `_bind_reuse_port_socket`).
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(sink.app, log_level="warning", access_log=False))
+    server_task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        return await _drive(requests, concurrency, lambda: _HttpConnection("127.0.0.1", port))
+    finally:
+        server.should_exit = True
+        await server_task
+        sock.close()
+
+
+async def run_ingest(config: ConfigParser, params: IngestParams) -> dict[str, object]:
+    """
+    Runs the end-to-end ingest benchmark.
+
+    Returns:
+        Throughput (requests and readings per second), latency percentiles,
+        response status counts and the bytes the accepted readings took on disk.
+    """
+    requests = build_requests(params)
+    with tempfile.TemporaryDirectory(prefix="telemetry-bench-") as log_dir:
+        sink = _Sink(benchmark_config(config, log_dir, params.durability), params.ingest_mode)
+        sink.start()
+        try:
+            if params.sockets:
+                duration, latencies, statuses, readings = await _run_over_sockets(sink, requests, params.concurrency)
+            else:
+                duration, latencies, statuses, readings = await _drive(
+                    requests, params.concurrency, lambda: _AsgiConnection(sink.app)
+                )
+        finally:
+            await sink.stop()
+        bytes_on_disk = directory_size(log_dir)
+        # The spill journal is a preallocated ring, not log data.
+        journal_path = os.path.join(log_dir, SPILL_JOURNAL_NAME)
+        if os.path.exists(journal_path):
+            bytes_on_disk -= os.path.getsize(journal_path)
+
+    return {
+        "requests": len(requests),
+        "readings": readings,
+        "duration_s": duration,
+        "requests_per_sec": len(requests) / duration,
+        "msgs_per_sec": readings / duration,
+        **summarize_latencies(latencies),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "bytes_on_disk": bytes_on_disk,
+        "bytes_per_msg": bytes_on_disk / readings if readings else 0.0,
+    }
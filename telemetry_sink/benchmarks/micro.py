@@ -0,0 +1,129 @@
+"""
+Micro-benchmarks of the sink's hot-path components in isolation.
+
+Each benchmark reports throughput and per-operation cost for one
+component, so a regression can be pinned to it: the rate limiter's accept
+path, buffer adds and drains, and the log writer's serialization plus
+encryption (and write) per batch size.
+"""
+
+import os
+import tempfile
+import time
+from datetime import UTC, datetime
+
+from telemetry_sink.benchmarks.stats import directory_size, summarize_latencies
+from telemetry_sink.domain.sensor import SensorData, SensorDataBatch, to_epoch_us
+from telemetry_sink.services.buffer_manager import BufferManager
+from telemetry_sink.services.crypto_service import CryptoService
+from telemetry_sink.services.log_writer import LogWriter
+from telemetry_sink.services.rate_limiter import RateLimiter
+
+SENSOR_NAMES = [f"sensor-{i:04d}" for i in range(50)]
+
+
+def _readings(count: int) -> list[SensorData]:
+    start = to_epoch_us(datetime(2025, 1, 1, tzinfo=UTC))
+    return [
+        SensorData(
+            name=SENSOR_NAMES[i % len(SENSOR_NAMES)],
+            value=i * 7919 % 100000,
+            timestamp_us=start + i * 1000,
+        )
+        for i in range(count)
+    ]
+
+
+def _ops(count: int, duration: float) -> dict[str, float]:
+    return {"ops_per_sec": count / duration, "ns_per_op": duration / count * 1e9}
+
+
+async def bench_rate_limiter(iterations: int) -> dict[str, dict[str, float]]:
+    """`RateLimiter.check` with a single global bucket and with per-sensor sub-buckets."""
+    results = {}
+    for fairness in ("none", "sensor"):
+        limiter = RateLimiter(2**40, capacity_bytes=2**40, fairness=fairness)
+        keys = [limiter.key_for(sensor_name=name) for name in SENSOR_NAMES]
+        started = time.perf_counter()
+        for i in range(iterations):
+            await limiter.check(200, keys[i % len(keys)])
+        results[f"micro.rate_limiter.check.{fairness}"] = _ops(iterations, time.perf_counter() - started)
+    return results
+
+
+async def bench_buffer(iterations: int, drain_every: int) -> dict[str, dict[str, float]]:
+    """`BufferManager.add` per reading and draining every `drain_every` readings."""
+    readings = _readings(min(iterations, 10000))
+    buffer = BufferManager(max_size_bytes=2**40, max_memory_bytes=2**40)
+
+    add_time = 0.0
+    drain_time = 0.0
+    drains = 0
+    for start in range(0, iterations, drain_every):
+        count = min(drain_every, iterations - start)
+        started = time.perf_counter()
+        for i in range(start, start + count):
+            await buffer.add(readings[i % len(readings)], 200)
+        add_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        _, size_bytes = await buffer.get_batch_with_size()
+        buffer.release(size_bytes)
+        drain_time += time.perf_counter() - started
+        drains += 1
+
+    return {
+        "micro.buffer.add": _ops(iterations, add_time),
+        "micro.buffer.drain": {**_ops(drains, drain_time), "batch_size": drain_every},
+    }
+
+
+async def bench_log_writer(key: str, batch_sizes: list[int], repeats: int) -> dict[str, dict[str, float]]:
+    """The log writer's serialization plus encryption, and the full encode-and-write, per batch size."""
+    crypto_service = CryptoService(key)
+    results = {}
+    for batch_size in batch_sizes:
+        batch = SensorDataBatch.from_readings(_readings(batch_size))
+        with tempfile.TemporaryDirectory(prefix="telemetry-bench-") as log_dir:
+            writer = LogWriter(
+                BufferManager(max_size_bytes=2**40, max_memory_bytes=2**40),
+                crypto_service,
+                os.path.join(log_dir, "telemetry.log.enc"),
+            )
+            encode_times = []
+            write_times = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                await writer._encode_batch(batch)
+                encode_times.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                await writer._write_batch_to_file(batch)
+                write_times.append(time.perf_counter() - started)
+            await writer.stop()
+            await writer.run()
+            bytes_on_disk = directory_size(log_dir)
+
+        readings = batch_size * repeats
+        results[f"micro.log_writer.encode.{batch_size}"] = {
+            "msgs_per_sec": readings / sum(encode_times),
+            **summarize_latencies(encode_times),
+        }
+        results[f"micro.log_writer.write.{batch_size}"] = {
+            "msgs_per_sec": readings / sum(write_times),
+            **summarize_latencies(write_times),
+            "bytes_on_disk": bytes_on_disk,
+            "bytes_per_msg": bytes_on_disk / readings,
+        }
+    return results
+
+
+async def run_micro(
+    key: str, iterations: int, drain_every: int, batch_sizes: list[int], repeats: int
+) -> dict[str, dict[str, float]]:
+    """Runs all micro-benchmarks and returns their results by benchmark name."""
+    results = {}
+    results.update(await bench_rate_limiter(iterations))
+    results.update(await bench_buffer(iterations, drain_every))
+    results.update(await bench_log_writer(key, batch_sizes, repeats))
+    return results
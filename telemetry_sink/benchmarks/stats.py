@@ -0,0 +1,46 @@
+import math
+import os
+import platform
+import sys
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Returns the `q`-th percentile (0-100) of already sorted values, by the nearest-rank method."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize_latencies(latencies: list[float]) -> dict[str, float]:
+    """Summarizes latencies given in seconds as milliseconds."""
+    values = sorted(latencies)
+    if not values:
+        return {"p50_ms": 0.0, "p99_ms": 0.0, "p999_ms": 0.0, "max_ms": 0.0, "mean_ms": 0.0}
+    return {
+        "p50_ms": percentile(values, 50) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "p999_ms": percentile(values, 99.9) * 1000,
+        "max_ms": values[-1] * 1000,
+        "mean_ms": sum(values) / len(values) * 1000,
+    }
+
+
+def directory_size(path: str) -> int:
+    """The total size in bytes of all files below `path`."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def environment() -> dict[str, object]:
+    """Describes the machine a run was made on, so results are only compared like for like."""
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
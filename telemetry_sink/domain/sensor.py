@@ -1,22 +1,164 @@
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
 
-@dataclass(frozen=True)
+
+def to_epoch_us(timestamp: datetime) -> int:
+    """Converts a datetime to integer microseconds since the Unix epoch; naive datetimes are taken as UTC."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(timestamp_us: int) -> datetime:
+    """Converts integer microseconds since the Unix epoch to an aware UTC datetime."""
+    return _EPOCH + timedelta(microseconds=timestamp_us)
+
+
+@dataclass(frozen=True, slots=True)
 class SensorData:
     name: str
     value: int
-    timestamp: datetime
+    # Microseconds since the Unix epoch (UTC); formatted only when read back out.
+    timestamp_us: int
 
     def to_dict(self) -> dict:
         """
         Convert the SensorData instance to a dictionary.
 
         Returns:
-            dict: A dictionary representation of the SensorData instance.
+            dict: A dictionary representation of the SensorData instance, in the form of a log record.
         """
         return {
             "name": self.name,
             "value": self.value,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp_us": self.timestamp_us,
         }
+
+
+class SensorDataBatch:
+    """
+    A compact, column-oriented collection of readings.
+
+    Sensor names are interned into a per-batch table and stored as small
+    integer ids; timestamps (epoch microseconds) and values are stored in
+    `array`s. A reading costs about 20 bytes instead of a dataclass instance
+    and a name reference. Iterating yields `SensorData` objects,
+    built on demand.
+
+    A reading may also carry its `payload`: the validated JSON the client
+    sent, which the log writer stores as is instead of serializing the
+    reading again (see the sink's `passthrough` setting). The `payloads`
+    column is only created once the first payload arrives; it holds None for
+    readings without one.
+    """
+
+    __slots__ = ("names", "_name_ids", "name_ids", "timestamps", "values", "payloads")
+
+    def __init__(self):
+        self.names: list[str] = []
+        self._name_ids: dict[str, int] = {}
+        self.name_ids = array("I")
+        self.timestamps = array("q")
+        self.values = array("q")
+        self.payloads: list[bytes | None] | None = None
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            name = sys.intern(name)
+            self.names.append(name)
+            self._name_ids[name] = name_id
+        return name_id
+
+    def append(self, data: SensorData):
+        self.append_raw(data.name, data.value, data.timestamp_us)
+
+    def append_raw(self, name: str, value: int, timestamp_us: int, payload: bytes | None = None):
+        """Appends a reading without going through a `SensorData` object."""
+        if payload is not None or self.payloads is not None:
+            self._payload_column().append(payload)
+        self.name_ids.append(self._name_id(name))
+        self.timestamps.append(timestamp_us)
+        self.values.append(value)
+
+    def _payload_column(self) -> list[bytes | None]:
+        if self.payloads is None:
+            self.payloads = [None] * len(self.values)
+        return self.payloads
+
+    def extend(self, batch: "Iterable[SensorData] | SensorDataBatch"):
+        if isinstance(batch, SensorDataBatch):
+            if batch.payloads is not None:
+                self._payload_column().extend(batch.payloads)
+            elif self.payloads is not None:
+                self.payloads.extend([None] * len(batch))
+            # Merge column-wise, remapping the other batch's name ids onto ours.
+            remap = [self._name_id(name) for name in batch.names]
+            self.name_ids.extend(remap[name_id] for name_id in batch.name_ids)
+            self.timestamps.extend(batch.timestamps)
+            self.values.extend(batch.values)
+            return
+        for data in batch:
+            self.append(data)
+
+    def iter_payloads(self) -> Iterator[tuple[str, int, int, bytes | None]]:
+        """Like `iter_raw`, also yielding each reading's payload (None if it has none)."""
+        if self.payloads is None:
+            for name, value, timestamp_us in self.iter_raw():
+                yield name, value, timestamp_us, None
+            return
+        for (name, value, timestamp_us), payload in zip(self.iter_raw(), self.payloads):
+            yield name, value, timestamp_us, payload
+
+    @classmethod
+    def from_readings(cls, readings: Iterable[SensorData]) -> "SensorDataBatch":
+        batch = cls()
+        batch.extend(readings)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __bool__(self) -> bool:
+        return len(self.values) > 0
+
+    def iter_raw(self) -> Iterator[tuple[str, int, int]]:
+        """Yields `(name, value, timestamp_us)` tuples without building `SensorData` objects."""
+        names = self.names
+        for name_id, value, timestamp_us in zip(self.name_ids, self.values, self.timestamps):
+            yield names[name_id], value, timestamp_us
+
+    def __iter__(self) -> Iterator[SensorData]:
+        for name, value, timestamp_us in self.iter_raw():
+            yield SensorData(name=name, value=value, timestamp_us=timestamp_us)
+
+    def __getitem__(self, index: slice) -> "SensorDataBatch":
+        """Returns a slice of the batch as a new batch sharing the name table."""
+        if not isinstance(index, slice):
+            raise TypeError("SensorDataBatch only supports slicing")
+        part = SensorDataBatch()
+        part.names = self.names
+        part._name_ids = self._name_ids
+        part.name_ids = self.name_ids[index]
+        part.timestamps = self.timestamps[index]
+        part.values = self.values[index]
+        if self.payloads is not None:
+            part.payloads = self.payloads[index]
+        return part
+
+    def name_counts(self) -> Counter:
+        """Returns the number of readings per sensor name."""
+        counts = Counter(self.name_ids)
+        return Counter({self.names[name_id]: count for name_id, count in counts.items()})
+
+    def sensor_names(self) -> frozenset:
+        """Returns the distinct sensor names present in the batch."""
+        return frozenset(self.names[name_id] for name_id in set(self.name_ids))
@@ -1,16 +1,19 @@
 import asyncio
 import logging
-import uvicorn
+import os
+import signal
 
 
 from telemetry_sink.app_builder.config import load_config
 from telemetry_sink.app_builder.factory import (
     create_telemetry_service,
     create_log_writer,
-    create_flush_timer,
     create_api_app,
     create_crypto_service,
+    create_shared_rate_bucket,
 )
+from telemetry_sink.services.rate_limiter import SharedTokenBucket
+from telemetry_sink.supervisor import Supervisor
 
 
 logging.basicConfig(
@@ -19,14 +22,33 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 
-async def main():
+async def main(worker_id: int | None = None, shared_rate_bucket: SharedTokenBucket | None = None):
     """
     The main asynchronous entry point for the Telemetry Sink.
 
     This function initializes all services, runs them concurrently, and handles
     the graceful shutdown sequence.
+
+    Args:
+        worker_id: Set when running as one of several supervised worker processes;
+            the worker then writes its own log segment and shares the listen port.
+        shared_rate_bucket: The global rate-limit budget shared by all workers.
     """
-    log.info("--- Telemetry Sink Starting Up ---")
+    log.info(f"--- Telemetry Sink Starting Up{'' if worker_id is None else f' (worker {worker_id})'} ---")
+
+    if worker_id is not None:
+        # The supervisor stops workers with SIGTERM; treat it like Ctrl+C, but only once,
+        # so a repeated signal cannot cut the drain short.
+        main_task = asyncio.current_task()
+
+        def terminate():
+            if not main_task.cancelling():
+                main_task.cancel()
+
+        # Installed with signal.signal (not loop.add_signal_handler) so that Uvicorn can
+        # capture it, shut down gracefully and then re-raise it, as it does for Ctrl+C.
+        loop = asyncio.get_running_loop()
+        signal.signal(signal.SIGTERM, lambda signum, frame: loop.call_soon_threadsafe(terminate))
 
     # 1. Load Configuration
     config = load_config()
@@ -34,31 +56,53 @@ async def main():
     # 2. Build Services using Factories
     # This process wires up all the application's components.
     try:
-        telemetry_service = create_telemetry_service(config)
+        telemetry_service = create_telemetry_service(config, shared_rate_bucket=shared_rate_bucket, worker_id=worker_id)
         crypto_service = create_crypto_service(config)
-        log_writer = create_log_writer(config, telemetry_service.buffer_manager, crypto_service)
-        flush_timer = create_flush_timer(config, telemetry_service.buffer_manager)
+        log_writer = create_log_writer(config, telemetry_service.buffer_manager, crypto_service, worker_id=worker_id)
 
-        # Inject the core service into the API adapter to create the FastAPI app
+        # Inject the core service into the server adapter (HTTP, TCP or UDP)
         server_protocol = config.get("telemetry_sink_server", "protocol", fallback="http")
         server_port = config.get("telemetry_sink_server", "port")
         server_host = config.get("telemetry_sink_server", "bind_address")
+        ingest_mode = config.get("telemetry_sink_server", "ingest_mode", fallback="fastapi")
+        passthrough = config.getboolean("telemetry_sink_server", "passthrough", fallback=False)
+        stream_credit = config.getint("telemetry_sink_server", "stream_credit", fallback=64)
+        max_frame_bytes = config.getint("telemetry_sink_server", "max_frame_bytes", fallback=1048576)
+        udp_stats_interval = config.getfloat("telemetry_sink_server", "udp_stats_interval", fallback=60.0)
+        udp_receive_buffer_bytes = config.getint("telemetry_sink_server", "udp_receive_buffer_bytes", fallback=4194304)
         server = create_api_app(
             telemetry_service=telemetry_service,
             host=server_host,
             port=int(server_port),
             server_protocol=server_protocol,
+            ingest_mode=ingest_mode,
+            stream_credit=stream_credit,
+            max_frame_bytes=max_frame_bytes,
+            udp_stats_interval=udp_stats_interval,
+            udp_receive_buffer_bytes=udp_receive_buffer_bytes,
+            reuse_port=worker_id is not None,
+            passthrough=passthrough,
         )
     except (ValueError, KeyError) as e:
         log.critical(f"FATAL: Failed to initialize services due to invalid config value. Error: {e}")
         return
 
-    # 3. Run Services Concurrently and Handle Shutdown
+    # 3. Write what a previous run left in the spill journal before accepting new traffic.
+    try:
+        recovered = await log_writer.recover()
+    except Exception as e:
+        log.critical(f"FATAL: Failed to recover the spill journal; it is kept for the next start. Error: {e}")
+        telemetry_service.buffer_manager.close()
+        return
+    if recovered:
+        log.info(f"Recovered {recovered} readings from the spill journal.")
+
+    # 4. Run Services Concurrently and Handle Shutdown
     try:
         log.info("Starting all concurrent services...")
         # asyncio.gather runs all awaitables concurrently. It will complete when
         # all tasks are finished or when it is cancelled.
-        await asyncio.gather(server.serve(), log_writer.run(), flush_timer.run())
+        await asyncio.gather(server.serve(), log_writer.run())
     except asyncio.CancelledError:
         # This is the EXPECTED exception when Ctrl+C is pressed.
         # It's not an error, it's the signal to begin a graceful shutdown.
@@ -67,18 +111,47 @@ async def main():
         # This block is guaranteed to run, ensuring a clean shutdown.
         log.info("--- Starting Graceful Shutdown ---")
 
-        # 1. Stop the flush timer from creating new flush events.
-        flush_timer.stop()
-
-        # 2. Stop the log writer, which will finish processing any remaining messages.
+        # Stop the log writer, which will finish processing any remaining messages.
+        # Flushes are scheduled by the buffer itself, so nothing else needs stopping.
         await log_writer.stop()
 
-        # The Uvicorn server's shutdown is handled automatically by the cancellation.
+        # The server's shutdown (Uvicorn, TCP or UDP) is handled automatically by the cancellation.
         log.info("--- Telemetry Sink Shut Down Gracefully ---")
 
 
+def run_worker(worker_id: int, shared_rate_bucket: SharedTokenBucket):
+    """Entry point of one supervised worker process."""
+    # Leave the terminal's process group so Ctrl+C only reaches the supervisor,
+    # which then stops every worker with a single SIGTERM.
+    os.setpgrp()
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    asyncio.run(main(worker_id=worker_id, shared_rate_bucket=shared_rate_bucket))
+
+
+def run_supervisor(worker_count: int, shutdown_timeout: float):
+    """Runs the sink as `worker_count` processes sharing the listen port and the rate-limit budget."""
+    config = load_config()
+    if config.getint("telemetry_sink_dedup", "max_ids", fallback=1000000) > 0:
+        log.warning(
+            f"Record deduplication is per worker process: with {worker_count} workers, a resent reading "
+            f"that reaches another worker than the original is logged twice. Use workers = 1 to drop all replays."
+        )
+    shared_rate_bucket = create_shared_rate_bucket(config)
+    Supervisor(worker_count, target=run_worker, args=(shared_rate_bucket,), shutdown_timeout=shutdown_timeout).run()
+
+
 if __name__ == "__main__":
     # This is the main entry point for the Python interpreter.
+    startup_config = load_config()
+    worker_count = startup_config.getint("telemetry_sink_server", "workers", fallback=1)
+    if worker_count > 1:
+        run_supervisor(
+            worker_count,
+            shutdown_timeout=startup_config.getfloat("telemetry_sink_server", "shutdown_timeout", fallback=30.0),
+        )
+        raise SystemExit(0)
+
     try:
         # asyncio.run() starts the event loop and runs our main coroutine.
         # It automatically handles KeyboardInterrupt (Ctrl+C) by cancelling
@@ -0,0 +1,44 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+
+from telemetry_sink.app_builder.config import load_config, log_file_path
+from telemetry_sink.services.log_query import LogQuery
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+
+def main(argv=None):
+    """
+    Command-line entry point for querying the sink's encrypted log by time range.
+
+    Matching records are printed to stdout as NDJSON, e.g.:
+
+        python -m telemetry_sink.query_log --from 2025-07-13T10:00:00 --to 2025-07-13T10:05:00 --sensor X
+    """
+    parser = argparse.ArgumentParser(description="Query the Telemetry Sink's encrypted log by time range.")
+    parser.add_argument("--from", dest="start", required=True, type=datetime.fromisoformat, help="ISO start (UTC)")
+    parser.add_argument("--to", dest="end", required=True, type=datetime.fromisoformat, help="ISO end (UTC)")
+    parser.add_argument("--sensor", action="append", help="Sensor name to include; may be repeated")
+    parser.add_argument("--file", help="Log file path; defaults to [telemetry_sink_logging] file_path from config.ini")
+    parser.add_argument("--workers", type=int, default=0, help="Decrypt worker processes; 0 = one per CPU")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    file_path = args.file or log_file_path(config)
+    key = config.get("telemetry_sink_logging", "encryption_key")
+
+    started = time.perf_counter()
+    records = LogQuery(file_path, key, workers=args.workers).query(args.start, args.end, args.sensor)
+    for record in records:
+        sys.stdout.write(json.dumps(record) + "\n")
+    print(f"{len(records)} records matched in {time.perf_counter() - started:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
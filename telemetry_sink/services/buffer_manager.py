@@ -1,58 +1,290 @@
 import asyncio
 import logging
-from typing import List
+import time
 
-from telemetry_sink.domain.sensor import SensorData
+from telemetry_sink.domain.sensor import SensorData, SensorDataBatch
+from telemetry_sink.services.flush_policy import FixedIntervalFlushPolicy, FlushPolicy
+from telemetry_sink.services.metrics import SinkMetrics
+from telemetry_sink.services.spill_journal import JournalMark, SpillJournal
 
 log = logging.getLogger(__name__)
 
+# When a reading counts as accepted: once buffered ("memory"), once handed to
+# the OS by the log writer ("written"), or once fsynced to disk ("fsynced").
+DURABILITY_LEVELS = ("memory", "written", "fsynced")
+
+
+def _consume_exception(future: asyncio.Future):
+    # Every waiter may have gone away; don't log "exception was never retrieved".
+    if not future.cancelled():
+        future.exception()
+
+
+class BufferFullError(Exception):
+    """Raised when accepting a message would take the buffer past its memory ceiling."""
+
+    def __init__(self, message: str, retry_after: float):
+        self.message = message
+        # Suggested number of seconds the sender should wait before retrying.
+        self.retry_after = retry_after
+        super().__init__(self.message)
+
 
 class BufferManager:
     """
     Manages an in-memory buffer for sensor data.
 
-    This class provides an async-safe queue to decouple message reception
+    This class provides an async-safe buffer to decouple message reception
     from file writing. It signals a separate writer task when the buffer
     should be flushed.
+
+    Readings are stored column-wise in a `SensorDataBatch`, and draining
+    swaps the whole batch out for an empty one in O(1). None of the buffer
+    operations await, so on a single event loop they are atomic without a lock.
+
+    Memory is bounded: bytes are held from the moment a message is accepted
+    until the writer `release`s them after writing, and once `max_memory_bytes`
+    are held new messages are refused with a `BufferFullError` carrying a
+    retry hint derived from the observed drain rate.
+
+    With a durability level other than "memory", callers can wait on a
+    commit future (`commit_waiter`) that the writer resolves once the batch
+    holding their readings has been written (and fsynced). All readings
+    drained together share one future, so one write covers all of them.
+
+    When to flush is up to a `FlushPolicy`: the first reading into an empty
+    buffer arms a single timer for the policy's delay, and draining cancels
+    it, so nothing wakes up while the buffer is empty.
+
+    With a `SpillJournal`, every accepted reading is also appended to it, and
+    the writer checkpoints the journal (`checkpoint`) once a drained batch is
+    in the log file; readings still in memory when the process dies are
+    replayed from the journal on the next start.
     """
 
-    def __init__(self, max_size_bytes: int):
+    # Smoothing factor of the drain-rate moving average.
+    _DRAIN_RATE_ALPHA = 0.3
+
+    def __init__(
+        self,
+        max_size_bytes: int,
+        max_memory_bytes: int | None = None,
+        durability: str = "memory",
+        metrics: SinkMetrics | None = None,
+        flush_policy: FlushPolicy | None = None,
+        journal: SpillJournal | None = None,
+    ):
         """
         Initializes the BufferManager.
 
         Args:
             max_size_bytes: The buffer size in bytes that triggers a flush.
+            max_memory_bytes: The hard ceiling of held bytes (queued plus being written);
+                defaults to 8 times `max_size_bytes`.
+            durability: One of `DURABILITY_LEVELS`.
+            metrics: Where the buffer's depth and drained batch sizes are reported.
+            flush_policy: Decides how long readings wait before a flush; defaults to a
+                fixed 0.1s interval.
+            journal: Where accepted readings are spilled until they are written; None keeps
+                them in memory only.
         """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unsupported durability: {durability}. Expected one of {DURABILITY_LEVELS}.")
         self.max_size_bytes = max_size_bytes
-        self._queue = asyncio.Queue()
+        self.max_memory_bytes = max_memory_bytes or max_size_bytes * 8
+        self.durability = durability
+        self._batch = SensorDataBatch()
         self._current_size_bytes = 0
 
+        # Resolved once the current batch is committed; created when the first caller asks.
+        self._commit: asyncio.Future | None = None
+
+        # Bytes accepted and not yet released by the writer.
+        self._held_bytes = 0
+
+        # Moving average of the writer's throughput in bytes per second.
+        self._drain_rate = 0.0
+        self._last_release_at: float | None = None
+
         # Event to signal the LogWriter that a flush is needed
         self._flush_event = asyncio.Event()
 
-        # Lock to protect access to the size counter
-        self._lock = asyncio.Lock()
+        self.journal = journal
+
+        self.flush_policy = flush_policy or FixedIntervalFlushPolicy(0.1)
+        # The timer flushing the current batch; armed by its first reading.
+        self._flush_handle: asyncio.TimerHandle | None = None
 
-    async def add(self, data: SensorData, size_bytes: int):
+        # The depth gauges are read when scraped, not updated on every add.
+        self.metrics = metrics or SinkMetrics()
+        self.metrics.buffer_pending_messages.set_function(lambda: len(self._batch))
+        self.metrics.buffer_pending_bytes.set_function(lambda: self._current_size_bytes)
+        self.metrics.buffer_held_bytes.set_function(lambda: self._held_bytes)
+
+    @property
+    def pending_count(self) -> int:
+        """The number of readings waiting to be drained."""
+        return len(self._batch)
+
+    @property
+    def held_bytes(self) -> int:
+        return self._held_bytes
+
+    @property
+    def drain_rate(self) -> float:
+        """The observed drain rate in bytes per second (0 until the first release)."""
+        return self._drain_rate
+
+    def retry_after(self, size_bytes: int) -> float:
+        """Estimates how many seconds until `size_bytes` more would fit under the memory ceiling."""
+        excess = self._held_bytes + size_bytes - self.max_memory_bytes
+        if excess <= 0:
+            return 0.0
+        if self._drain_rate <= 0:
+            return 1.0
+        return min(max(excess / self._drain_rate, 0.1), 60.0)
+
+    def check_capacity(self, size_bytes: int):
+        """
+        Verifies that `size_bytes` more can be accepted.
+
+        Raises:
+            BufferFullError: If the memory ceiling would be exceeded.
+        """
+        if self._held_bytes + size_bytes > self.max_memory_bytes:
+            # Make sure the writer is draining while senders back off.
+            self.flush()
+            raise BufferFullError(
+                f"Buffer is full ({self._held_bytes}/{self.max_memory_bytes} bytes held)",
+                retry_after=self.retry_after(size_bytes),
+            )
+
+    async def add(self, data: SensorData, size_bytes: int, payload: bytes | None = None):
         """
         Adds a new message to the buffer.
 
         If adding the message causes the buffer to exceed its max size,
-        it will trigger a flush event.
+        it will trigger a flush event. `payload`, if given, is the message's
+        validated JSON, which is logged as is.
+
+        Raises:
+            BufferFullError: If the memory ceiling would be exceeded.
+        """
+        self.check_capacity(size_bytes)
+        if self.journal is not None and not self.journal.append_reading(data.name, data.value, data.timestamp_us):
+            self._journal_full(size_bytes)
+        self._batch.append_raw(data.name, data.value, data.timestamp_us, payload)
+        self._account(size_bytes)
+
+    def add_raw(self, name: str, value: int, timestamp_us: int, size_bytes: int, payload: bytes | None = None):
+        """
+        Adds a reading given as plain fields, without a `SensorData` object.
+
+        `payload`, if given, is the reading's validated JSON, which is logged as is.
+
+        Raises:
+            BufferFullError: If the memory ceiling would be exceeded.
+        """
+        self.check_capacity(size_bytes)
+        if self.journal is not None and not self.journal.append_reading(name, value, timestamp_us):
+            self._journal_full(size_bytes)
+        self._batch.append_raw(name, value, timestamp_us, payload)
+        self._account(size_bytes)
+
+    async def add_batch(self, batch: list[SensorData] | SensorDataBatch, size_bytes: int):
+        """
+        Adds a whole batch of messages to the buffer in one step.
+
+        The size counter is updated (and the flush check performed) once for
+        the batch instead of once per message.
+
+        Raises:
+            BufferFullError: If the memory ceiling would be exceeded.
+        """
+        self.add_batch_nowait(batch, size_bytes)
+
+    def add_batch_nowait(self, batch: list[SensorData] | SensorDataBatch, size_bytes: int):
+        """
+        Like `add_batch`, for callers that are not coroutines (e.g. datagram callbacks).
+
+        Raises:
+            BufferFullError: If the memory ceiling would be exceeded.
+        """
+        self.check_capacity(size_bytes)
+        if self.journal is not None:
+            if not isinstance(batch, SensorDataBatch):
+                batch = SensorDataBatch.from_readings(batch)
+            if not self.journal.append_batch(batch):
+                self._journal_full(size_bytes)
+        self._batch.extend(batch)
+        self._account(size_bytes)
+
+    def _journal_full(self, size_bytes: int):
+        """Refuses readings that do not fit into the spill journal until the writer checkpoints it."""
+        self.flush()
+        raise BufferFullError(
+            f"Spill journal is full ({self.journal.pending_bytes} bytes pending)",
+            retry_after=max(self.retry_after(size_bytes), 1.0),
+        )
+
+    def _account(self, size_bytes: int):
+        """Counts newly buffered bytes and triggers a flush once the buffer is full enough."""
+        self._held_bytes += size_bytes
+        self._current_size_bytes += size_bytes
+        if self._flush_handle is None and not self._flush_event.is_set():
+            self._schedule_flush()
+        if self._current_size_bytes >= self.max_size_bytes:
+            log.info(f"Buffer size {self._current_size_bytes} >= max {self.max_size_bytes}. Triggering flush.")
+            self.flush()
+
+    def _schedule_flush(self):
+        """Arms the flush of a batch that just got its first reading, after the policy's delay."""
+        delay = self.flush_policy.flush_delay()
+        if delay <= 0:
+            self.flush()
+        else:
+            self._flush_handle = asyncio.get_running_loop().call_later(delay, self.flush)
+
+    def release(self, size_bytes: int):
+        """
+        Releases bytes the writer has finished with and updates the drain rate.
+
+        Must be called once for every batch obtained from `get_batch_with_size`.
+        """
+        self._held_bytes = max(self._held_bytes - size_bytes, 0)
+
+        now = time.monotonic()
+        if self._last_release_at is not None and now > self._last_release_at:
+            rate = size_bytes / (now - self._last_release_at)
+            if self._drain_rate <= 0:
+                self._drain_rate = rate
+            else:
+                self._drain_rate += self._DRAIN_RATE_ALPHA * (rate - self._drain_rate)
+        self._last_release_at = now
+
+    def journal_mark(self) -> JournalMark | None:
+        """
+        Returns the spill journal position covering every reading drained so far (None without a journal).
+
+        Take it right after draining a batch, and hand it to `checkpoint` once that batch is written.
         """
-        await self._queue.put(data)
+        return self.journal.mark() if self.journal is not None else None
 
-        async with self._lock:
-            self._current_size_bytes += size_bytes
-            if self._current_size_bytes >= self.max_size_bytes:
-                log.info(f"Buffer size {self._current_size_bytes} >= max {self.max_size_bytes}. Triggering flush.")
-                self.flush()
+    def checkpoint(self, mark: JournalMark | None):
+        """Records in the spill journal that the readings before `mark` are in the log file."""
+        if self.journal is not None and mark is not None:
+            self.journal.checkpoint(mark)
+
+    def close(self):
+        """Closes the spill journal; readings not checkpointed stay in it for the next start."""
+        if self.journal is not None:
+            self.journal.close()
 
     def flush(self):
         """
         Manually trigger a flush event.
 
-        This is called by the FlushTimer or when the buffer is full.
+        This is called by the flush policy's timer or when the buffer is full.
         It is a non-blocking operation.
         """
         self._flush_event.set()
@@ -66,27 +298,62 @@ class BufferManager:
         await self._flush_event.wait()
         self._flush_event.clear()
 
-    async def get_batch(self) -> List[SensorData]:
+    def commit_waiter(self) -> asyncio.Future:
+        """
+        Returns the future resolved once the readings buffered so far are committed.
+
+        Call it right after adding, without awaiting in between. The future
+        is shared by every caller waiting on the same batch, so await it
+        through `asyncio.shield`.
         """
-        Atomically drains the queue and returns all items as a batch.
+        if self._commit is None:
+            self._commit = asyncio.get_running_loop().create_future()
+            self._commit.add_done_callback(_consume_exception)
+        return self._commit
 
-        This also resets the internal byte counter.
+    async def get_batch_for_commit(self) -> tuple[SensorDataBatch, int, asyncio.Future | None]:
         """
-        batch = []
-        if self._queue.empty():
-            return batch
+        Like `get_batch_with_size`, also returning the batch's commit future (None if nobody waits on it).
 
-        async with self._lock:
-            while not self._queue.empty():
-                try:
-                    item = self._queue.get_nowait()
-                    batch.append(item)
-                except asyncio.QueueEmpty:
-                    # This should not happen due to the lock, but is safe to handle
-                    break
+        The caller must resolve the future once the batch is committed, or set
+        an exception on it if that failed.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._batch:
+            return SensorDataBatch(), 0, None
+        self.flush_policy.record_drain(len(self._batch), time.monotonic())
 
-            # Reset the size counter after draining the queue
-            self._current_size_bytes = 0
+        # Swap the whole batch (and whoever waits on it) out for an empty one.
+        batch, self._batch = self._batch, SensorDataBatch()
+        size_bytes, self._current_size_bytes = self._current_size_bytes, 0
+        commit, self._commit = self._commit, None
+        self.metrics.buffer_drained_batch_size.observe(len(batch))
 
         log.debug(f"Drained {len(batch)} items from buffer.")
+        return batch, size_bytes, commit
+
+    async def get_batch_with_size(self) -> tuple[SensorDataBatch, int]:
+        """
+        Atomically drains the buffer and returns all items as a batch, with their size in bytes.
+
+        This also resets the internal byte counter. The returned bytes stay
+        held against the memory ceiling until they are `release`d. Anyone
+        waiting on the batch's commit is released right away.
+        """
+        batch, size_bytes, commit = await self.get_batch_for_commit()
+        if commit is not None and not commit.done():
+            commit.set_result(None)
+        return batch, size_bytes
+
+    async def get_batch(self) -> SensorDataBatch:
+        """
+        Atomically drains the buffer and returns all items as a batch.
+
+        The drained bytes are released immediately; writers that want them
+        counted until written should use `get_batch_with_size` instead.
+        """
+        batch, size_bytes = await self.get_batch_with_size()
+        self._held_bytes = max(self._held_bytes - size_bytes, 0)
         return batch
@@ -1,16 +1,39 @@
+import base64
 import logging
+import os
+
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 log = logging.getLogger(__name__)
 
+# Size of the random nonce prepended to every encrypted block.
+BLOCK_NONCE_SIZE = 12
+
+# Context string for deriving the block key, so it is never the raw Fernet key.
+_BLOCK_KEY_INFO = b"telemetry-sink block encryption v1"
+
 
 class CryptoService:
-    """A simple wrapper for symmetric encryption using Fernet."""
+    """
+    A simple wrapper for symmetric encryption.
+
+    Single messages are encrypted as Fernet tokens. Whole blocks of records
+    are encrypted with AES-256-GCM under a key derived from the same
+    configured secret, which authenticates the block with a single tag and
+    avoids per-record IVs, HMACs and base64.
+    """
 
     def __init__(self, key: str):
         """Initializes the service with a URL-safe base64-encoded 32-byte key."""
         try:
             self._fernet = Fernet(key.encode("utf-8"))
+            raw_key = base64.urlsafe_b64decode(key.encode("utf-8"))
+            block_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=_BLOCK_KEY_INFO).derive(raw_key)
+            self._aead = AESGCM(block_key)
             log.info("CryptoService initialized successfully.")
         except (ValueError, TypeError) as e:
             log.error("FATAL: Invalid encryption key. It must be a 32-byte URL-safe base64 string.")
@@ -27,3 +50,26 @@ class CryptoService:
         except InvalidToken:
             log.warning("Decryption failed: Invalid token or key.")
             raise
+
+    def encrypt_block(self, plaintext: bytes, associated_data: bytes = b"") -> bytes:
+        """
+        Encrypts a block of bytes.
+
+        Args:
+            plaintext: The block contents.
+            associated_data: Bytes that are authenticated but not encrypted (e.g. a frame header).
+
+        Returns:
+            The random nonce followed by the ciphertext and its authentication tag.
+        """
+        nonce = os.urandom(BLOCK_NONCE_SIZE)
+        return nonce + self._aead.encrypt(nonce, plaintext, associated_data or None)
+
+    def decrypt_block(self, ciphertext: bytes, associated_data: bytes = b"") -> bytes:
+        """Decrypts a block produced by `encrypt_block`, raising InvalidToken on failure."""
+        nonce, body = ciphertext[:BLOCK_NONCE_SIZE], ciphertext[BLOCK_NONCE_SIZE:]
+        try:
+            return self._aead.decrypt(nonce, body, associated_data or None)
+        except InvalidTag:
+            log.warning("Block decryption failed: Invalid tag or key.")
+            raise InvalidToken
@@ -0,0 +1,175 @@
+import logging
+import time
+from array import array
+from collections.abc import Callable, Sequence
+
+from telemetry_sink.services.metrics import SinkMetrics
+
+log = logging.getLogger(__name__)
+
+RECORD_ID_BYTES = 16
+
+_FINGERPRINT_MASK = 2**64 - 1
+
+
+def _fingerprint(record_id: bytes) -> int:
+    # 0 marks an empty slot, so it is never a fingerprint.
+    return hash(record_id) & _FINGERPRINT_MASK or 1
+
+
+class DedupCache:
+    """
+    A memory-bounded, time-windowed set of recently accepted record IDs.
+
+    IDs are kept as 64-bit fingerprints in two generations of fixed-size
+    open-addressing tables (`array`s of 8-byte slots, at most half full):
+    new IDs go into the current generation, lookups check both, and every
+    `window_seconds` the previous generation is dropped and the current one
+    takes its place. An ID is therefore remembered for at least
+    `window_seconds` and memory is fixed at construction, 16 to 32 bytes per
+    ID of `max_ids`, however many IDs arrive.
+
+    If a generation fills up before its window is over, it is rotated early
+    so memory stays bounded; IDs are then remembered for less than the window
+    (counted in `early_rotations`; raise `max_ids` if that happens).
+
+    Fingerprints use the process's hash of the ID, so two different IDs are
+    mistaken for one another with a probability of about n² / 2⁶⁵ for n
+    tracked IDs. Not thread-safe; it is used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 600.0,
+        max_ids: int = 1_000_000,
+        metrics: SinkMetrics | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            window_seconds: How long an accepted ID is remembered at least.
+            max_ids: How many IDs are remembered at most, over both generations.
+            metrics: The metrics registry to report to; a private one if None.
+            clock: The monotonic clock generations are rotated by.
+        """
+        if window_seconds <= 0:
+            raise ValueError("'window_seconds' must be a positive value.")
+        if max_ids < 2:
+            raise ValueError("'max_ids' must be at least 2.")
+        self.window_seconds = window_seconds
+        self.max_ids = max_ids
+        self._generation_capacity = max_ids // 2
+        # A power of two at least twice the capacity, so probe sequences stay short.
+        self._slots = 1 << (2 * self._generation_capacity - 1).bit_length()
+        self._mask = self._slots - 1
+        self._clock = clock
+
+        self._current = self._new_table()
+        self._previous = self._new_table()
+        self._current_count = 0
+        self._previous_count = 0
+        self._rotated_at = clock()
+        self.early_rotations = 0
+
+        self.metrics = metrics or SinkMetrics()
+        self.metrics.dedup_tracked_ids.set_function(lambda: self.tracked)
+
+    @property
+    def tracked(self) -> int:
+        """The number of IDs currently remembered."""
+        return self._current_count + self._previous_count
+
+    @property
+    def memory_bytes(self) -> int:
+        return 2 * self._slots * self._current.itemsize
+
+    def _new_table(self) -> array:
+        return array("Q", bytes(8 * self._slots))
+
+    def _rotate(self):
+        self._previous, self._previous_count = self._current, self._current_count
+        self._current, self._current_count = self._new_table(), 0
+
+    def _expire(self):
+        now = self._clock()
+        elapsed = now - self._rotated_at
+        if elapsed < self.window_seconds:
+            return
+        self._rotate()
+        if elapsed >= 2 * self.window_seconds:
+            # Idle for more than two windows: the previous generation has expired too.
+            self._rotate()
+        self._rotated_at = now
+
+    def seen(self, record_id: bytes) -> bool:
+        """Returns True if `record_id` was remembered within the window."""
+        self._expire()
+        return self._contains(_fingerprint(record_id))
+
+    def _contains(self, fingerprint: int) -> bool:
+        mask = self._mask
+        # Linear probing, inlined: this runs once per reading that carries an ID.
+        for table in (self._current, self._previous):
+            index = fingerprint & mask
+            slot = table[index]
+            while slot:
+                if slot == fingerprint:
+                    return True
+                index = (index + 1) & mask
+                slot = table[index]
+        return False
+
+    def unseen(self, record_ids: Sequence[bytes | None]) -> list[int]:
+        """
+        Returns the positions of the IDs in `record_ids` that are not replays.
+
+        An ID is a replay if it was remembered within the window or appears
+        earlier in `record_ids`; a None ID never is.
+        """
+        self._expire()
+        contains = self._contains
+        batch = set()
+        positions = []
+        for position, record_id in enumerate(record_ids):
+            if record_id is not None:
+                fingerprint = _fingerprint(record_id)
+                if fingerprint in batch or contains(fingerprint):
+                    continue
+                batch.add(fingerprint)
+            positions.append(position)
+        return positions
+
+    def remember(self, record_id: bytes):
+        """Remembers an accepted `record_id` for at least the window."""
+        self._expire()
+        self._insert(_fingerprint(record_id))
+
+    def remember_all(self, record_ids: Sequence[bytes]):
+        """Remembers several accepted record IDs for at least the window."""
+        self._expire()
+        insert = self._insert
+        for record_id in record_ids:
+            insert(_fingerprint(record_id))
+
+    def _insert(self, fingerprint: int):
+        if self._current_count >= self._generation_capacity:
+            self._rotate()
+            self._rotated_at = self._clock()
+            self.early_rotations += 1
+            self.metrics.dedup_early_rotations.inc()
+            log.warning(
+                f"Dedup cache filled {self._generation_capacity} IDs in less than {self.window_seconds}s; "
+                f"replays older than that are no longer detected. Consider raising 'max_ids'."
+            )
+
+        mask = self._mask
+        table = self._current
+        index = fingerprint & mask
+        slot = table[index]
+        while slot:
+            if slot == fingerprint:
+                return
+            index = (index + 1) & mask
+            slot = table[index]
+        table[index] = fingerprint
+        self._current_count += 1
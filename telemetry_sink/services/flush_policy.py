@@ -0,0 +1,109 @@
+"""
+Strategies deciding when the buffer is flushed to the log writer.
+
+The `BufferManager` asks its policy for a flush delay once, when the first
+reading arrives in an empty buffer, and arms a single timer for it; the
+timer is cancelled when the buffer is drained. An idle sink therefore never
+wakes up to flush. Independently of the policy, a buffer that reaches its
+`max_size_bytes` is flushed right away.
+
+The `LogWriter` reports how long each drained batch took to be committed,
+so a policy can account for the write path when it picks a delay.
+"""
+
+import logging
+from abc import ABC, abstractmethod
+
+log = logging.getLogger(__name__)
+
+FLUSH_POLICIES = ("fixed", "adaptive")
+
+
+class FlushPolicy(ABC):
+    """Decides how long buffered readings may wait before they are flushed."""
+
+    @abstractmethod
+    def flush_delay(self) -> float:
+        """
+        Returns how many seconds after the first reading of a batch the buffer is flushed.
+
+        Called once per batch, when a reading arrives in an empty buffer; 0
+        flushes right away.
+        """
+        pass
+
+    def record_drain(self, count: int, now: float):
+        """Called when the writer drains a batch of `count` readings, at monotonic time `now`."""
+        pass
+
+    def record_commit(self, count: int, seconds: float):
+        """Called when a drained batch of `count` readings was written, `seconds` after it was drained."""
+        pass
+
+
+class FixedIntervalFlushPolicy(FlushPolicy):
+    """Flushes `interval` seconds after the first reading of a batch, whatever the load."""
+
+    def __init__(self, interval: float):
+        if interval < 0:
+            raise ValueError("'interval' must not be negative.")
+        self.interval = interval
+
+    def flush_delay(self) -> float:
+        return self.interval
+
+
+class AdaptiveFlushPolicy(FlushPolicy):
+    """
+    Picks each batch's flush delay from the arrival rate and a target write latency.
+
+    A reading should be committed within `target_latency` seconds of arriving.
+    The time a drained batch takes to be committed is tracked, and whatever
+    is left of the target is the budget a batch may wait to collect more
+    readings:
+
+    - Under load many readings arrive within the budget, so the buffer waits
+      for all of it and batches grow with the arrival rate (up to the
+      buffer's `max_size_bytes`).
+    - When traffic is light, fewer than one further reading is expected
+      within the budget; waiting would only add latency, so the batch is
+      flushed right away.
+
+    Rates and write times are exponential moving averages, updated once per
+    batch rather than per reading.
+    """
+
+    # Smoothing factor of the moving averages.
+    _ALPHA = 0.3
+
+    def __init__(self, target_latency: float = 0.05, max_delay: float = 1.0):
+        """
+        Args:
+            target_latency: Seconds within which an accepted reading should be committed.
+            max_delay: Upper bound of any flush delay, whatever the target.
+        """
+        if target_latency <= 0:
+            raise ValueError("'target_latency' must be a positive value.")
+        self.target_latency = target_latency
+        self.max_delay = max_delay
+        # Readings per second arriving in the buffer.
+        self.arrival_rate = 0.0
+        # Seconds from draining a batch until it is committed.
+        self.commit_seconds = 0.0
+        self._last_drain_at = None
+
+    def flush_delay(self) -> float:
+        budget = min(self.target_latency - self.commit_seconds, self.max_delay)
+        if budget <= 0 or self.arrival_rate * budget < 1.0:
+            return 0.0
+        return budget
+
+    def record_drain(self, count: int, now: float):
+        # A batch holds the readings that arrived since the previous drain.
+        if self._last_drain_at is not None and now > self._last_drain_at:
+            rate = count / (now - self._last_drain_at)
+            self.arrival_rate += self._ALPHA * (rate - self.arrival_rate)
+        self._last_drain_at = now
+
+    def record_commit(self, count: int, seconds: float):
+        self.commit_seconds += self._ALPHA * (seconds - self.commit_seconds)
@@ -0,0 +1,186 @@
+"""
+On-disk format of the sink's encrypted log.
+
+Two record formats can appear in a log file, and may be mixed in one file:
+
+- ``legacy``: one Fernet token per record, terminated by a newline.
+- ``block`` (version 1): a framed block holding many records. Each frame is
+
+      magic (4s) | version (B) | flags (B) | record_count (I) | payload_length (I) | payload
+
+  where ``payload`` is ``CryptoService.encrypt_block`` applied to the
+  newline-joined JSON records (zlib-compressed first if ``FLAG_ZLIB`` is set),
+  with the 14-byte header passed as associated data so it is authenticated too.
+
+Fernet tokens always start with ``gAAAAA``, so a frame can never be mistaken
+for a legacy line.
+
+A record is a JSON object with at least ``name``, ``value`` and a
+timestamp. The writer serializes readings as ``{"name", "value",
+"timestamp_us"}``, the timestamp as integer microseconds since the epoch;
+readers format it when they return records. Readings ingested in
+passthrough mode are stored as the client sent them when they hold nothing
+but those fields and the reading's ``id``, so a record may also carry ``id``
+and differ in whitespace and key order. Records written by older versions
+carry ``timestamp`` instead (ISO 8601, or epoch seconds or milliseconds).
+"""
+
+import codecs
+import functools
+import json
+import struct
+import zlib
+from dataclasses import dataclass
+
+from telemetry_sink.services.crypto_service import BLOCK_NONCE_SIZE, CryptoService
+
+BLOCK_MAGIC = b"TSB1"
+BLOCK_VERSION = 1
+
+# Flag bits of the block header.
+FLAG_ZLIB = 0x01
+
+BLOCK_HEADER = struct.Struct(">4sBBII")
+
+# Size of the AES-GCM authentication tag appended to every block payload.
+BLOCK_TAG_SIZE = 16
+
+RECORD_FORMATS = ("block", "legacy")
+COMPRESSION_CODECS = ("zlib", "none")
+
+
+class LogFormatError(Exception):
+    """Raised when a log file contains a malformed or unsupported frame."""
+
+    pass
+
+
+@dataclass(frozen=True)
+class BlockHeader:
+    version: int
+    flags: int
+    record_count: int
+    payload_length: int
+
+    def pack(self) -> bytes:
+        return BLOCK_HEADER.pack(BLOCK_MAGIC, self.version, self.flags, self.record_count, self.payload_length)
+
+    @classmethod
+    def unpack(cls, raw: bytes) -> "BlockHeader":
+        """Parses a header, raising LogFormatError if it is not a supported block frame."""
+        magic, version, flags, record_count, payload_length = BLOCK_HEADER.unpack(raw)
+        if magic != BLOCK_MAGIC:
+            raise LogFormatError(f"Bad block magic {magic!r}")
+        if version != BLOCK_VERSION:
+            raise LogFormatError(f"Unsupported block version {version}")
+        return cls(version=version, flags=flags, record_count=record_count, payload_length=payload_length)
+
+
+@dataclass(frozen=True)
+class EncodedSlice:
+    """A slice of a batch in its on-disk form, with the metadata needed to describe it."""
+
+    chunks: list[bytes]
+    record_count: int
+    # Epoch microseconds of the slice's earliest and latest reading.
+    first_timestamp_us: int
+    last_timestamp_us: int
+    sensor_names: frozenset[str]
+
+
+_RECORD = b'{"name": %b, "value": %d, "timestamp_us": %d}'
+
+
+@functools.lru_cache(maxsize=65536)
+def _encoded_name(name: str) -> bytes:
+    return json.dumps(name).encode("utf-8")
+
+
+def serialize_record(name: str, value: int, timestamp_us: int) -> bytes:
+    """Serializes a reading as a log record: the same bytes as json.dumps, without building a dict."""
+    return _RECORD % (_encoded_name(name), value, timestamp_us)
+
+
+# The fields a passthrough record may hold: the ones the sink validates, with the timestamp in the form it writes.
+_PASSTHROUGH_FIELDS = frozenset(("name", "value", "timestamp_us", "id"))
+
+
+def passthrough_record(payload: bytes, reading: dict | None = None) -> bytes | None:
+    """
+    Returns a validated JSON reading in the form it is stored as a log record, or None if it cannot be stored as is.
+
+    Only a body holding nothing but a string `name`, integer `value` and
+    `timestamp_us` and optionally an `id` string is stored as is. Readings
+    with further keys, an older `timestamp` form or values the validator
+    coerced (e.g. a numeric string) are left to be serialized again, so the
+    log never holds client-supplied extras.
+
+    Records are newline-separated UTF-8: a body in another encoding (or with a
+    byte order mark) is left to be serialized again, and line breaks, which
+    JSON only allows as whitespace, are blanked.
+
+    Args:
+        payload: The reading's JSON body, already validated.
+        reading: The body parsed with `json.loads`, if the caller has it; parsed here otherwise.
+    """
+    if b"\x00" in payload or payload.startswith(codecs.BOM_UTF8):
+        return None
+    if reading is None:
+        try:
+            reading = json.loads(payload)
+        except ValueError:
+            return None
+    if (
+        type(reading) is not dict
+        or not reading.keys() <= _PASSTHROUGH_FIELDS
+        or type(reading.get("name")) is not str
+        or type(reading.get("value")) is not int
+        or type(reading.get("timestamp_us")) is not int
+        or type(reading.get("id", "")) is not str
+    ):
+        return None
+    if b"\n" in payload:
+        payload = payload.replace(b"\n", b" ")
+    return payload
+
+
+def encode_block(records: list[bytes], crypto_service: CryptoService, compression: str = "zlib") -> bytes:
+    """
+    Frames, optionally compresses, and encrypts serialized records as one block.
+
+    Args:
+        records: Serialized JSON records, without trailing newlines.
+        crypto_service: The service holding the block key.
+        compression: "zlib" or "none".
+
+    Returns:
+        The complete frame (header and payload) ready to append to the log.
+    """
+    plaintext = b"\n".join(records)
+    flags = 0
+    if compression == "zlib":
+        plaintext = zlib.compress(plaintext)
+        flags |= FLAG_ZLIB
+
+    # The payload length is known up front: nonce + ciphertext (same length as plaintext) + 16-byte tag.
+    payload_length = BLOCK_NONCE_SIZE + len(plaintext) + BLOCK_TAG_SIZE
+    header = BlockHeader(
+        version=BLOCK_VERSION, flags=flags, record_count=len(records), payload_length=payload_length
+    ).pack()
+    payload = crypto_service.encrypt_block(plaintext, associated_data=header)
+    return header + payload
+
+
+def decode_block(header: BlockHeader, raw_header: bytes, payload: bytes, crypto_service: CryptoService) -> list[bytes]:
+    """
+    Decrypts and unpacks a block into its serialized records.
+
+    Raises:
+        InvalidToken: If the block fails authentication.
+    """
+    plaintext = crypto_service.decrypt_block(payload, associated_data=raw_header)
+    if header.flags & FLAG_ZLIB:
+        plaintext = zlib.decompress(plaintext)
+    if not plaintext:
+        return []
+    return plaintext.split(b"\n")
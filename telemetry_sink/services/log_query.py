@@ -0,0 +1,204 @@
+import glob
+import io
+import json
+import logging
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from pydantic import TypeAdapter
+
+from telemetry_sink.domain.sensor import from_epoch_us, to_epoch_us
+from telemetry_sink.services.crypto_service import CryptoService
+from telemetry_sink.services.log_format import LogFormatError
+from telemetry_sink.services.log_reader import LogReader
+from telemetry_sink.services.log_segment import INDEX_SUFFIX, MANIFEST_SUFFIX, list_worker_logs
+
+log = logging.getLogger(__name__)
+
+# Per-process crypto service for the decrypt workers, created once by the pool initializer.
+_worker_crypto: CryptoService | None = None
+
+
+def _init_worker(key: str):
+    global _worker_crypto
+    _worker_crypto = CryptoService(key)
+
+
+def _decrypt_ranges(
+    file_path: str, ranges: list[tuple[int, int]], start_us: int, end_us: int, names: set[str] | None
+) -> list[tuple[int, dict]]:
+    """
+    Reads, decrypts and filters a list of byte ranges of one segment. Runs in a worker process.
+
+    Returns the matching records with their timestamp in epoch microseconds, for sorting.
+    """
+    reader = LogReader(file_path, _worker_crypto)
+    matches = []
+    with open(file_path, "rb") as f:
+        for offset, length in ranges:
+            f.seek(offset)
+            data = f.read(length) if length >= 0 else f.read()
+            try:
+                for raw in reader.iter_stream(io.BytesIO(data)):
+                    record = json.loads(raw)
+                    if names is not None and record["name"] not in names:
+                        continue
+                    timestamp_us = record.pop("timestamp_us", None)
+                    if timestamp_us is None:
+                        # Written by an older version.
+                        timestamp_us = to_epoch_us(_parse_timestamp(record["timestamp"]))
+                    if start_us <= timestamp_us <= end_us:
+                        # Timestamps are only formatted here, on the way out.
+                        record["timestamp"] = from_epoch_us(timestamp_us).isoformat()
+                        matches.append((timestamp_us, record))
+            except LogFormatError as e:
+                if length >= 0:
+                    raise
+                # The end of a segment past its index may hold a block that is still
+                # being written, or one torn by a crash.
+                log.warning(f"Skipping the unreadable end of {file_path} after offset {offset}: {e}")
+    return matches
+
+
+# Parses timestamps the way the HTTP adapter validated them on ingest.
+_TIMESTAMP_ADAPTER = TypeAdapter(datetime)
+
+
+def _parse_timestamp(value: str | int | float) -> datetime:
+    """Parses an older record's `timestamp`: ISO 8601, or epoch seconds or milliseconds."""
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        timestamp = _TIMESTAMP_ADAPTER.validate_python(value)
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=UTC)
+
+
+@dataclass(frozen=True)
+class _Segment:
+    path: str
+    # Whether the segment's index covers every block; if not, the whole segment is scanned.
+    indexed: bool
+    first_us: int | None = None
+    last_us: int | None = None
+
+
+class LogQuery:
+    """
+    Time-range queries over the sink's encrypted log segments.
+
+    Segments are pruned by their manifest's timestamp range, and blocks by
+    the sparse `.idx` index written by `SegmentedLogFile`. Only the matching
+    byte ranges are read and decrypted, spread over a pool of worker
+    processes. Segments without a complete index are scanned in full, and
+    so are the byte ranges an index does not cover: the start of a file
+    written before it had an index, and blocks whose index line was lost
+    in a crash.
+    """
+
+    def __init__(self, file_path: str, key: str, workers: int = 0, ranges_per_task: int = 16):
+        """
+        Args:
+            file_path: The configured log `file_path` (the active segment).
+            key: The sink's encryption key.
+            workers: Number of decrypt worker processes; 0 uses one per CPU.
+            ranges_per_task: How many index blocks one worker task decrypts.
+        """
+        self.file_path = file_path
+        self.key = key
+        self.workers = workers or os.cpu_count() or 1
+        self.ranges_per_task = ranges_per_task
+
+    def _segments(self) -> list[_Segment]:
+        """
+        Lists the sealed segments in sequence order, followed by the active ones.
+
+        In multi-process mode every worker has its own active segment (and
+        sealed segments) under the same base path; all of them are included.
+        """
+        manifests = []
+        for manifest_path in glob.glob(glob.escape(self.file_path) + ".*" + MANIFEST_SUFFIX):
+            with open(manifest_path, "rb") as f:
+                manifests.append(json.load(f))
+        manifests.sort(key=lambda m: m["sequence"])
+
+        segments = []
+        directory = os.path.dirname(self.file_path)
+        for manifest in manifests:
+            first, last = manifest.get("first_timestamp"), manifest.get("last_timestamp")
+            segments.append(
+                _Segment(
+                    path=os.path.join(directory, manifest["segment"]),
+                    indexed=manifest.get("index_complete", False),
+                    first_us=to_epoch_us(_parse_timestamp(first)) if first else None,
+                    last_us=to_epoch_us(_parse_timestamp(last)) if last else None,
+                )
+            )
+        for path in [self.file_path, *list_worker_logs(self.file_path)]:
+            if os.path.exists(path):
+                segments.append(_Segment(path=path, indexed=os.path.exists(path + INDEX_SUFFIX)))
+        return segments
+
+    @staticmethod
+    def _matching_ranges(
+        segment: _Segment, start_us: int, end_us: int, names: set[str] | None
+    ) -> list[tuple[int, int]]:
+        if not segment.indexed:
+            return [(0, -1)]
+
+        ranges = []
+        # End of the bytes covered so far; anything the index skips is scanned.
+        covered = 0
+        with open(segment.path + INDEX_SUFFIX, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The active index may end in a partially written line.
+                    continue
+                if entry["offset"] > covered:
+                    ranges.append((covered, entry["offset"] - covered))
+                covered = max(covered, entry["offset"] + entry["length"])
+                if entry["max_ts"] < start_us or entry["min_ts"] > end_us:
+                    continue
+                if names is not None and names.isdisjoint(entry["names"]):
+                    continue
+                ranges.append((entry["offset"], entry["length"]))
+        if os.path.getsize(segment.path) > covered:
+            ranges.append((covered, -1))
+        return ranges
+
+    def query(self, start: datetime, end: datetime, sensor_names: Iterable[str] | None = None) -> list[dict]:
+        """
+        Returns all records with `start <= timestamp <= end`, optionally only for the given sensors.
+
+        Naive datetimes are taken as UTC. Records are returned sorted by timestamp.
+        """
+        start_us = to_epoch_us(start)
+        end_us = to_epoch_us(end)
+        names = set(sensor_names) if sensor_names else None
+
+        tasks = []
+        for segment in self._segments():
+            if segment.first_us is not None and (segment.last_us < start_us or segment.first_us > end_us):
+                continue
+            ranges = self._matching_ranges(segment, start_us, end_us, names)
+            for i in range(0, len(ranges), self.ranges_per_task):
+                tasks.append((segment.path, ranges[i : i + self.ranges_per_task], start_us, end_us, names))
+
+        log.info(f"Query touches {len(tasks)} decrypt tasks.")
+        if len(tasks) <= 1 or self.workers <= 1:
+            # Not worth starting worker processes for.
+            _init_worker(self.key)
+            results = [_decrypt_ranges(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(tasks)), initializer=_init_worker, initargs=(self.key,)
+            ) as pool:
+                results = list(pool.map(_decrypt_ranges, *zip(*tasks)))
+
+        matches = [match for part in results for match in part]
+        matches.sort(key=lambda match: match[0])
+        return [record for _, record in matches]
@@ -0,0 +1,66 @@
+import json
+import logging
+from collections.abc import Iterator
+from typing import BinaryIO
+
+from telemetry_sink.services.crypto_service import CryptoService
+from telemetry_sink.services.log_format import (
+    BLOCK_HEADER,
+    BLOCK_MAGIC,
+    BlockHeader,
+    LogFormatError,
+    decode_block,
+)
+
+log = logging.getLogger(__name__)
+
+
+class LogReader:
+    """
+    A streaming reader for the sink's encrypted log files.
+
+    Understands both block frames and legacy line-per-token records, in any
+    mix, and only holds one block or line in memory at a time.
+    """
+
+    def __init__(self, file_path: str, crypto_service: CryptoService):
+        self.file_path = file_path
+        self.crypto_service = crypto_service
+
+    def iter_raw_records(self) -> Iterator[bytes]:
+        """Yields every serialized JSON record in the file, in write order."""
+        with open(self.file_path, "rb") as f:
+            yield from self.iter_stream(f)
+
+    def iter_records(self) -> Iterator[dict]:
+        """Yields every record in the file as a dictionary, in write order."""
+        for raw in self.iter_raw_records():
+            yield json.loads(raw)
+
+    def iter_stream(self, f: BinaryIO) -> Iterator[bytes]:
+        """Yields every serialized JSON record from a stream positioned at a record boundary."""
+        while True:
+            head = f.read(len(BLOCK_MAGIC))
+            if not head:
+                return
+
+            if head == BLOCK_MAGIC:
+                yield from self._read_block(f, head)
+                continue
+
+            # Anything else is a legacy Fernet token running to the end of the line.
+            line = (head + f.readline()).rstrip(b"\r\n")
+            if line:
+                yield self.crypto_service.decrypt(line)
+
+    def _read_block(self, f: BinaryIO, magic: bytes) -> list[bytes]:
+        raw_header = magic + f.read(BLOCK_HEADER.size - len(magic))
+        if len(raw_header) != BLOCK_HEADER.size:
+            raise LogFormatError(f"Truncated block header in {self.file_path}")
+
+        header = BlockHeader.unpack(raw_header)
+        payload = f.read(header.payload_length)
+        if len(payload) != header.payload_length:
+            raise LogFormatError(f"Truncated block payload in {self.file_path}")
+
+        return decode_block(header, raw_header, payload, self.crypto_service)
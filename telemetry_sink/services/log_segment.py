@@ -0,0 +1,268 @@
+import glob
+import json
+import logging
+import os
+import re
+import time
+from datetime import UTC, datetime
+
+from telemetry_sink.domain.sensor import from_epoch_us
+from telemetry_sink.services.log_format import EncodedSlice
+
+log = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".manifest.json"
+INDEX_SUFFIX = ".idx"
+
+
+def worker_log_path(file_path: str, worker_id: int) -> str:
+    """The active segment path of one worker process in multi-process mode."""
+    return f"{file_path}.worker-{worker_id}"
+
+
+def list_worker_logs(file_path: str) -> list[str]:
+    """Lists the active segments of all worker processes writing under `file_path`."""
+    pattern = re.compile(re.escape(os.path.basename(file_path)) + r"\.worker-\d+")
+    return sorted(
+        path for path in glob.glob(glob.escape(file_path) + ".worker-*") if pattern.fullmatch(os.path.basename(path))
+    )
+
+
+def _write_all(fd: int, chunks: list[bytes]):
+    """Writes all chunks to a file descriptor, using vectored writes where the platform supports them."""
+    if not hasattr(os, "writev"):
+        data = memoryview(b"".join(chunks))
+        while data:
+            data = data[os.write(fd, data) :]
+        return
+
+    # POSIX guarantees IOV_MAX is at least 1024.
+    iov_max = 1024
+    for start in range(0, len(chunks), iov_max):
+        pending = chunks[start : start + iov_max]
+        while pending:
+            written = os.writev(fd, pending)
+            # Drop the fully written buffers and trim a partially written one.
+            while pending and written >= len(pending[0]):
+                written -= len(pending[0])
+                pending = pending[1:]
+            if pending and written:
+                pending = [pending[0][written:], *pending[1:]]
+
+
+def _isoformat(timestamp_us: int | None) -> str | None:
+    return from_epoch_us(timestamp_us).isoformat() if timestamp_us is not None else None
+
+
+class SegmentedLogFile:
+    """
+    An append-only log file that keeps its handle open and rolls over into segments.
+
+    The active segment is always written at `file_path`. When it grows past
+    `max_bytes` or gets older than `max_age` seconds it is closed, renamed to
+    `<file_path>.<sequence>` and gets a `<segment>.manifest.json` next to it
+    describing its contents. With both thresholds at 0 the file never rotates.
+
+    Every appended slice also gets one line in a sparse index
+    (`<segment>.idx`, NDJSON) holding its byte offset and length, its
+    min/max timestamp in epoch microseconds and the sensor names it
+    contains, so readers can seek straight to the blocks they need. An index
+    only covers the blocks appended while it was kept: a file written before
+    it had an index, or a block whose index line was lost in a crash, is
+    read from the gaps between its entries (see `LogQuery`).
+
+    An append that fails is truncated away, so the segment never holds a
+    torn block.
+
+    With `fsync` enabled, `sync` forces the active segment and its index to
+    disk, segments are fsynced before they are sealed, and newly created
+    files are made durable in their directory.
+
+    This class does blocking I/O and is meant to be driven from a single I/O thread.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        max_bytes: int = 0,
+        max_age: float = 0.0,
+        record_format: str = "block",
+        fsync: bool = False,
+    ):
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.record_format = record_format
+        self.fsync = fsync
+
+        self._file = None
+        self._index_file = None
+        self._opened_at = 0.0
+        self._opened_at_wall: datetime | None = None
+        self._record_count = 0
+        self._first_timestamp_us: int | None = None
+        self._last_timestamp_us: int | None = None
+
+        self._sequence, self._base_offset = self._scan_sealed_segments()
+
+    @property
+    def rotation_enabled(self) -> bool:
+        return self.max_bytes > 0 or self.max_age > 0
+
+    @property
+    def index_path(self) -> str:
+        return self.file_path + INDEX_SUFFIX
+
+    def _segment_path(self, sequence: int) -> str:
+        return f"{self.file_path}.{sequence:06d}"
+
+    def _scan_sealed_segments(self) -> tuple[int, int]:
+        """Returns the last used sequence number and the logical end offset of the last sealed segment."""
+        last_sequence, end_offset = 0, 0
+        # Only this file's own segments, not those of workers writing under the same base path.
+        own_segment = re.compile(re.escape(os.path.basename(self.file_path)) + r"\.\d+" + re.escape(MANIFEST_SUFFIX))
+        for manifest_path in glob.glob(glob.escape(self.file_path) + ".*" + MANIFEST_SUFFIX):
+            if not own_segment.fullmatch(os.path.basename(manifest_path)):
+                continue
+            try:
+                with open(manifest_path, "rb") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning(f"Ignoring unreadable segment manifest {manifest_path}: {e}")
+                continue
+            if manifest.get("sequence", 0) > last_sequence:
+                last_sequence = manifest["sequence"]
+                end_offset = manifest["byte_range"][1]
+        return last_sequence, end_offset
+
+    def _open(self):
+        created = not os.path.exists(self.file_path)
+        self._file = open(self.file_path, "ab", buffering=0)
+        self._index_file = open(self.index_path, "ab", buffering=0)
+        if created and self.fsync:
+            self._sync_directory()
+        self._opened_at = time.monotonic()
+        self._opened_at_wall = datetime.now(UTC)
+        self._record_count = 0
+        self._first_timestamp_us = None
+        self._last_timestamp_us = None
+
+        if self._file.tell() > 0 and self.rotation_enabled:
+            # Left over from a run that did not shut down cleanly; its contents are not
+            # tracked, so seal it as-is and start a fresh segment.
+            log.warning(f"Sealing leftover active segment {self.file_path} with unknown contents.")
+            self._seal(recovered=True)
+            self._open()
+
+    def append(self, encoded: EncodedSlice):
+        """Appends an encoded slice to the active segment, rotating afterwards if a threshold was reached."""
+        if self._file is None:
+            self._open()
+
+        offset = self._file.tell()
+        index_offset = self._index_file.tell()
+        try:
+            _write_all(self._file.fileno(), encoded.chunks)
+            index_entry = {
+                "offset": offset,
+                "length": self._file.tell() - offset,
+                "count": encoded.record_count,
+                "min_ts": encoded.first_timestamp_us,
+                "max_ts": encoded.last_timestamp_us,
+                "names": sorted(encoded.sensor_names),
+            }
+            _write_all(
+                self._index_file.fileno(), [json.dumps(index_entry, separators=(",", ":")).encode("utf-8") + b"\n"]
+            )
+        except OSError:
+            # Don't leave a torn block (or an index line for it) for the next append to follow:
+            # readers scan blocks in sequence.
+            for f, end in ((self._file, offset), (self._index_file, index_offset)):
+                f.truncate(end)
+                f.seek(end)
+            raise
+
+        self._record_count += encoded.record_count
+        if self._first_timestamp_us is None or encoded.first_timestamp_us < self._first_timestamp_us:
+            self._first_timestamp_us = encoded.first_timestamp_us
+        if self._last_timestamp_us is None or encoded.last_timestamp_us > self._last_timestamp_us:
+            self._last_timestamp_us = encoded.last_timestamp_us
+
+        if self._should_rotate():
+            self._seal()
+
+    def sync(self):
+        """Forces everything appended to the active segment and its index so far to disk."""
+        if self._file is None:
+            return
+        for f in (self._file, self._index_file):
+            if hasattr(os, "fdatasync"):
+                # The file's size is data too, so fdatasync covers appends.
+                os.fdatasync(f.fileno())
+            else:
+                os.fsync(f.fileno())
+
+    def _sync_directory(self):
+        """Makes file creations and renames in the log directory durable."""
+        fd = os.open(os.path.dirname(os.path.abspath(self.file_path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes > 0 and self._file.tell() >= self.max_bytes:
+            return True
+        return self.max_age > 0 and time.monotonic() - self._opened_at >= self.max_age
+
+    def _seal(self, recovered: bool = False):
+        """Closes the active segment, renames it into the sequence and writes its manifest."""
+        size_bytes = self._file.tell()
+        if self.fsync:
+            self.sync()
+        self._file.close()
+        self._file = None
+        self._index_file.close()
+        self._index_file = None
+
+        self._sequence += 1
+        segment_path = self._segment_path(self._sequence)
+        os.replace(self.file_path, segment_path)
+        os.replace(self.index_path, segment_path + INDEX_SUFFIX)
+
+        manifest = {
+            "segment": os.path.basename(segment_path),
+            "sequence": self._sequence,
+            "record_format": self.record_format,
+            "record_count": None if recovered else self._record_count,
+            "first_timestamp": _isoformat(self._first_timestamp_us),
+            "last_timestamp": _isoformat(self._last_timestamp_us),
+            "byte_range": [self._base_offset, self._base_offset + size_bytes],
+            "size_bytes": size_bytes,
+            "index": os.path.basename(segment_path + INDEX_SUFFIX),
+            # Blocks written before a crash may be missing from a recovered segment's index.
+            "index_complete": not recovered,
+            "opened_at": None if recovered else self._opened_at_wall.isoformat(),
+            "closed_at": datetime.now(UTC).isoformat(),
+        }
+        tmp_path = segment_path + MANIFEST_SUFFIX + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, segment_path + MANIFEST_SUFFIX)
+        if self.fsync:
+            self._sync_directory()
+
+        self._base_offset += size_bytes
+        log.info(f"Sealed log segment {segment_path} ({size_bytes} bytes, {self._record_count} records).")
+
+    def close(self):
+        """Closes the active segment, sealing it if rotation is enabled and it holds any data."""
+        if self._file is None:
+            return
+        if self.rotation_enabled and self._file.tell() > 0:
+            self._seal()
+        else:
+            self._file.close()
+            self._file = None
+            self._index_file.close()
+            self._index_file = None
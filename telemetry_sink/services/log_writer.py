@@ -1,58 +1,294 @@
 import asyncio
-import json
 import logging
-from datetime import datetime
-from typing import List
-
-import aiofiles
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from telemetry_sink.services.buffer_manager import BufferManager
 from telemetry_sink.services.crypto_service import CryptoService
-from telemetry_sink.domain.sensor import SensorData
+from telemetry_sink.services.log_format import (
+    COMPRESSION_CODECS,
+    RECORD_FORMATS,
+    EncodedSlice,
+    encode_block,
+    serialize_record,
+)
+from telemetry_sink.services.log_segment import SegmentedLogFile
+from telemetry_sink.services.metrics import SinkMetrics
+from telemetry_sink.services.spill_journal import JournalMark
+from telemetry_sink.domain.sensor import SensorDataBatch
 
 log = logging.getLogger(__name__)
 
 
+def _fail_commit(commit: asyncio.Future | None, error: Exception):
+    if commit is not None and not commit.done():
+        commit.set_exception(error)
+
+
 class LogWriter:
     """
     A background service that writes buffered messages to an encrypted log file.
+
+    Writing is pipelined: each batch is serialized and encrypted in a worker
+    thread pool, split into slices so large batches are encrypted in parallel.
+    In the default "block" record format every slice becomes one framed,
+    optionally compressed block (see `log_format`); the "legacy" format writes
+    one Fernet token per record.
+    The resulting records are then appended with vectored writes on a
+    dedicated I/O thread, while the run loop goes back to collecting the
+    next batch. The log file stays open across flushes and rolls over into
+    segments by size or age (see `SegmentedLogFile`).
+
+    Under the buffer's "written" and "fsynced" durability levels, the
+    commit future of each drained batch is resolved once the batch has been
+    written (and, for "fsynced", fdatasync'ed). One sync covers every request
+    waiting on that batch, i.e. commits are grouped per flush.
+
+    With a spill journal behind the buffer, every written batch checkpoints
+    it, `recover` writes what a previous run left in it before any new
+    traffic is accepted, and the final write on shutdown is bounded by
+    `shutdown_timeout`: whatever misses the deadline stays in the journal.
+    A batch whose write fails is written again ahead of the next one, and
+    the journal is only checkpointed once nothing before the mark is left
+    unwritten. A batch that fails to encode cannot be written again; the
+    journal is then no longer checkpointed for the rest of the run, so it
+    keeps that batch for `recover` on the next start.
     """
 
-    def __init__(self, buffer_manager: BufferManager, crypto_service: CryptoService, file_path: str):
+    def __init__(
+        self,
+        buffer_manager: BufferManager,
+        crypto_service: CryptoService,
+        file_path: str,
+        encode_workers: int = 2,
+        encode_slice_size: int = 1000,
+        record_format: str = "block",
+        compression: str = "zlib",
+        segment_max_bytes: int = 0,
+        segment_max_age: float = 0.0,
+        metrics: SinkMetrics | None = None,
+        shutdown_timeout: float | None = None,
+    ):
+        if record_format not in RECORD_FORMATS:
+            raise ValueError(f"Unsupported record format: {record_format}. Expected one of {RECORD_FORMATS}.")
+        if compression not in COMPRESSION_CODECS:
+            raise ValueError(f"Unsupported compression: {compression}. Expected one of {COMPRESSION_CODECS}.")
+
         self.buffer_manager = buffer_manager
         self.crypto_service = crypto_service
         self.file_path = file_path
+        self.encode_slice_size = encode_slice_size
+        self.record_format = record_format
+        self.compression = compression
+        self.shutdown_timeout = shutdown_timeout
         self._stopped = False
+        # Encoded records whose write failed, with their record count and buffer bytes, to write again.
+        self._unwritten: list[tuple[list[EncodedSlice], int, int]] = []
+        # Set once a batch could not be encoded, to keep it in the spill journal.
+        self._journal_held = False
+        self.metrics = metrics or buffer_manager.metrics
+
+        self._encode_executor = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="log-encode")
+        # A single I/O thread keeps the batches in order on disk.
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-write")
+        self._write_task: asyncio.Task | None = None
+        self._fsync = buffer_manager.durability == "fsynced"
+        self._log_file = SegmentedLogFile(
+            file_path,
+            max_bytes=segment_max_bytes,
+            max_age=segment_max_age,
+            record_format=record_format,
+            fsync=self._fsync,
+        )
+
+    def _encode_slice(self, batch: SensorDataBatch) -> EncodedSlice:
+        """Serializes and encrypts a slice of a batch. Runs in a worker thread."""
+        if batch.payloads is None:
+            serialized = [serialize_record(name, value, timestamp_us) for name, value, timestamp_us in batch.iter_raw()]
+        else:
+            # Readings that arrived with a payload are stored as sent.
+            serialized = [
+                payload if payload is not None else serialize_record(name, value, timestamp_us)
+                for name, value, timestamp_us, payload in batch.iter_payloads()
+            ]
+        if self.record_format == "block":
+            chunks = [encode_block(serialized, self.crypto_service, self.compression)]
+        else:
+            chunks = [self.crypto_service.encrypt(plaintext) + b"\n" for plaintext in serialized]
 
-    def _default_json_serializer(self, obj):
-        """Custom serializer to handle datetime objects for JSON."""
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+        return EncodedSlice(
+            chunks=chunks,
+            record_count=len(batch),
+            first_timestamp_us=min(batch.timestamps),
+            last_timestamp_us=max(batch.timestamps),
+            sensor_names=batch.sensor_names(),
+        )
 
-    async def _write_batch_to_file(self, batch: List[SensorData]):
+    async def _encode_batch(self, batch: SensorDataBatch) -> list[EncodedSlice]:
+        """Serializes and encrypts a batch off the event loop, preserving record order."""
+        loop = asyncio.get_running_loop()
+        slices = [batch[i : i + self.encode_slice_size] for i in range(0, len(batch), self.encode_slice_size)]
+        return await asyncio.gather(
+            *(loop.run_in_executor(self._encode_executor, self._encode_slice, part) for part in slices)
+        )
+
+    def _append_records(self, records: list[EncodedSlice]):
+        """Appends encoded records to the log file. Runs on the I/O thread."""
+        for encoded in records:
+            self._log_file.append(encoded)
+        if self._fsync:
+            self._log_file.sync()
+
+    async def _write_records(
+        self,
+        records: list[EncodedSlice],
+        record_count: int,
+        size_bytes: int,
+        previous: asyncio.Task | None,
+        commit: asyncio.Future | None = None,
+        drained_at: float | None = None,
+        journal_mark: JournalMark | None = None,
+    ):
+        """
+        Writes encoded records once the previous write has finished, then releases their buffer bytes.
+
+        `commit` is resolved once the records are written (or fails with the write's error).
+        The time since `drained_at` (a `perf_counter` reading) is reported to the buffer's flush policy,
+        and the buffer's spill journal is checkpointed at `journal_mark`.
+
+        Records whose write failed are kept, with their buffer bytes, and written again ahead of
+        the next batch; the journal is not checkpointed past them until they are in the file.
+        """
+        if previous is not None:
+            await previous
+
+        retried = self._unwritten
+        self._unwritten = []
+        pending = [encoded for batch_records, _, _ in retried for encoded in batch_records] + records
+        pending_count = sum(count for _, count, _ in retried) + record_count
+        pending_bytes = sum(held for _, _, held in retried) + size_bytes
+
+        log.info(f"Writing a batch of {pending_count} messages to {self.file_path}")
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._write_executor, self._append_records, pending)
+        except Exception as e:
+            log.error(f"Failed to write batch to log file: {e}", exc_info=True)
+            self.metrics.write_errors.inc()
+            # Kept for the next write; their bytes stay held, so a failing disk pushes back on clients.
+            self._unwritten = [*retried, (records, record_count, size_bytes)]
+            _fail_commit(commit, e)
+            return
+
+        finished = time.perf_counter()
+        self.metrics.flush_duration.observe(finished - started)
+        if not self._journal_held:
+            self.buffer_manager.checkpoint(journal_mark)
+        if drained_at is not None:
+            self.buffer_manager.flush_policy.record_commit(record_count, finished - drained_at)
+        self.metrics.messages_written.inc(pending_count)
+        self.metrics.bytes_written.inc(sum(len(chunk) for encoded in pending for chunk in encoded.chunks))
+        if commit is not None and not commit.done():
+            commit.set_result(None)
+        self.buffer_manager.release(pending_bytes)
+
+    def _hold_journal(self):
+        """Stops checkpointing the spill journal, so a batch that failed to encode stays in it for `recover`."""
+        if self.buffer_manager.journal is None or self._journal_held:
+            return
+        self._journal_held = True
+        log.error(
+            f"Spill journal {self.buffer_manager.journal.path} is no longer checkpointed; "
+            f"the failed readings will be recovered from it on the next start."
+        )
+
+    async def _submit_batch(
+        self,
+        batch: SensorDataBatch,
+        size_bytes: int = 0,
+        commit: asyncio.Future | None = None,
+        journal_mark: JournalMark | None = None,
+    ):
+        """
+        Encodes a batch and queues its write behind any write still in progress.
+
+        Returns as soon as the batch is encoded, so the caller can collect the
+        next batch while this one is being written. `size_bytes` is released
+        back to the buffer, `commit` resolved and the spill journal
+        checkpointed at `journal_mark`, once the batch has been written.
+        """
+        started = time.perf_counter()
+        try:
+            records = await self._encode_batch(batch)
+        except Exception as e:
+            log.error(f"Failed to encode batch for log file: {e}", exc_info=True)
+            self.metrics.write_errors.inc()
+            self._hold_journal()
+            self.buffer_manager.release(size_bytes)
+            _fail_commit(commit, e)
+            return
+        self.metrics.encode_duration.observe(time.perf_counter() - started)
+
+        self._write_task = asyncio.create_task(
+            self._write_records(
+                records, len(batch), size_bytes, self._write_task, commit, drained_at=started, journal_mark=journal_mark
+            )
+        )
+
+    async def _drain_writes(self):
+        """Waits until every queued write has reached the file."""
+        if self._write_task is not None:
+            await self._write_task
+            self._write_task = None
+
+    async def _write_batch_to_file(self, batch: SensorDataBatch):
         """Encrypts and writes a batch of messages to the log file."""
         if not batch:
             return
 
-        log.info(f"Writing a batch of {len(batch)} messages to {self.file_path}")
-        try:
-            # Use aiofiles to open the file asynchronously in append-binary mode.
-            async with aiofiles.open(self.file_path, "ab") as f:
-                for data in batch:
-                    json_string = json.dumps(data.to_dict(), default=self._default_json_serializer)
+        await self._submit_batch(batch)
+        await self._drain_writes()
 
-                    plaintext_bytes = json_string.encode("utf-8")
+    async def recover(self) -> int:
+        """
+        Writes the readings a previous run left in the buffer's spill journal, then clears it.
 
-                    # 4. Encrypt the bytes
-                    encrypted_bytes = self.crypto_service.encrypt(plaintext_bytes)
+        Call it before any traffic is accepted. Returns the number of readings recovered.
 
-                    # 5. Write the encrypted data followed by a newline
-                    await f.write(encrypted_bytes + b"\n")
+        Raises:
+            Exception: If the readings could not be written; they stay in the journal.
+        """
+        journal = self.buffer_manager.journal
+        if journal is None:
+            return 0
+        batch = journal.pending()
+        if batch:
+            log.warning(f"Recovering {len(batch)} unwritten readings from spill journal {journal.path}")
+            commit = asyncio.get_running_loop().create_future()
+            await self._submit_batch(batch, commit=commit)
+            await self._drain_writes()
+            await commit
+        journal.reset()
+        return len(batch)
 
-                await f.flush()
+    async def _final_write(self):
+        """Writes whatever is left in the buffer and closes the log file."""
+        batch, size_bytes, commit = await self.buffer_manager.get_batch_for_commit()
+        if batch or self._unwritten:
+            # An empty batch still gives records whose write failed a last try.
+            await self._submit_batch(batch, size_bytes, commit, self.buffer_manager.journal_mark())
+        await self._drain_writes()
+        if self._unwritten:
+            where = "left in the spill journal" if self.buffer_manager.journal is not None else "lost"
+            log.error(
+                f"{sum(count for _, count, _ in self._unwritten)} readings could not be written; they are {where}."
+            )
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._write_executor, self._log_file.close)
         except Exception as e:
-            log.error(f"Failed to write batch to log file: {e}", exc_info=True)
+            log.error(f"Failed to close log file: {e}", exc_info=True)
 
     async def run(self):
         """The main execution loop for the log writer."""
@@ -63,10 +299,10 @@ class LogWriter:
                 await self.buffer_manager.wait_for_flush_event()
 
                 # After waking up, get all messages from the buffer.
-                batch = await self.buffer_manager.get_batch()
+                batch, size_bytes, commit = await self.buffer_manager.get_batch_for_commit()
 
                 if batch:
-                    await self._write_batch_to_file(batch)
+                    await self._submit_batch(batch, size_bytes, commit, self.buffer_manager.journal_mark())
 
             except asyncio.CancelledError:
                 log.info("Log writer task has been cancelled.")
@@ -74,10 +310,19 @@ class LogWriter:
 
         # After the loop is stopped, perform one final write for any stragglers.
         log.info("Log writer loop finished, performing final write.")
-        final_batch = await self.buffer_manager.get_batch()
-        if final_batch:
-            await self._write_batch_to_file(final_batch)
+        try:
+            await asyncio.wait_for(self._final_write(), timeout=self.shutdown_timeout)
+        except TimeoutError:
+            # A write stuck in a system call cannot be interrupted; don't wait for it.
+            where = "left in the spill journal" if self.buffer_manager.journal is not None else "lost"
+            log.error(f"Final write did not finish within {self.shutdown_timeout}s; unwritten readings are {where}.")
+            self._encode_executor.shutdown(wait=False, cancel_futures=True)
+            self._write_executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            self._encode_executor.shutdown(wait=True)
+            self._write_executor.shutdown(wait=True)
 
+        self.buffer_manager.close()
         log.info("Log writer has stopped.")
 
     async def stop(self):
@@ -0,0 +1,318 @@
+"""
+Low-overhead metrics for the sink, exposed in the Prometheus text format.
+
+Every metric is updated from the event loop thread only, so updates are
+plain integer and float additions without locks. Histograms preallocate
+their buckets and find the bucket with a binary search. Gauges that mirror
+service state (e.g. the buffer depth) read it through a callback when they
+are scraped, so they cost nothing on the hot path.
+"""
+
+import math
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from 100 µs to 10 s.
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Batch-size buckets in readings.
+BATCH_SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# Label value that per-sensor counters fall back to once `max_series` sensors are tracked.
+OVERFLOW_LABEL = "_other"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    """A monotonically increasing value."""
+
+    __slots__ = ("name", "help", "value")
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def samples(self) -> list[str]:
+        return [f"{self.name} {_format_value(self.value)}"]
+
+
+class LabeledCounter:
+    """
+    A counter per combination of label values, e.g. one per sensor.
+
+    At most `max_series` combinations are tracked; further ones are counted
+    under `OVERFLOW_LABEL` so that arbitrary sensor names cannot grow the
+    registry without bound.
+    """
+
+    __slots__ = ("name", "help", "label_names", "max_series", "_values", "_overflow")
+    type = "counter"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str], max_series: int = 1000):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.max_series = max_series
+        self._values: dict[tuple[str, ...], float] = {}
+        self._overflow = (OVERFLOW_LABEL,) * len(self.label_names)
+
+    def inc(self, labels: tuple[str, ...], amount: float = 1):
+        values = self._values
+        if labels in values:
+            values[labels] += amount
+        elif len(values) < self.max_series:
+            values[labels] = amount
+        else:
+            values[self._overflow] = values.get(self._overflow, 0) + amount
+
+    def value(self, labels: tuple[str, ...]) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge:
+    """A value that goes up and down; either set explicitly or read from a callback at scrape time."""
+
+    __slots__ = ("name", "help", "value", "_function")
+    type = "gauge"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Reads the gauge's value from `function` whenever it is scraped."""
+        self._function = function
+
+    def samples(self) -> list[str]:
+        value = self._function() if self._function is not None else self.value
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram:
+    """A distribution of observed values over fixed, preallocated buckets."""
+
+    __slots__ = ("name", "help", "bounds", "_counts", "_sum")
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(sorted(buckets))
+        # One slot per bucket plus one for +Inf; cumulated only when scraped.
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float):
+        self._counts[bisect_left(self.bounds, value)] += 1
+        self._sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def samples(self) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.bounds, math.inf), self._counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(self._sum)}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """A collection of metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class SinkMetrics:
+    """
+    The metrics of one sink process.
+
+    Created once by the factory and shared by the services that update
+    them; services constructed without one get a private instance.
+    """
+
+    def __init__(self, max_sensor_series: int = 1000):
+        """
+        Args:
+            max_sensor_series: How many distinct sensor names get their own per-sensor series.
+        """
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+
+        # Ingest (TelemetryService)
+        self.ingest_latency = register(
+            Histogram(
+                "telemetry_sink_ingest_latency_seconds",
+                "Time from a request entering the service until it is accepted (including the durability wait).",
+            )
+        )
+        self.messages_accepted = register(
+            LabeledCounter(
+                "telemetry_sink_messages_accepted_total",
+                "Readings accepted into the buffer.",
+                ("sensor",),
+                max_sensor_series,
+            )
+        )
+        self.messages_rejected = register(
+            LabeledCounter(
+                "telemetry_sink_messages_rejected_total",
+                "Readings refused, by reason (rate_limited, buffer_full, duplicate).",
+                ("sensor", "reason"),
+                max_sensor_series,
+            )
+        )
+
+        # Rate limiting (RateLimiter)
+        self.rate_limit_allowed = register(
+            Counter("telemetry_sink_rate_limit_allowed_total", "Requests admitted by the rate limiter.")
+        )
+        self.rate_limit_rejected = register(
+            Counter("telemetry_sink_rate_limit_rejected_total", "Requests refused by the rate limiter.")
+        )
+
+        # Deduplication (DedupCache)
+        self.dedup_tracked_ids = register(
+            Gauge("telemetry_sink_dedup_tracked_ids", "Record IDs remembered for replay detection.")
+        )
+        self.dedup_early_rotations = register(
+            Counter(
+                "telemetry_sink_dedup_early_rotations_total",
+                "Dedup generations dropped before their window was over because they were full.",
+            )
+        )
+
+        # Live subscriptions (SubscriptionHub)
+        self.subscribers = register(
+            Gauge("telemetry_sink_subscribers", "Open live subscriptions on the streaming endpoint.")
+        )
+        self.subscription_dropped = register(
+            Counter(
+                "telemetry_sink_subscription_dropped_total",
+                "Readings skipped or dropped for subscribers that fell behind.",
+            )
+        )
+
+        # Recent readings (RecentReadings)
+        self.recent_sensors = register(
+            Gauge("telemetry_sink_recent_sensors", "Sensors whose latest value and recent readings are kept.")
+        )
+        self.recent_evictions = register(
+            Counter(
+                "telemetry_sink_recent_evictions_total",
+                "Idle sensors evicted from the recent readings to stay within their memory budget.",
+            )
+        )
+
+        # Buffering (BufferManager)
+        self.buffer_pending_messages = register(
+            Gauge("telemetry_sink_buffer_pending_messages", "Readings waiting to be drained by the log writer.")
+        )
+        self.buffer_pending_bytes = register(
+            Gauge("telemetry_sink_buffer_pending_bytes", "Bytes waiting to be drained by the log writer.")
+        )
+        self.buffer_held_bytes = register(
+            Gauge("telemetry_sink_buffer_held_bytes", "Bytes held in memory, queued or being written.")
+        )
+        self.buffer_drained_batch_size = register(
+            Histogram(
+                "telemetry_sink_buffer_drained_batch_size",
+                "Readings per batch drained from the buffer.",
+                BATCH_SIZE_BUCKETS,
+            )
+        )
+
+        # Writing (LogWriter)
+        self.encode_duration = register(
+            Histogram(
+                "telemetry_sink_log_encode_seconds",
+                "Time to serialize, compress and encrypt one drained batch.",
+            )
+        )
+        self.flush_duration = register(
+            Histogram(
+                "telemetry_sink_log_flush_seconds",
+                "Time to append one encoded batch to the log file (including fsync).",
+            )
+        )
+        self.messages_written = register(
+            Counter("telemetry_sink_log_written_messages_total", "Readings written to the log file.")
+        )
+        self.bytes_written = register(
+            Counter("telemetry_sink_log_written_bytes_total", "Encoded bytes written to the log file.")
+        )
+        self.write_errors = register(
+            Counter("telemetry_sink_log_write_errors_total", "Batches that failed to encode or write.")
+        )
+
+    def render(self) -> str:
+        return self.registry.render()
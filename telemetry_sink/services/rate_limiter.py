@@ -1,69 +1,245 @@
-import asyncio
 import time
 import logging
+import multiprocessing
+from collections import OrderedDict
+
+from telemetry_sink.services.metrics import SinkMetrics
 
 log = logging.getLogger(__name__)
 
+FAIRNESS_MODES = ("none", "sensor", "client")
+
 
 class RateLimitExceededError(Exception):
     """Custom exception for when the rate limit is exceeded."""
 
-    pass
+    def __init__(self, message: str, retry_after: float = 1.0):
+        self.message = message
+        # Suggested number of seconds the sender should wait before retrying.
+        self.retry_after = retry_after
+        super().__init__(self.message)
 
 
-class RateLimiter:
+class TokenBucket:
     """
-    An asynchronous Fixed-Interval Rate Limiter.
+    A single token bucket measured in bytes.
 
-    This class enforces a strict 'bytes per second' limit. It provides a budget
-    of bytes that resets at the beginning of each 1-second window.
-    It is async-safe.
+    Tokens refill continuously at `rate` bytes per second up to `capacity`
+    bytes, so short bursts up to `capacity` are allowed while the long-run
+    average stays at `rate`.
+
+    A request costing more than `capacity` could never be paid for at once;
+    it is let through when the bucket is full and leaves it in debt (negative
+    tokens), so it is delayed rather than refused forever, and the requests
+    after it wait until the debt is paid off.
     """
 
-    def __init__(self, rate_limit_bytes_per_sec: int):
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def available(self, now: float) -> float:
+        self.refill(now)
+        return self.tokens
+
+    def try_take(self, amount: float, now: float) -> bool:
+        """Takes `amount` tokens if that many (or a full bucket, for a larger amount) are available."""
+        self.refill(now)
+        if self.tokens < min(amount, self.capacity):
+            return False
+        self.tokens -= amount
+        return True
+
+
+class SharedTokenBucket:
+    """
+    A token bucket whose state lives in shared memory, so several worker
+    processes draw from one budget.
+
+    The two state words (tokens, last refill time) are kept in a `RawArray`
+    guarded by a process-shared lock; `time.monotonic` is system-wide, so
+    refill times are comparable across processes. Create it in the parent
+    before starting the workers and pass it to each of them. Requests larger
+    than `capacity` are handled like in `TokenBucket`.
+    """
+
+    def __init__(self, rate: float, capacity: float, context=None):
+        context = context or multiprocessing.get_context()
+        self.rate = rate
+        self.capacity = capacity
+        self._state = context.RawArray("d", [capacity, time.monotonic()])
+        self._lock = context.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._state[1]
+        if elapsed > 0:
+            self._state[0] = min(self.capacity, self._state[0] + elapsed * self.rate)
+            self._state[1] = now
+
+    def available(self, now: float) -> float:
+        with self._lock:
+            self._refill(now)
+            return self._state[0]
+
+    def try_take(self, amount: float, now: float) -> bool:
+        with self._lock:
+            self._refill(now)
+            if self._state[0] < min(amount, self.capacity):
+                return False
+            self._state[0] -= amount
+            return True
+
+
+class RateLimiter:
+    """
+    An asynchronous Token-Bucket Rate Limiter.
+
+    This class enforces a 'bytes per second' limit with a configurable burst
+    capacity. Optionally, every sensor name or client address additionally
+    gets its own smaller bucket, so one noisy source cannot starve the others.
+    Sub-buckets are kept in an LRU map of bounded size; the least recently
+    used (idle) ones are evicted first.
+
+    The accept path contains no awaits and takes no lock: on a single event
+    loop each check runs to completion atomically. When several worker
+    processes share one budget, the global bucket is a `SharedTokenBucket`
+    (the only state touched under a lock); sub-buckets stay per process.
+    """
+
+    def __init__(
+        self,
+        rate_limit_bytes_per_sec: int,
+        capacity_bytes: int | None = None,
+        fairness: str = "none",
+        per_key_rate_bytes_per_sec: int | None = None,
+        per_key_capacity_bytes: int | None = None,
+        max_tracked_keys: int = 10000,
+        shared_bucket: SharedTokenBucket | None = None,
+        metrics: SinkMetrics | None = None,
+    ):
         """
         Initializes the RateLimiter.
 
         Args:
-            rate_limit_bytes_per_sec: The total budget of bytes allowed per second.
+            rate_limit_bytes_per_sec: The global refill rate in bytes per second.
+            capacity_bytes: The global burst capacity; defaults to one second of traffic.
+            fairness: "none", "sensor" (a sub-bucket per sensor name) or "client" (per client address).
+            per_key_rate_bytes_per_sec: The refill rate of each sub-bucket; defaults to the global rate.
+            per_key_capacity_bytes: The capacity of each sub-bucket; defaults to one second of its rate.
+            max_tracked_keys: The maximum number of sub-buckets kept in memory.
+            shared_bucket: A global bucket shared with other processes; replaces the
+                process-local global bucket (its rate and capacity take precedence).
+            metrics: Where allowed and rejected requests are counted.
         """
         if rate_limit_bytes_per_sec <= 0:
             raise ValueError("'rate_limit_bytes_per_sec' must be a positive value.")
+        if fairness not in FAIRNESS_MODES:
+            raise ValueError(f"Unsupported fairness mode: {fairness}. Expected one of {FAIRNESS_MODES}.")
 
         self.rate_limit = float(rate_limit_bytes_per_sec)
+        self.capacity = float(capacity_bytes or rate_limit_bytes_per_sec)
+        self.fairness = fairness
+        self.per_key_rate = float(per_key_rate_bytes_per_sec or rate_limit_bytes_per_sec)
+        self.per_key_capacity = float(per_key_capacity_bytes or self.per_key_rate)
+        self.max_tracked_keys = max_tracked_keys
+        self.metrics = metrics or SinkMetrics()
+
+        self._bucket: TokenBucket | SharedTokenBucket
+        if shared_bucket is not None:
+            self.rate_limit = shared_bucket.rate
+            self.capacity = shared_bucket.capacity
+            self._bucket = shared_bucket
+        else:
+            self._bucket = TokenBucket(self.rate_limit, self.capacity, time.monotonic())
+        self._key_buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def key_for(self, sensor_name: str | None = None, client_id: str | None = None) -> str | None:
+        """Returns the sub-bucket key for a request under the configured fairness mode."""
+        if self.fairness == "sensor":
+            return sensor_name
+        if self.fairness == "client":
+            return client_id
+        return None
+
+    def _key_bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self._key_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.per_key_rate, self.per_key_capacity, now)
+            self._key_buckets[key] = bucket
+            if len(self._key_buckets) > self.max_tracked_keys:
+                # Evict the least recently used bucket.
+                self._key_buckets.popitem(last=False)
+        else:
+            self._key_buckets.move_to_end(key)
+            bucket.refill(now)
+        return bucket
+
+    def try_acquire_split(self, size_bytes: int, key_costs: dict[str, int] | None = None) -> bool:
+        """
+        Charges `size_bytes` to the global bucket and each key's share to its sub-bucket, all or nothing.
 
-        # Lock to ensure atomic operations on the counter and timestamp.
-        self._lock = asyncio.Lock()
-
-        # Tracks how many bytes have been used in the current window.
-        self._bytes_in_window = 0
-
-        # The timestamp when the current 1-second window started.
-        self._window_start_time = time.monotonic()
+        Args:
+            size_bytes: The total number of bytes the request costs.
+            key_costs: The part of `size_bytes` attributed to each sub-bucket key.
 
-    async def check(self, size_bytes: int) -> bool:
+        Returns:
+            True if the request is allowed, False otherwise.
         """
-        Checks if a request of a given size can proceed within the current second.
+        now = time.monotonic()
+        buckets = []
+        if key_costs:
+            for key, cost in key_costs.items():
+                bucket = self._key_bucket(key, now)
+                if bucket.tokens < min(cost, bucket.capacity):
+                    self.metrics.rate_limit_rejected.inc()
+                    return False
+                buckets.append((bucket, cost))
+
+        # The sub-buckets cannot change before they are charged below, so the
+        # global (possibly shared) bucket is the only check-and-take that must be atomic.
+        if not self._bucket.try_take(size_bytes, now):
+            self.metrics.rate_limit_rejected.inc()
+            return False
+        for bucket, cost in buckets:
+            bucket.tokens -= cost
+        self.metrics.rate_limit_allowed.inc()
+        return True
+
+    def retry_after(self, size_bytes: int, key_costs: dict[str, int] | None = None) -> float:
+        """Estimates how many seconds until a request like this one would be accepted (at most 60)."""
+        now = time.monotonic()
+        needed = min(size_bytes, self.capacity)
+        wait = max(needed - self._bucket.available(now), 0.0) / self.rate_limit
+        for key, cost in (key_costs or {}).items():
+            bucket = self._key_buckets.get(key)
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, max(min(cost, bucket.capacity) - bucket.tokens, 0.0) / bucket.rate)
+        return min(wait, 60.0)
+
+    def try_acquire(self, size_bytes: int, key: str | None = None) -> bool:
+        """Synchronous accept path: charges a request of `size_bytes`, optionally to a sub-bucket too."""
+        return self.try_acquire_split(size_bytes, {key: size_bytes} if key is not None else None)
+
+    async def check(self, size_bytes: int, key: str | None = None) -> bool:
+        """
+        Checks if a request of a given size can proceed now.
 
         Args:
             size_bytes: The number of bytes the request costs.
+            key: The sub-bucket key (see `key_for`), if fairness is enabled.
 
         Returns:
             True if the request is allowed, False otherwise.
         """
-        async with self._lock:
-            now = time.monotonic()
-
-            # If more than 1 second has passed since the window started, reset it.
-            if now >= self._window_start_time + 1.0:
-                self._window_start_time = now
-                self._bytes_in_window = 0
-
-            # --- Check if the budget for the current window is exceeded ---
-            if self._bytes_in_window + size_bytes > self.rate_limit:
-                # Reject the request. Not enough budget left in this second.
-                return False
-
-            # --- Accept the request and update the counter ---
-            self._bytes_in_window += size_bytes
-            return True
+        return self.try_acquire(size_bytes, key)
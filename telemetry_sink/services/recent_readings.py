@@ -0,0 +1,135 @@
+"""
+The latest value and a short window of recent readings per sensor, kept in memory.
+
+Answers "what is sensor X reading now?" (`GET /sensors/{name}/latest`) and
+"what did it read lately?" (`GET /sensors/{name}/recent`) without touching
+the encrypted log. Every accepted reading is written into its sensor's
+fixed-size ring of `array`s in O(1); the number of sensors tracked is capped
+by a memory budget, and the sensor that has been idle longest is evicted to
+make room for a new one.
+"""
+
+from array import array
+from collections import OrderedDict
+
+from telemetry_sink.domain.sensor import SensorDataBatch
+from telemetry_sink.services.metrics import SinkMetrics
+
+# Rough per-sensor cost besides its arrays: the ring object, the arrays' headers and the index entry.
+_SENSOR_OVERHEAD_BYTES = 400
+
+# A reading as returned: (value, timestamp_us).
+Reading = tuple[int, int]
+
+
+class _SensorRing:
+    """One sensor's last `size` readings in arrival order, plus its newest reading by timestamp."""
+
+    __slots__ = ("timestamps", "values", "count", "latest_value", "latest_timestamp_us")
+
+    def __init__(self, size: int):
+        self.timestamps = array("q", [0]) * size
+        self.values = array("q", [0]) * size
+        # Readings written so far; the next one goes to slot `count % size`.
+        self.count = 0
+        self.latest_value = 0
+        self.latest_timestamp_us: int | None = None
+
+
+class RecentReadings:
+    """
+    Per-sensor latest values and recent-window ring buffers, bounded in memory.
+
+    A sensor's ring holds its last `ring_size` accepted readings (16 bytes
+    each). At most `max_memory_bytes` worth of rings are kept; when a new
+    sensor arrives beyond that, the least recently updated sensor is evicted.
+    The latest value is the reading with the newest timestamp, so a late
+    resend of an old reading does not replace it.
+
+    Not thread-safe; it is updated and queried from the event loop only.
+    """
+
+    def __init__(
+        self, ring_size: int = 256, max_memory_bytes: int = 32 * 1024 * 1024, metrics: SinkMetrics | None = None
+    ):
+        """
+        Args:
+            ring_size: How many recent readings are kept per sensor.
+            max_memory_bytes: The memory budget for all sensors' rings.
+            metrics: The registry to report tracked and evicted sensors to.
+        """
+        if ring_size <= 0:
+            raise ValueError("'ring_size' must be positive.")
+        self.ring_size = ring_size
+        self.max_sensors = max(1, max_memory_bytes // (ring_size * 16 + _SENSOR_OVERHEAD_BYTES))
+        # Least recently updated sensor first.
+        self._rings: OrderedDict[str, _SensorRing] = OrderedDict()
+
+        self.metrics = metrics or SinkMetrics()
+        self.metrics.recent_sensors.set_function(lambda: len(self._rings))
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def _ring(self, name: str) -> _SensorRing:
+        """Returns a sensor's ring, marked as the most recently updated, creating it if needed."""
+        rings = self._rings
+        ring = rings.get(name)
+        if ring is not None:
+            rings.move_to_end(name)
+            return ring
+        if len(rings) >= self.max_sensors:
+            rings.popitem(last=False)
+            self.metrics.recent_evictions.inc()
+        ring = rings[name] = _SensorRing(self.ring_size)
+        return ring
+
+    def _write(self, ring: _SensorRing, value: int, timestamp_us: int):
+        slot = ring.count % self.ring_size
+        ring.timestamps[slot] = timestamp_us
+        ring.values[slot] = value
+        ring.count += 1
+        if ring.latest_timestamp_us is None or timestamp_us >= ring.latest_timestamp_us:
+            ring.latest_value = value
+            ring.latest_timestamp_us = timestamp_us
+
+    def observe(self, name: str, value: int, timestamp_us: int):
+        """Records one accepted reading."""
+        self._write(self._ring(name), value, timestamp_us)
+
+    def observe_batch(self, batch: SensorDataBatch):
+        """Records a batch of accepted readings."""
+        # Looked up once per sensor of the batch; a ring evicted meanwhile is simply written to and dropped.
+        rings = [self._ring(name) for name in batch.names]
+        write = self._write
+        for name_id, value, timestamp_us in zip(batch.name_ids, batch.values, batch.timestamps):
+            write(rings[name_id], value, timestamp_us)
+
+    def latest(self, name: str) -> Reading | None:
+        """Returns a sensor's newest reading as `(value, timestamp_us)`, or None if it is not tracked."""
+        ring = self._rings.get(name)
+        if ring is None:
+            return None
+        return ring.latest_value, ring.latest_timestamp_us
+
+    def recent(self, name: str, since_us: int | None = None) -> list[Reading] | None:
+        """
+        Returns a sensor's kept readings with `timestamp_us >= since_us`, oldest first.
+
+        Returns None if the sensor is not tracked.
+        """
+        ring = self._rings.get(name)
+        if ring is None:
+            return None
+        size = self.ring_size
+        kept = min(ring.count, size)
+        start = ring.count - kept
+        readings = []
+        for position in range(start, ring.count):
+            slot = position % size
+            timestamp_us = ring.timestamps[slot]
+            if since_us is None or timestamp_us >= since_us:
+                readings.append((ring.values[slot], timestamp_us))
+        # Kept in arrival order, which is nearly sorted by timestamp.
+        readings.sort(key=lambda reading: reading[1])
+        return readings
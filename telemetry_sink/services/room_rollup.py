@@ -0,0 +1,195 @@
+"""
+Live per-room, per-second V/R/I rollups of accepted readings.
+
+This is the incremental form of ``sql_task/3_queries.sql``: readings of
+voltage (V) and resistance (R) sensors are averaged per room and per
+second, and the current is derived as I = V / R. Instead of re-scanning raw
+data on every refresh, every accepted reading updates its room's bucket for
+that second in O(1).
+"""
+
+import time
+from array import array
+from datetime import datetime
+
+from telemetry_sink.domain.sensor import SensorDataBatch, from_epoch_us, to_epoch_us
+
+SENSOR_TYPES = ("V", "R")
+
+# Marks a ring slot that has never held a bucket.
+_EMPTY = -(2**63)
+
+
+def parse_sensor_rooms(text: str) -> dict[str, tuple[str, str]]:
+    """
+    Parses a sensor-to-room mapping with one `<sensor> <room> <type>` line per sensor.
+
+    Returns:
+        A mapping of sensor name to `(room, sensor type)`.
+
+    Raises:
+        ValueError: If a line is malformed or names an unknown sensor type.
+    """
+    sensor_rooms = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        if len(parts) != 3:
+            raise ValueError(f"Invalid sensor mapping '{line}'. Expected '<sensor> <room> <type>'.")
+        sensor, room, sensor_type = parts
+        if sensor_type not in SENSOR_TYPES:
+            raise ValueError(f"Unsupported sensor type '{sensor_type}' for '{sensor}'. Expected one of {SENSOR_TYPES}.")
+        sensor_rooms[sensor] = (room, sensor_type)
+    return sensor_rooms
+
+
+class _RoomSeries:
+    """A room's per-second sums and counts, in ring arrays indexed by `second % horizon`."""
+
+    __slots__ = ("seconds", "v_sum", "v_count", "r_sum", "r_count")
+
+    def __init__(self, horizon_seconds: int):
+        self.seconds = array("q", [_EMPTY]) * horizon_seconds
+        self.v_sum = array("d", [0.0]) * horizon_seconds
+        self.v_count = array("q", [0]) * horizon_seconds
+        self.r_sum = array("d", [0.0]) * horizon_seconds
+        self.r_count = array("q", [0]) * horizon_seconds
+
+
+class RoomRollup:
+    """
+    Maintains per-room, per-second averages of V and R and the derived I = V / R.
+
+    Every room keeps one bucket per second for the last `horizon_seconds`
+    seconds, in preallocated ring arrays: a reading is added to its bucket
+    in O(1) and a bucket's slot is reused once it falls out of the horizon,
+    so memory stays bounded (about 40 bytes per room and second of horizon).
+
+    The horizon follows the newest reading seen, not the wall clock, so
+    replayed historical data rolls up too. Readings older than the horizon,
+    or further than `horizon_seconds` ahead of the wall clock, are dropped
+    and counted in `dropped`.
+
+    Not thread-safe; it is updated and queried from the event loop only.
+    """
+
+    def __init__(self, sensor_rooms: dict[str, tuple[str, str]], horizon_seconds: int = 3600):
+        """
+        Args:
+            sensor_rooms: The room and sensor type ("V" or "R") of every sensor to roll up.
+            horizon_seconds: How many seconds of buckets are kept per room.
+        """
+        if horizon_seconds <= 0:
+            raise ValueError("'horizon_seconds' must be a positive value.")
+        self.horizon_seconds = horizon_seconds
+        self.sensor_rooms = dict(sensor_rooms)
+        self.dropped = 0
+
+        self._series: dict[str, _RoomSeries] = {}
+        # Sensor name -> (its room's series, whether it measures V).
+        self._targets: dict[str, tuple[_RoomSeries, bool]] = {}
+        for sensor, (room, sensor_type) in self.sensor_rooms.items():
+            if sensor_type not in SENSOR_TYPES:
+                raise ValueError(f"Unsupported sensor type: {sensor_type}. Expected one of {SENSOR_TYPES}.")
+            series = self._series.get(room)
+            if series is None:
+                series = self._series[room] = _RoomSeries(horizon_seconds)
+            self._targets[sensor] = (series, sensor_type == "V")
+        self._newest_second = _EMPTY
+
+    @property
+    def rooms(self) -> list[str]:
+        return sorted(self._series)
+
+    def observe(self, name: str, value: int, timestamp_us: int):
+        """Adds one accepted reading; readings of unmapped sensors are ignored."""
+        target = self._targets.get(name)
+        if target is not None:
+            self._add(target[0], target[1], value, timestamp_us // 1_000_000, int(time.time()) + self.horizon_seconds)
+
+    def observe_batch(self, batch: SensorDataBatch):
+        """Adds a batch of accepted readings, resolving each sensor name once per batch."""
+        targets = [self._targets.get(name) for name in batch.names]
+        if not any(targets):
+            return
+        future_limit = int(time.time()) + self.horizon_seconds
+        for name_id, value, timestamp_us in zip(batch.name_ids, batch.values, batch.timestamps):
+            target = targets[name_id]
+            if target is not None:
+                self._add(target[0], target[1], value, timestamp_us // 1_000_000, future_limit)
+
+    def _add(self, series: _RoomSeries, is_voltage: bool, value: int, second: int, future_limit: int):
+        if second > future_limit:
+            self.dropped += 1
+            return
+        if second > self._newest_second:
+            self._newest_second = second
+        elif second <= self._newest_second - self.horizon_seconds:
+            self.dropped += 1
+            return
+
+        slot = second % self.horizon_seconds
+        if series.seconds[slot] != second:
+            # The slot holds a bucket that has fallen out of the horizon (or none); reuse it.
+            series.seconds[slot] = second
+            series.v_sum[slot] = 0.0
+            series.v_count[slot] = 0
+            series.r_sum[slot] = 0.0
+            series.r_count[slot] = 0
+        if is_voltage:
+            series.v_sum[slot] += value
+            series.v_count[slot] += 1
+        else:
+            series.r_sum[slot] += value
+            series.r_count[slot] += 1
+
+    def query(
+        self,
+        rooms: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[dict]:
+        """
+        Returns the rollups within the horizon, ordered by room and second, like `3_queries.sql`.
+
+        Args:
+            rooms: Only these rooms; all rooms if None.
+            start: Only seconds at or after this time (inclusive).
+            end: Only seconds before this time (exclusive).
+
+        Returns:
+            One row per room and second with `room`, `timestamp` (the start of
+            the second), `I`, `V` and `R`; a value is None where no reading of
+            that type arrived (and I where V or R is missing or R is 0).
+        """
+        oldest = self._newest_second - self.horizon_seconds + 1
+        first = oldest if start is None else max(oldest, _floor_second(start))
+        last = self._newest_second if end is None else min(self._newest_second, _ceil_second(end) - 1)
+
+        rows = []
+        for room in sorted(self._series) if rooms is None else sorted(set(rooms) & self._series.keys()):
+            series = self._series[room]
+            buckets = sorted((second, slot) for slot, second in enumerate(series.seconds) if first <= second <= last)
+            for second, slot in buckets:
+                v = series.v_sum[slot] / series.v_count[slot] if series.v_count[slot] else None
+                r = series.r_sum[slot] / series.r_count[slot] if series.r_count[slot] else None
+                rows.append(
+                    {
+                        "room": room,
+                        "timestamp": from_epoch_us(second * 1_000_000).isoformat(),
+                        "I": v / r if v is not None and r else None,
+                        "V": v,
+                        "R": r,
+                    }
+                )
+        return rows
+
+
+def _floor_second(timestamp: datetime) -> int:
+    return to_epoch_us(timestamp) // 1_000_000
+
+
+def _ceil_second(timestamp: datetime) -> int:
+    return -(-to_epoch_us(timestamp) // 1_000_000)
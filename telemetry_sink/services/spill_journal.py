@@ -0,0 +1,271 @@
+"""
+Append-only, memory-mapped journal of the readings held in the buffer.
+
+Every reading accepted into the `BufferManager` is also appended here, and
+the `LogWriter` checkpoints the journal once the batch holding it is in the
+log file. Whatever lies past the checkpoint when the sink dies is replayed
+into the log on the next start, so a reading acknowledged under the
+"memory" durability survives a crash or kill of the process. Readings
+written just before a crash may be replayed once more (at-least-once).
+
+Appends are plain memory copies into a shared file mapping: no system call,
+and the kernel writes the pages back on its own. The mapping survives the
+process, not a power loss; for that, use the "fsynced" durability.
+
+The file is a ring of fixed size:
+
+    0       magic
+    8, 36   two checkpoint slots, ``<QQQI``: update counter, offset and sequence
+            number of the first unwritten record, CRC32 of the three
+    64      records, ``<IIQ``: payload length, CRC32 of the payload, sequence
+            number, then the payload, a run of ``<qqI`` (timestamp in µs,
+            value, name length) plus the UTF-8 name per reading
+
+Records get consecutive sequence numbers, so a reader starting at the
+checkpoint stops at the first record that is torn (bad CRC) or left over from
+an earlier lap of the ring (unexpected sequence). A record that does not fit
+before the end of the file is preceded by a wrap marker (length 0xFFFFFFFF)
+and written at the start. Checkpoints alternate between the two slots, so a
+checkpoint torn by a crash leaves the previous one intact.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import zlib
+
+from telemetry_sink.domain.sensor import SensorDataBatch
+
+log = logging.getLogger(__name__)
+
+_MAGIC = b"TSSPILL1"
+_CHECKPOINT = struct.Struct("<QQQI")
+_CHECKPOINT_SLOTS = (8, 8 + _CHECKPOINT.size)
+_DATA_START = 64
+_RECORD = struct.Struct("<IIQ")
+_ENTRY = struct.Struct("<qqI")
+_WRAP = 0xFFFFFFFF
+
+# Encoded names kept for reuse; cleared when it grows past this many names.
+_MAX_CACHED_NAMES = 65536
+
+# Where the next record goes, as (offset, sequence number).
+JournalMark = tuple[int, int]
+
+
+class SpillJournal:
+    """
+    A ring-shaped, memory-mapped journal of the readings not yet in the log file.
+
+    All methods are called from the event loop only.
+    """
+
+    def __init__(self, path: str, capacity_bytes: int = 64 * 1024 * 1024):
+        """
+        Opens the journal at `path`, creating it if needed.
+
+        Args:
+            path: The journal file.
+            capacity_bytes: The size of a newly created journal file. An existing
+                journal keeps its size until it has been replayed.
+        """
+        if capacity_bytes < _DATA_START + 4096:
+            raise ValueError("'capacity_bytes' is too small for a spill journal.")
+        self.path = path
+        self.capacity_bytes = capacity_bytes
+        self._names: dict[str, bytes] = {}
+        self._map: mmap.mmap | None = None
+        self._checkpoint_count = 0
+        self._open()
+
+    def _open(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            size = os.fstat(fd).st_size
+            fresh = size < _DATA_START + _RECORD.size or os.pread(fd, len(_MAGIC), 0) != _MAGIC
+            if fresh:
+                size = self.capacity_bytes
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        checkpoint = None if fresh else self._read_checkpoint()
+        if checkpoint is None:
+            if not fresh:
+                log.warning(f"Spill journal {self.path} has no valid checkpoint; starting it over.")
+                # Clear the old records, or the new ones' sequence numbers would lead a replay into them.
+                self._map[_DATA_START:] = bytes(len(self._map) - _DATA_START)
+            self._map[: len(_MAGIC)] = _MAGIC
+            self._committed: JournalMark = (_DATA_START, 1)
+            self._position, self._sequence = self._committed
+            self._write_checkpoint()
+            return
+
+        self._checkpoint_count, offset, sequence = checkpoint
+        self._committed = (offset, sequence)
+        _, (self._position, self._sequence) = self._scan()
+
+    def _read_checkpoint(self) -> tuple[int, int, int] | None:
+        """Returns the newest intact checkpoint as (counter, offset, sequence), or None."""
+        newest = None
+        for slot in _CHECKPOINT_SLOTS:
+            count, offset, sequence, crc = _CHECKPOINT.unpack_from(self._map, slot)
+            if crc != zlib.crc32(_CHECKPOINT.pack(count, offset, sequence, 0)[:-4]):
+                continue
+            if not _DATA_START <= offset <= len(self._map):
+                continue
+            if newest is None or count > newest[0]:
+                newest = (count, offset, sequence)
+        return newest
+
+    def _write_checkpoint(self):
+        self._checkpoint_count += 1
+        offset, sequence = self._committed
+        fields = _CHECKPOINT.pack(self._checkpoint_count, offset, sequence, 0)[:-4]
+        slot = _CHECKPOINT_SLOTS[self._checkpoint_count % 2]
+        self._map[slot : slot + _CHECKPOINT.size] = fields + struct.pack("<I", zlib.crc32(fields))
+
+    def _scan(self) -> tuple[list[bytes], JournalMark]:
+        """Returns the payloads of the records past the checkpoint, and where the next record goes."""
+        journal = self._map
+        end = len(journal)
+        offset, sequence = self._committed
+        payloads = []
+        wrapped = False
+        before_wrap = offset
+        while True:
+            if offset + _RECORD.size > end:
+                length = _WRAP
+            else:
+                length, crc, record_sequence = _RECORD.unpack_from(journal, offset)
+            if length == _WRAP:
+                # Pending records span at most one wrap of the ring.
+                if wrapped:
+                    break
+                wrapped = True
+                before_wrap, offset = offset, _DATA_START
+                continue
+            start = offset + _RECORD.size
+            if record_sequence != sequence or start + length > end:
+                break
+            payload = journal[start : start + length]
+            if zlib.crc32(payload) != crc:
+                break
+            payloads.append(payload)
+            offset = start + length
+            sequence += 1
+        if wrapped and offset == _DATA_START:
+            # Nothing follows the wrap (a stale marker, or a torn record): keep appending before it.
+            offset = before_wrap
+        return payloads, (offset, sequence)
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes of the ring taken by records past the checkpoint."""
+        committed = self._committed[0]
+        if self._position >= committed:
+            return self._position - committed
+        return len(self._map) - committed + self._position - _DATA_START
+
+    def mark(self) -> JournalMark:
+        """Returns the journal position right after the last appended record."""
+        return self._position, self._sequence
+
+    def _encoded_name(self, name: str) -> bytes:
+        encoded = self._names.get(name)
+        if encoded is None:
+            if len(self._names) >= _MAX_CACHED_NAMES:
+                self._names.clear()
+            encoded = self._names[name] = name.encode("utf-8")
+        return encoded
+
+    def append_reading(self, name: str, value: int, timestamp_us: int) -> bool:
+        """Appends one reading; returns False (and appends nothing) if the ring is full."""
+        encoded = self._names.get(name) or self._encoded_name(name)
+        return self._append(_ENTRY.pack(timestamp_us, value, len(encoded)) + encoded)
+
+    def append_batch(self, batch: SensorDataBatch) -> bool:
+        """Appends a whole batch as one record; returns False (and appends nothing) if the ring is full."""
+        names = [self._encoded_name(name) for name in batch.names]
+        pack = _ENTRY.pack
+        payload = b"".join(
+            pack(timestamp_us, value, len(names[name_id])) + names[name_id]
+            for name_id, value, timestamp_us in zip(batch.name_ids, batch.values, batch.timestamps)
+        )
+        return self._append(payload)
+
+    def _append(self, payload: bytes) -> bool:
+        journal = self._map
+        end = len(journal)
+        size = _RECORD.size + len(payload)
+        offset = self._position
+        committed = self._committed[0]
+        if offset == committed != _DATA_START and offset + size > end:
+            # The ring is empty; start over at its front rather than wrap.
+            self.checkpoint(self.mark())
+            offset = committed = _DATA_START
+
+        if offset >= committed:
+            if offset + size > end:
+                # Wrap around, without ever catching up with the checkpoint:
+                # equal positions mean an empty ring.
+                if _DATA_START + size >= committed:
+                    return False
+                if offset + _RECORD.size <= end:
+                    _RECORD.pack_into(journal, offset, _WRAP, 0, 0)
+                offset = _DATA_START
+        elif offset + size >= committed:
+            return False
+
+        start = offset + _RECORD.size
+        journal[start : start + len(payload)] = payload
+        _RECORD.pack_into(journal, offset, len(payload), zlib.crc32(payload), self._sequence)
+        self._position = start + len(payload)
+        self._sequence += 1
+        return True
+
+    def checkpoint(self, mark: JournalMark):
+        """Records that every reading appended before `mark` is in the log file."""
+        if mark == (self._position, self._sequence):
+            # Nothing left to replay: start over at the front of the ring.
+            self._position = _DATA_START
+            mark = (_DATA_START, self._sequence)
+        self._committed = mark
+        self._write_checkpoint()
+
+    def pending(self) -> SensorDataBatch:
+        """Decodes the readings appended after the last checkpoint, in order."""
+        batch = SensorDataBatch()
+        append_raw = batch.append_raw
+        unpack_from = _ENTRY.unpack_from
+        entry_size = _ENTRY.size
+        for payload in self._scan()[0]:
+            offset = 0
+            while offset < len(payload):
+                timestamp_us, value, name_length = unpack_from(payload, offset)
+                offset += entry_size
+                name = payload[offset : offset + name_length].decode("utf-8")
+                offset += name_length
+                append_raw(name, value, timestamp_us)
+        return batch
+
+    def reset(self):
+        """
+        Discards every pending record, e.g. once they have been replayed into the log.
+
+        A journal whose size differs from `capacity_bytes` is recreated at that size.
+        """
+        if len(self._map) != self.capacity_bytes:
+            self._map.close()
+            os.truncate(self.path, 0)
+            self._open()
+            return
+        self.checkpoint(self.mark())
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
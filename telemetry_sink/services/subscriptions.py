@@ -0,0 +1,238 @@
+"""
+Live fan-out of accepted readings to subscribers (the sink's streaming endpoint).
+
+A subscriber asks for a set of sensor names, or for every sensor. The hub
+indexes subscriptions by sensor name, so publishing a reading costs
+O(matching subscribers), however many dashboards watch other sensors.
+
+Every subscription has a bounded queue, and publishing never waits for a
+subscriber. When a slow consumer's queue is full, its overflow policy
+decides what happens to further readings until it catches up:
+
+- ``latest``: they are coalesced to the latest value per sensor, skipping
+  intermediate values;
+- ``drop``: they are dropped;
+- ``disconnect``: the subscription is closed once its queue is drained, and
+  the consumer has to subscribe again.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Iterable
+
+from telemetry_sink.domain.sensor import SensorDataBatch
+from telemetry_sink.services.metrics import SinkMetrics
+
+log = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("latest", "drop", "disconnect")
+
+# A published reading: (name, value, timestamp_us).
+Reading = tuple[str, int, int]
+
+
+class SubscriberLimitError(Exception):
+    """Raised when the hub already serves its maximum number of subscribers."""
+
+    pass
+
+
+class SubscriptionClosedError(Exception):
+    """Raised by `Subscription.get` once the subscription is closed and drained."""
+
+    pass
+
+
+class Subscription:
+    """
+    One subscriber's bounded queue of readings.
+
+    Filled by the hub from the event loop and drained by the subscriber with `get`.
+    """
+
+    __slots__ = ("names", "max_pending", "overflow", "dropped", "closed", "_hub", "_queue", "_coalesced", "_ready")
+
+    def __init__(self, hub: "SubscriptionHub", names: frozenset[str] | None, max_pending: int, overflow: str):
+        self.names = names
+        self.max_pending = max_pending
+        self.overflow = overflow
+        # Readings skipped or dropped because the subscriber was behind.
+        self.dropped = 0
+        self.closed = False
+        self._hub = hub
+        self._queue: deque[Reading] = deque()
+        # Latest value per sensor once the queue is full (overflow "latest").
+        self._coalesced: dict[str, Reading] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, reading: Reading):
+        """Queues a reading, applying the overflow policy if the queue is full; never blocks."""
+        if self.closed:
+            return
+        if len(self._queue) < self.max_pending and not self._coalesced:
+            self._queue.append(reading)
+        elif self.overflow == "latest":
+            name = reading[0]
+            if name in self._coalesced:
+                # Replaces a value the subscriber has not seen.
+                self._skip()
+            elif len(self._coalesced) >= self.max_pending:
+                self._skip()
+                return
+            self._coalesced[name] = reading
+        elif self.overflow == "drop":
+            self._skip()
+            return
+        else:
+            self._skip()
+            log.info(f"Closing a subscription that fell {self.max_pending} readings behind.")
+            self._hub.unsubscribe(self)
+            return
+        self._ready.set()
+
+    def _skip(self):
+        self.dropped += 1
+        self._hub.metrics.subscription_dropped.inc()
+
+    def close(self):
+        """Closes the subscription; `get` returns what is still queued, then raises `SubscriptionClosedError`."""
+        self.closed = True
+        self._ready.set()
+
+    async def get(self, timeout: float | None = None) -> list[Reading]:
+        """
+        Waits for readings and returns every queued one, oldest first.
+
+        Returns an empty list if `timeout` seconds pass without a reading.
+
+        Raises:
+            SubscriptionClosedError: If the subscription is closed and nothing is left queued.
+        """
+        if not self._queue and not self._coalesced:
+            if self.closed:
+                raise SubscriptionClosedError("The subscription is closed.")
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except TimeoutError:
+                return []
+        readings = list(self._queue)
+        self._queue.clear()
+        if self._coalesced:
+            readings.extend(self._coalesced.values())
+            self._coalesced.clear()
+        return readings
+
+
+class SubscriptionHub:
+    """
+    Fans accepted readings out to live subscriptions, filtered by sensor name.
+
+    Subscriptions are indexed by the names they ask for, in tuples replaced
+    on every (rare) subscribe or unsubscribe, so publishing iterates only the
+    matching subscriptions and a subscription closed while publishing cannot
+    disturb the iteration.
+
+    Not thread-safe; it is used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        max_subscribers: int = 1000,
+        max_pending: int = 1000,
+        overflow: str = "latest",
+        metrics: SinkMetrics | None = None,
+    ):
+        """
+        Args:
+            max_subscribers: How many subscriptions may be open at once.
+            max_pending: The default queue size of a subscription, in readings.
+            overflow: The default overflow policy, one of `OVERFLOW_POLICIES`.
+            metrics: The registry to report subscribers and dropped readings to.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {overflow}. Expected one of {OVERFLOW_POLICIES}.")
+        if max_pending <= 0:
+            raise ValueError("'max_pending' must be positive.")
+        self.max_subscribers = max_subscribers
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self._by_name: dict[str, tuple[Subscription, ...]] = {}
+        # Subscriptions to every sensor.
+        self._everything: tuple[Subscription, ...] = ()
+        self._count = 0
+
+        self.metrics = metrics or SinkMetrics()
+        self.metrics.subscribers.set_function(lambda: self._count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def subscribe(
+        self, names: Iterable[str] | None = None, max_pending: int | None = None, overflow: str | None = None
+    ) -> Subscription:
+        """
+        Opens a subscription to the given sensor names, or to every sensor if `names` is empty or None.
+
+        Raises:
+            SubscriberLimitError: If `max_subscribers` subscriptions are already open.
+            ValueError: If `overflow` is not a supported policy.
+        """
+        overflow = overflow or self.overflow
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {overflow}. Expected one of {OVERFLOW_POLICIES}.")
+        if self._count >= self.max_subscribers:
+            raise SubscriberLimitError(f"Already serving {self._count} subscribers.")
+
+        subscription = Subscription(
+            self, frozenset(names) if names else None, max_pending or self.max_pending, overflow
+        )
+        if subscription.names is None:
+            self._everything = (*self._everything, subscription)
+        else:
+            for name in subscription.names:
+                self._by_name[name] = (*self._by_name.get(name, ()), subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Removes a subscription from the index and closes it; removing it twice is harmless."""
+        if subscription.closed:
+            return
+        subscription.close()
+        if subscription.names is None:
+            self._everything = tuple(s for s in self._everything if s is not subscription)
+        else:
+            for name in subscription.names:
+                remaining = tuple(s for s in self._by_name.get(name, ()) if s is not subscription)
+                if remaining:
+                    self._by_name[name] = remaining
+                else:
+                    self._by_name.pop(name, None)
+        self._count -= 1
+
+    def publish(self, name: str, value: int, timestamp_us: int):
+        """Hands one accepted reading to the subscriptions that want it."""
+        if not self._count:
+            return
+        reading = (name, value, timestamp_us)
+        for subscription in self._everything:
+            subscription.push(reading)
+        for subscription in self._by_name.get(name, ()):
+            subscription.push(reading)
+
+    def publish_batch(self, batch: SensorDataBatch):
+        """Hands a batch of accepted readings to the subscriptions that want them, in order."""
+        if not self._count:
+            return
+        names = batch.names
+        everything = self._everything
+        # Looked up once per sensor of the batch, not per reading.
+        targets = [everything + self._by_name.get(name, ()) for name in names]
+        for name_id, value, timestamp_us in zip(batch.name_ids, batch.values, batch.timestamps):
+            subscriptions = targets[name_id]
+            if subscriptions:
+                reading = (names[name_id], value, timestamp_us)
+                for subscription in subscriptions:
+                    subscription.push(reading)
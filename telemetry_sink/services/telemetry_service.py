@@ -1,7 +1,16 @@
+import asyncio
 import logging
+import time
+from collections.abc import Sequence
+
 from telemetry_sink.services.rate_limiter import RateLimiter, RateLimitExceededError
-from telemetry_sink.services.buffer_manager import BufferManager
-from telemetry_sink.domain.sensor import SensorData
+from telemetry_sink.services.buffer_manager import BufferFullError, BufferManager
+from telemetry_sink.services.dedup_cache import DedupCache
+from telemetry_sink.services.metrics import SinkMetrics
+from telemetry_sink.services.recent_readings import RecentReadings
+from telemetry_sink.services.room_rollup import RoomRollup
+from telemetry_sink.services.subscriptions import SubscriptionHub
+from telemetry_sink.domain.sensor import SensorData, SensorDataBatch
 
 log = logging.getLogger(__name__)
 
@@ -9,21 +18,320 @@ log = logging.getLogger(__name__)
 class TelemetryService:
     """The central application service that orchestrates core logic."""
 
-    def __init__(self, rate_limiter: RateLimiter, buffer_manager: BufferManager):
+    def __init__(
+        self,
+        rate_limiter: RateLimiter,
+        buffer_manager: BufferManager,
+        metrics: SinkMetrics | None = None,
+        rollup: RoomRollup | None = None,
+        dedup: DedupCache | None = None,
+        subscriptions: SubscriptionHub | None = None,
+        recent: RecentReadings | None = None,
+    ):
         self.rate_limiter = rate_limiter
         self.buffer_manager = buffer_manager
+        # Shared with the other services, so one registry serves /metrics.
+        self.metrics = metrics or buffer_manager.metrics
+        # Live per-room rollups of accepted readings, if configured.
+        self.rollup = rollup
+        # Record IDs accepted recently, to drop readings a client resends; None disables deduplication.
+        self.dedup = dedup
+        # Live subscribers to accepted readings, if the streaming endpoint is enabled.
+        self.subscriptions = subscriptions
+        # Latest value and recent readings per sensor, served without touching the log.
+        self.recent = recent
 
-    async def process_message(self, data: SensorData, size_bytes: int):
+    async def process_message(
+        self,
+        data: SensorData,
+        size_bytes: int,
+        client_id: str | None = None,
+        record_id: bytes | None = None,
+        payload: bytes | None = None,
+    ) -> bool:
         """
         The single, protocol-agnostic entry point for processing a message.
 
+        Args:
+            data: The reading.
+            size_bytes: The size of the reading on the wire, charged to the rate limiter.
+            client_id: An identifier of the sender (e.g. its address), used for per-client fairness.
+            record_id: The reading's unique ID, if the sender gave one; a reading whose ID was
+                accepted recently is a replay and is dropped.
+            payload: The reading's validated JSON as received, to be logged as is instead of
+                being serialized again (passthrough mode).
+
+        Returns:
+            False if the reading was a replay and dropped, True if it was accepted.
+
         Raises:
+            BufferFullError: If the buffer is at its memory ceiling.
             RateLimitExceededError: If the incoming data violates the rate limit.
+            OSError: If the durability level requires a write and the log writer failed to commit it.
         """
-        # 1. Check Rate Limiter
-        if not await self.rate_limiter.check(size_bytes):
-            raise RateLimitExceededError(f"Rate limit exceeded for {size_bytes} bytes")
+        started = time.perf_counter()
+        if self._is_replay(data.name, record_id):
+            return False
+        self._admit(size_bytes, data.name, client_id)
 
         # 2. Add to Buffer (this is an async operation)
-        await self.buffer_manager.add(data, size_bytes)
+        await self.buffer_manager.add(data, size_bytes, payload)
+        self.metrics.messages_accepted.inc((data.name,))
+        if self.rollup is not None:
+            self.rollup.observe(data.name, data.value, data.timestamp_us)
+        if self.recent is not None:
+            self.recent.observe(data.name, data.value, data.timestamp_us)
+        if self.subscriptions is not None:
+            self.subscriptions.publish(data.name, data.value, data.timestamp_us)
         log.debug(f"Message from sensor '{data.name}' accepted into buffer.")
+
+        # 3. Hold the caller until the reading is as durable as configured
+        await self._wait_for_commit()
+        self._remember(record_id)
+        self.metrics.ingest_latency.observe(time.perf_counter() - started)
+        return True
+
+    async def process_reading(
+        self,
+        name: str,
+        value: int,
+        timestamp_us: int,
+        size_bytes: int,
+        client_id: str | None = None,
+        record_id: bytes | None = None,
+        payload: bytes | None = None,
+    ) -> bool:
+        """
+        Like `process_message`, for adapters that decode readings into plain fields.
+
+        Skips building a `SensorData` object on the hot path.
+
+        Returns:
+            False if the reading was a replay and dropped, True if it was accepted.
+
+        Raises:
+            BufferFullError: If the buffer is at its memory ceiling.
+            RateLimitExceededError: If the incoming data violates the rate limit.
+        """
+        started = time.perf_counter()
+        if self._is_replay(name, record_id):
+            return False
+        self._admit(size_bytes, name, client_id)
+        self.buffer_manager.add_raw(name, value, timestamp_us, size_bytes, payload)
+        self.metrics.messages_accepted.inc((name,))
+        if self.rollup is not None:
+            self.rollup.observe(name, value, timestamp_us)
+        if self.recent is not None:
+            self.recent.observe(name, value, timestamp_us)
+        if self.subscriptions is not None:
+            self.subscriptions.publish(name, value, timestamp_us)
+        await self._wait_for_commit()
+        self._remember(record_id)
+        self.metrics.ingest_latency.observe(time.perf_counter() - started)
+        return True
+
+    def _is_replay(self, sensor_name: str, record_id: bytes | None) -> bool:
+        """
+        Returns True (and counts it) if a reading with `record_id` was accepted recently.
+
+        A replay is acknowledged right away, without the durability wait. IDs
+        are only remembered once their reading is committed, so a resend after
+        a failed write is accepted again rather than acknowledged and lost.
+        """
+        if record_id is None or self.dedup is None or not self.dedup.seen(record_id):
+            return False
+        self.metrics.messages_rejected.inc((sensor_name, "duplicate"))
+        log.debug(f"Dropping replayed reading from sensor '{sensor_name}'.")
+        return True
+
+    def _remember(self, record_id: bytes | None):
+        if record_id is not None and self.dedup is not None:
+            self.dedup.remember(record_id)
+
+    def _drop_replays(
+        self, batch: SensorDataBatch, record_ids: Sequence[bytes | None]
+    ) -> tuple[SensorDataBatch, list[bytes]]:
+        """
+        Removes the readings whose record ID was accepted recently or repeats within the batch.
+
+        Returns:
+            The remaining readings (`batch` itself if there were no replays) and their record IDs.
+        """
+        if len(record_ids) != len(batch):
+            raise ValueError(f"Got {len(record_ids)} record IDs for a batch of {len(batch)} readings")
+        keep = self.dedup.unseen(record_ids)
+        fresh_ids = [record_ids[index] for index in keep if record_ids[index] is not None]
+        if len(keep) == len(batch):
+            return batch, fresh_ids
+
+        names, name_ids, values, timestamps = batch.names, batch.name_ids, batch.values, batch.timestamps
+        payloads = batch.payloads
+        remaining = SensorDataBatch()
+        for index in keep:
+            remaining.append_raw(
+                names[name_ids[index]], values[index], timestamps[index], payloads[index] if payloads else None
+            )
+        replays = batch.name_counts() - remaining.name_counts()
+        for name, count in replays.items():
+            self.metrics.messages_rejected.inc((name, "duplicate"), count)
+        log.debug(f"Dropping {len(batch) - len(keep)} replayed readings from a batch of {len(batch)}.")
+        return remaining, fresh_ids
+
+    async def _wait_for_commit(self):
+        """Waits until the batch holding the caller's readings is committed, unless durability is "memory"."""
+        if self.buffer_manager.durability == "memory":
+            return
+        # The commit future is shared by every request in the batch; a caller
+        # going away must not cancel it for the others.
+        await asyncio.shield(self.buffer_manager.commit_waiter())
+
+    def _admit(self, size_bytes: int, sensor_name: str, client_id: str | None):
+        """Checks buffer capacity and charges the rate limiter for a single message."""
+        # 0. Refuse early when the buffer is full, before spending rate-limit budget
+        try:
+            self.buffer_manager.check_capacity(size_bytes)
+        except BufferFullError:
+            self.metrics.messages_rejected.inc((sensor_name, "buffer_full"))
+            raise
+
+        # 1. Check Rate Limiter
+        key = self.rate_limiter.key_for(sensor_name=sensor_name, client_id=client_id)
+        if not self.rate_limiter.try_acquire(size_bytes, key):
+            self.metrics.messages_rejected.inc((sensor_name, "rate_limited"))
+            key_costs = {key: size_bytes} if key is not None else None
+            raise RateLimitExceededError(
+                f"Rate limit exceeded for {size_bytes} bytes",
+                retry_after=self.rate_limiter.retry_after(size_bytes, key_costs),
+            )
+
+    def _batch_key_costs(self, batch: SensorDataBatch, size_bytes: int, client_id: str | None) -> dict[str, int]:
+        """Splits a batch's cost over the rate limiter's sub-buckets."""
+        if self.rate_limiter.fairness == "client":
+            return {client_id: size_bytes} if client_id is not None else {}
+        if self.rate_limiter.fairness == "sensor":
+            # Attribute the payload to each sensor in proportion to its number of readings.
+            return {name: size_bytes * count // len(batch) for name, count in batch.name_counts().items()}
+        return {}
+
+    async def process_batch(
+        self,
+        batch: list[SensorData] | SensorDataBatch,
+        size_bytes: int,
+        client_id: str | None = None,
+        record_ids: Sequence[bytes | None] | None = None,
+    ) -> int:
+        """
+        Protocol-agnostic entry point for processing a batch of messages.
+
+        The rate limiter is charged once for the whole batch and all messages
+        are enqueued in a single step. Adapters that decode straight into a
+        `SensorDataBatch` can pass it as is.
+
+        Args:
+            batch: The readings.
+            size_bytes: The size of the batch on the wire, charged to the rate limiter.
+            client_id: An identifier of the sender (e.g. its address), used for per-client fairness.
+            record_ids: The unique ID of each reading (None where it has none); readings whose
+                ID was accepted recently are replays and are dropped.
+
+        Returns:
+            The number of readings accepted, i.e. without the dropped replays.
+
+        Raises:
+            BufferFullError: If the buffer is at its memory ceiling.
+            RateLimitExceededError: If the incoming batch violates the rate limit.
+            OSError: If the durability level requires a write and the log writer failed to commit it.
+        """
+        started = time.perf_counter()
+        accepted, fresh_ids = self._accept_batch(batch, size_bytes, client_id, record_ids)
+        if accepted:
+            await self._wait_for_commit()
+            if fresh_ids:
+                self.dedup.remember_all(fresh_ids)
+            self.metrics.ingest_latency.observe(time.perf_counter() - started)
+        return accepted
+
+    def accept_batch(
+        self,
+        batch: list[SensorData] | SensorDataBatch,
+        size_bytes: int,
+        client_id: str | None = None,
+        record_ids: Sequence[bytes | None] | None = None,
+    ) -> int:
+        """
+        Synchronous form of `process_batch`, for adapters that are not coroutines (e.g. datagram callbacks).
+
+        Returns once the batch is buffered, whatever the durability level.
+
+        Returns:
+            The number of readings accepted, i.e. without the dropped replays.
+
+        Raises:
+            BufferFullError: If the buffer is at its memory ceiling.
+            RateLimitExceededError: If the incoming batch violates the rate limit.
+        """
+        accepted, fresh_ids = self._accept_batch(batch, size_bytes, client_id, record_ids)
+        if fresh_ids:
+            self.dedup.remember_all(fresh_ids)
+        return accepted
+
+    def _accept_batch(
+        self,
+        batch: list[SensorData] | SensorDataBatch,
+        size_bytes: int,
+        client_id: str | None,
+        record_ids: Sequence[bytes | None] | None,
+    ) -> tuple[int, list[bytes] | None]:
+        """
+        Admits and buffers a batch, without remembering its record IDs.
+
+        Returns:
+            The number of readings accepted and the record IDs to remember once they are durable.
+        """
+        if not batch:
+            return 0, None
+        if not isinstance(batch, SensorDataBatch):
+            batch = SensorDataBatch.from_readings(batch)
+
+        fresh_ids = None
+        if record_ids is not None and self.dedup is not None:
+            received = len(batch)
+            batch, fresh_ids = self._drop_replays(batch, record_ids)
+            if not batch:
+                return 0, None
+            # Replays take no buffer space, so only the remaining readings' share is charged.
+            size_bytes = size_bytes * len(batch) // received
+
+        # 0. Refuse early when the buffer is full, before spending rate-limit budget
+        try:
+            self.buffer_manager.check_capacity(size_bytes)
+        except BufferFullError:
+            self._count_batch(self.metrics.messages_rejected, batch, "buffer_full")
+            raise
+
+        # 1. Check Rate Limiter once for the whole payload
+        key_costs = self._batch_key_costs(batch, size_bytes, client_id)
+        if not self.rate_limiter.try_acquire_split(size_bytes, key_costs):
+            self._count_batch(self.metrics.messages_rejected, batch, "rate_limited")
+            raise RateLimitExceededError(
+                f"Rate limit exceeded for batch of {len(batch)} messages ({size_bytes} bytes)",
+                retry_after=self.rate_limiter.retry_after(size_bytes, key_costs),
+            )
+
+        # 2. Add the whole batch to the Buffer
+        self.buffer_manager.add_batch_nowait(batch, size_bytes)
+        self._count_batch(self.metrics.messages_accepted, batch)
+        if self.rollup is not None:
+            self.rollup.observe_batch(batch)
+        if self.recent is not None:
+            self.recent.observe_batch(batch)
+        if self.subscriptions is not None:
+            self.subscriptions.publish_batch(batch)
+        log.debug(f"Batch of {len(batch)} messages accepted into buffer.")
+        return len(batch), fresh_ids
+
+    @staticmethod
+    def _count_batch(counter, batch: SensorDataBatch, *labels: str):
+        """Adds a batch's readings to a per-sensor counter."""
+        for name, count in batch.name_counts().items():
+            counter.inc((name, *labels), count)
@@ -0,0 +1,102 @@
+import logging
+import multiprocessing
+import signal
+import time
+from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+
+class Supervisor:
+    """
+    Runs the sink as several worker processes and manages their lifecycle.
+
+    Every worker runs its own event loop, server, buffer and log writer and
+    binds the listen port with SO_REUSEPORT, so the kernel spreads
+    connections (or datagrams) across them. Workers that crash are
+    restarted; a worker exiting cleanly stops the whole sink.
+
+    On SIGINT or SIGTERM the supervisor sends every worker SIGTERM, which
+    makes it drain its buffer and close its log before exiting, and waits up
+    to `shutdown_timeout` seconds before killing stragglers.
+    """
+
+    def __init__(
+        self,
+        worker_count: int,
+        target: Callable,
+        args: tuple = (),
+        shutdown_timeout: float = 30.0,
+        context=None,
+    ):
+        """
+        Args:
+            worker_count: The number of worker processes.
+            target: The worker entry point, called as `target(worker_id, *args)`.
+            args: Further arguments for `target` (e.g. shared-memory state).
+            shutdown_timeout: How long to wait for workers to drain on shutdown.
+            context: The multiprocessing context to start workers with.
+        """
+        if worker_count < 1:
+            raise ValueError("'worker_count' must be at least 1.")
+        self.worker_count = worker_count
+        self.target = target
+        self.args = args
+        self.shutdown_timeout = shutdown_timeout
+        self._context = context or multiprocessing.get_context()
+        self._workers: list[multiprocessing.Process | None] = [None] * worker_count
+        self._stopping = False
+
+    def _start_worker(self, worker_id: int):
+        process = self._context.Process(
+            target=self.target, args=(worker_id, *self.args), name=f"telemetry-sink-worker-{worker_id}"
+        )
+        process.start()
+        self._workers[worker_id] = process
+        log.info(f"Started worker {worker_id} (pid {process.pid})")
+
+    def _request_stop(self, signum, frame):
+        if not self._stopping:
+            log.info(f"Received signal {signum}; stopping {self.worker_count} workers...")
+            self._stopping = True
+
+    def run(self):
+        """Starts the workers and blocks until all of them have shut down."""
+        previous_handlers = {
+            signum: signal.signal(signum, self._request_stop) for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            for worker_id in range(self.worker_count):
+                self._start_worker(worker_id)
+
+            while not self._stopping:
+                for worker_id, process in enumerate(self._workers):
+                    if process.is_alive() or self._stopping:
+                        continue
+                    if process.exitcode == 0:
+                        # A clean exit (e.g. invalid configuration) would only repeat itself.
+                        log.error(f"Worker {worker_id} exited; stopping the sink.")
+                        self._stopping = True
+                    else:
+                        log.error(f"Worker {worker_id} exited with code {process.exitcode}; restarting it.")
+                        self._start_worker(worker_id)
+                time.sleep(0.5)
+        finally:
+            self._shutdown()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def _shutdown(self):
+        workers = [process for process in self._workers if process is not None]
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in workers:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                log.error(f"Worker {process.name} did not drain within {self.shutdown_timeout}s; killing it.")
+                process.kill()
+                process.join()
+        log.info("All workers stopped.")
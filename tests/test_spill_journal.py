@@ -0,0 +1,178 @@
+import pytest
+
+from telemetry_sink.domain.sensor import SensorDataBatch
+from telemetry_sink.services import spill_journal
+from telemetry_sink.services.spill_journal import SpillJournal
+
+# The smallest journal allowed: a ring of 4096 bytes.
+CAPACITY = 64 + 4096
+
+
+def _readings(batch):
+    return [
+        (batch.names[name_id], value, timestamp_us)
+        for name_id, value, timestamp_us in zip(batch.name_ids, batch.values, batch.timestamps)
+    ]
+
+
+def _batch(readings):
+    batch = SensorDataBatch()
+    for name, value, timestamp_us in readings:
+        batch.append_raw(name, value, timestamp_us)
+    return batch
+
+
+def _reopen(journal):
+    journal.close()
+    return SpillJournal(journal.path, journal.capacity_bytes)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = SpillJournal(str(tmp_path / "spill.journal"), CAPACITY)
+    yield journal
+    journal.close()
+
+
+def test_new_journal_is_empty(journal):
+    assert _readings(journal.pending()) == []
+    assert journal.pending_bytes == 0
+
+
+def test_append_and_replay_after_reopen(journal):
+    assert journal.append_reading("temp", 21, 1_000)
+    assert journal.append_batch(_batch([("temp", 22, 2_000), ("ünïcødé", -3, -1)]))
+    assert journal.append_reading("hum", 2**63 - 1, -(2**63))
+    expected = [("temp", 21, 1_000), ("temp", 22, 2_000), ("ünïcødé", -3, -1), ("hum", 2**63 - 1, -(2**63))]
+    assert _readings(journal.pending()) == expected
+
+    journal = _reopen(journal)
+    assert _readings(journal.pending()) == expected
+    journal.close()
+
+
+def test_checkpoint_drops_written_readings(journal):
+    journal.append_reading("a", 1, 1)
+    mark = journal.mark()
+    journal.append_reading("a", 2, 2)
+    journal.checkpoint(mark)
+    assert _readings(journal.pending()) == [("a", 2, 2)]
+
+    journal = _reopen(journal)
+    assert _readings(journal.pending()) == [("a", 2, 2)]
+    journal.append_reading("a", 3, 3)
+    assert _readings(journal.pending()) == [("a", 2, 2), ("a", 3, 3)]
+
+    journal.checkpoint(journal.mark())
+    assert journal.pending_bytes == 0
+    journal = _reopen(journal)
+    assert _readings(journal.pending()) == []
+    journal.close()
+
+
+def test_full_ring_refuses_appends(journal):
+    big = [("sensor", i, i) for i in range(40)]
+    appended = 0
+    while journal.append_batch(_batch(big)):
+        appended += 1
+    assert appended > 0
+    assert not journal.append_batch(_batch(big))
+    assert _readings(journal.pending()) == big * appended
+
+
+def test_wrap_around(journal):
+    expected = []
+    value = 0
+    # Keep a few records pending while appending far more than the ring holds.
+    marks = []
+    for _ in range(200):
+        readings = [("sensor", value + i, value + i) for i in range(10)]
+        value += 10
+        assert journal.append_batch(_batch(readings))
+        expected.append(readings)
+        marks.append(journal.mark())
+        if len(marks) > 3:
+            journal.checkpoint(marks.pop(0))
+            expected.pop(0)
+    pending = [reading for readings in expected for reading in readings]
+    assert _readings(journal.pending()) == pending
+
+    journal = _reopen(journal)
+    assert _readings(journal.pending()) == pending
+    journal.close()
+
+
+def test_torn_record_ends_the_replay(journal):
+    journal.append_reading("a", 1, 1)
+    journal.append_reading("a", 2, 2)
+    journal.close()
+
+    # Flip the name of the second reading, the last byte of its record.
+    with open(journal.path, "r+b") as f:
+        data = f.read()
+        f.seek(data.rindex(b"a"))
+        f.write(b"\x00")
+
+    journal = SpillJournal(journal.path, CAPACITY)
+    assert _readings(journal.pending()) == [("a", 1, 1)]
+    # The torn record is overwritten by the next append.
+    journal.append_reading("b", 3, 3)
+    journal = _reopen(journal)
+    assert _readings(journal.pending()) == [("a", 1, 1), ("b", 3, 3)]
+    journal.close()
+
+
+def _corrupt_newest_checkpoint(path):
+    with open(path, "r+b") as f:
+        data = bytearray(f.read(64))
+        counts = [spill_journal._CHECKPOINT.unpack_from(data, slot)[0] for slot in spill_journal._CHECKPOINT_SLOTS]
+        slot = spill_journal._CHECKPOINT_SLOTS[counts.index(max(counts))]
+        f.seek(slot + 8)
+        f.write(b"\xff")
+
+
+def test_corrupted_checkpoint_slot_falls_back_to_the_other(journal):
+    journal.append_reading("a", 1, 1)
+    first = journal.mark()
+    journal.append_reading("a", 2, 2)
+    second = journal.mark()
+    journal.append_reading("a", 3, 3)
+    journal.checkpoint(first)
+    journal.checkpoint(second)
+    journal.close()
+
+    _corrupt_newest_checkpoint(journal.path)
+    journal = SpillJournal(journal.path, CAPACITY)
+    # The previous checkpoint is used: the reading after it is replayed again.
+    assert _readings(journal.pending()) == [("a", 2, 2), ("a", 3, 3)]
+    journal.close()
+
+
+def test_no_valid_checkpoint_starts_over(journal):
+    journal.append_reading("a", 1, 1)
+    journal.append_reading("a", 2, 2)
+    journal.close()
+    for _ in spill_journal._CHECKPOINT_SLOTS:
+        _corrupt_newest_checkpoint(journal.path)
+
+    journal = SpillJournal(journal.path, CAPACITY)
+    assert _readings(journal.pending()) == []
+    # A new record of the same size must not lead into the old run's second one.
+    journal.append_reading("b", 3, 3)
+    journal = _reopen(journal)
+    assert _readings(journal.pending()) == [("b", 3, 3)]
+    journal.close()
+
+
+def test_reset_recreates_a_resized_journal(journal):
+    journal.append_reading("a", 1, 1)
+    journal.close()
+
+    journal = SpillJournal(journal.path, 2 * CAPACITY)
+    # An existing journal keeps its size until it has been replayed.
+    assert _readings(journal.pending()) == [("a", 1, 1)]
+    journal.reset()
+    assert _readings(journal.pending()) == []
+    journal.close()
+    with open(journal.path, "rb") as f:
+        assert len(f.read()) == 2 * CAPACITY
@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from sensor_node.infrastructure.wire_format import encode_binary_batch
+from telemetry_sink.adapters.wire_format import (
+    FLAG_MICROSECONDS,
+    WIRE_FORMAT_VERSION,
+    WireFormatError,
+    decode_binary_batch,
+    decode_binary_batch_with_ids,
+)
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+def _readings(batch):
+    return [
+        (batch.names[name_id], value, timestamp_us)
+        for name_id, value, timestamp_us in zip(batch.name_ids, batch.values, batch.timestamps)
+    ]
+
+
+def _round_trip(readings, record_ids=None):
+    batch, decoded_ids = decode_binary_batch_with_ids(encode_binary_batch(readings, record_ids))
+    assert decoded_ids == record_ids
+    return _readings(batch)
+
+
+def test_round_trip_steady_readings():
+    readings = [(f"sensor-{i % 3}", i * 7 - 50, 1_700_000_000_000_000 + i * 100_000) for i in range(100)]
+    assert _round_trip(readings) == readings
+
+
+def test_round_trip_empty_and_single():
+    assert _round_trip([]) == []
+    assert _round_trip([("a", 1, 2)]) == [("a", 1, 2)]
+
+
+@pytest.mark.parametrize("edge", [INT64_MIN, INT64_MIN + 1, -1, 0, 1, INT64_MAX - 1, INT64_MAX])
+def test_round_trip_int64_edges(edge):
+    readings = [("a", edge, edge), ("b", -edge - 1, edge), ("a", edge, -edge - 1)]
+    assert _round_trip(readings) == readings
+
+
+def test_round_trip_extreme_deltas():
+    # Deltas and delta-of-deltas well outside the int64 range.
+    timestamps = [INT64_MIN, INT64_MAX, INT64_MIN, INT64_MAX, 0, INT64_MIN]
+    readings = [("a", i, timestamp) for i, timestamp in enumerate(timestamps)]
+    assert _round_trip(readings) == readings
+
+
+def test_round_trip_negative_deltas():
+    timestamps = [1_000_000, 900_000, 950_000, 0, -5_000_000, -5_000_001, -4_000_000]
+    readings = [("a", -i, timestamp) for i, timestamp in enumerate(timestamps)]
+    assert _round_trip(readings) == readings
+
+
+def test_round_trip_names_and_record_ids():
+    readings = [("temp", 1, 10), ("ünïcødé", 2, 20), ("", 3, 30), ("temp", 4, 40)]
+    record_ids = [bytes([i]) * 16 for i in range(len(readings))]
+    assert _round_trip(readings, record_ids) == readings
+
+
+def test_decode_millisecond_timestamps():
+    body = bytearray(encode_binary_batch([("a", 1, 1_000), ("a", 2, 2_500)]))
+    body[1] &= ~FLAG_MICROSECONDS
+    assert _readings(decode_binary_batch(bytes(body))) == [("a", 1, 1_000_000), ("a", 2, 2_500_000)]
+
+
+def test_decode_rejects_values_outside_int64():
+    body = encode_binary_batch([("a", INT64_MAX + 1, 0)])
+    with pytest.raises(WireFormatError):
+        decode_binary_batch(body)
+
+
+def test_encode_rejects_bad_record_ids():
+    with pytest.raises(ValueError):
+        encode_binary_batch([("a", 1, 2)], [b"short"])
+    with pytest.raises(ValueError):
+        encode_binary_batch([("a", 1, 2)], [])
+
+
+@pytest.mark.parametrize("record_ids", [None, [b"\x01" * 16, b"\x02" * 16, b"\x03" * 16]])
+def test_decode_rejects_every_truncation(record_ids):
+    body = encode_binary_batch([("a", 1, 10), ("b", -300, 20), ("a", INT64_MAX, 35)], record_ids)
+    for length in range(len(body)):
+        with pytest.raises(WireFormatError):
+            decode_binary_batch(body[:length])
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        bytes((WIRE_FORMAT_VERSION + 1, FLAG_MICROSECONDS, 0, 0)),
+        # Trailing bytes after an empty batch.
+        bytes((WIRE_FORMAT_VERSION, FLAG_MICROSECONDS, 0, 0, 0)),
+        # One name with invalid UTF-8.
+        bytes((WIRE_FORMAT_VERSION, FLAG_MICROSECONDS, 1, 1, 0xFF, 1, 0, 0, 0)),
+        # A name index past the dictionary.
+        bytes((WIRE_FORMAT_VERSION, FLAG_MICROSECONDS, 1, 1, 0x61, 1, 1, 0, 0)),
+        # A record count larger than the body could hold.
+        bytes((WIRE_FORMAT_VERSION, FLAG_MICROSECONDS, 0, 0x80, 0x01)),
+        # A varint that never ends.
+        bytes((WIRE_FORMAT_VERSION, FLAG_MICROSECONDS, 1, 1, 0x61, 1, 0)) + b"\xff" * 12,
+    ],
+)
+def test_decode_rejects_malformed_batches(body):
+    with pytest.raises(WireFormatError):
+        decode_binary_batch(body)
+
+
+def test_decode_garbage_only_raises_wire_format_errors():
+    rng = random.Random(1234)
+    valid = encode_binary_batch([("a", 1, 10), ("b", 2, 20)], [b"\x07" * 16, b"\x08" * 16])
+    for _ in range(2000):
+        if rng.random() < 0.5:
+            body = bytes(rng.randrange(256) for _ in range(rng.randrange(1, 64)))
+        else:
+            mutated = bytearray(valid)
+            for _ in range(rng.randrange(1, 4)):
+                mutated[rng.randrange(len(mutated))] = rng.randrange(256)
+            body = bytes(mutated)
+        try:
+            decode_binary_batch(body)
+        except WireFormatError:
+            pass